@@ -0,0 +1,352 @@
+""" Local HTTP/JSON API over the task service.
+
+    python api.py --host 127.0.0.1 --port 8080
+
+    GET    /tasks?type=campus,project&status=pending&after=campus:42&limit=100
+    GET    /tasks/search?q=essay&status=pending&limit=50
+    GET    /agenda/overdue|today|week   or   /agenda?start=2025-06-01&end=2025-07-01&module=CS101
+    GET    /modules
+    GET    /tasks/<type>                 one category, same query as /tasks, and also
+           /tasks/<type>?sort=dueDate&module=CS101   sorted (see service.SORTS) or narrowed (service.FILTERS)
+    POST   /tasks/<type>                 {"name": ..., "descr": ..., ...} as in the import files
+    GET    /tasks/<type>/<id>
+    PUT    /tasks/<type>/<id>            every field; PATCH only the ones given, "status" included
+    DELETE /tasks/<type>/<id>            moves it to the trash, where it is kept TODO_TRASH_DAYS
+    POST   /tasks/<type>/<id>/restore    takes it back out
+    GET    /trash?limit=100              deleted tasks, most recently deleted first
+
+A task is answered as the fields of its record (records.py): task_type, task_id, name,
+description, status and module/due_date, tech_stack/level or lang. Lists answer
+{"tasks": [...], "next": "<type>:<id>" or null}; pass next back as after for the following page.
+Sorted lists answer "<type>:<id>:<value>" instead, the value the last task was sorted on (left
+out when it has none), so the following page does not depend on that task still being there;
+the trash answers the time the last task was deleted as the value.
+Errors answer {"error": "..."} with 400, 404, 405 or 500, and malformed or slow requests with
+400, 408, 411, 413, 414 or 431 before the connection is closed.
+
+Connections are kept alive (HTTP/1.1) and served concurrently by asyncio; the blocking database
+calls run on a thread pool as large as the connection pool, so requests on different
+connections use different database connections. Answers come from the same cache as the window's, which
+follows the change log every TODO_POLL_INTERVAL seconds to pick up other clients' writes.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from http import HTTPStatus
+import argparse
+import asyncio
+import json
+import re
+import os
+import changes
+import records
+import service
+
+WORKERS = int(os.getenv("TODO_POOL_SIZE", "5"))
+
+# Seconds an idle keep-alive connection is held open
+KEEPALIVE_TIMEOUT = 15
+
+# Seconds the headers and body of a request have to arrive in once its first line has
+REQUEST_TIMEOUT = 10
+
+MAX_BODY = 1 << 20
+MAX_HEADERS = 100
+MAX_LIMIT = 500
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --- Request parameters ---
+def query_value(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+def query_limit(query, default=100):
+    try:
+        limit = int(query_value(query, "limit", default))
+    except ValueError:
+        raise HTTPError(400, "limit must be a number")
+    if not 0 < limit <= MAX_LIMIT:
+        raise HTTPError(400, f"limit must be between 1 and {MAX_LIMIT}")
+    return limit
+
+def query_status(query):
+    status = query_value(query, "status")
+    if status is not None and status not in service.TASK_STATUSES:
+        raise HTTPError(400, f"status must be one of {', '.join(service.TASK_STATUSES)}")
+    return status
+
+def query_after(query):
+    """ (task_type, task_id, sort value or None) of after """
+    after = query_value(query, "after")
+    if not after:
+        return None
+    task_type, _, rest = after.partition(":")
+    task_id, sorted_on, value = rest.partition(":")
+    if not task_id.isdigit():
+        raise HTTPError(400, "after must look like <type>:<id>")
+    return task_type, int(task_id), value if sorted_on else None
+
+def json_body(body):
+    try:
+        return json.loads(body or b"null")
+    except ValueError:
+        raise HTTPError(400, "Body is not JSON")
+
+
+# --- Handlers; each runs on the worker pool and returns (status, payload) ---
+def page_payload(tasks, after):
+    """ after is (task_type, task_id), with the sort value as well for a sorted list """
+    return {"tasks": tasks, "next": ":".join(str(part) for part in after if part is not None) if after else None}
+
+def list_tasks(query, body, task_type=None):
+    task_types = [task_type] if task_type else query_value(query, "type", ",".join(service.TASK_TYPES)).split(",")
+    sort = query_value(query, "sort")
+    columns = {column for t in task_types for column in service.FILTERS.get(t, [])}
+    filters = {column: query_value(query, column) for column in columns if query_value(query, column) is not None}
+    if sort or filters:
+        return sorted_tasks(task_types, sort, filters, query)
+    after = query_after(query)
+    tasks, after = service.list_tasks(task_types, after and after[:2], query_limit(query), query_status(query))
+    return 200, page_payload(tasks, after)
+
+def sorted_tasks(task_types, sort, filters, query):
+    if len(task_types) != 1:
+        raise HTTPError(400, "sort and filters apply to one task type")
+    after = query_after(query)
+    if after and after[0] != task_types[0]:
+        raise HTTPError(400, f"Cannot continue after a {after[0]} task here")
+    limit = query_limit(query)
+    # Pages continue after the (sort value, id) next carries
+    tasks = service.sorted_page(task_types[0], sort, filters, (after[2], after[1]) if after else None,
+                                limit, query_status(query))
+    if len(tasks) < limit:
+        return 200, page_payload(tasks, None)
+    value, task_id = service.sort_position(tasks[-1], sort)
+    return 200, page_payload(tasks, (task_types[0], task_id, value))
+
+def search_tasks(query, body):
+    text = query_value(query, "q", "")
+    return 200, {"tasks": service.search_tasks(text, query_limit(query, 50), query_status(query)) if text.strip() else []}
+
+def agenda(query, body, view=None):
+    return 200, {"tasks": service.agenda(view, query_value(query, "start"), query_value(query, "end"),
+                                         query_value(query, "module"), query_status(query))}
+
+def modules(query, body):
+    return 200, {"modules": service.modules()}
+
+def create_task(query, body, task_type):
+    return 201, service.create_task(task_type, json_body(body))
+
+def get_task(query, body, task_type, task_id):
+    return 200, service.get_task(task_type, task_id)
+
+def replace_task(query, body, task_type, task_id):
+    return 200, service.update_task(task_type, task_id, json_body(body))
+
+def patch_task(query, body, task_type, task_id):
+    return 200, service.update_task(task_type, task_id, json_body(body), partial=True)
+
+def delete_task(query, body, task_type, task_id):
+    service.delete_task(task_type, task_id)
+    return 204, None
+
+def restore_task(query, body, task_type, task_id):
+    return 200, service.restore_task(task_type, task_id)
+
+def trash(query, body):
+    after = query_after(query)
+    if after:
+        try:
+            after = after[0], after[1], float(after[2])
+        except (TypeError, ValueError):
+            raise HTTPError(400, "after must look like <type>:<id>:<deletedAt> here")
+    tasks, after = service.trash_page(after, query_limit(query))
+    return 200, page_payload(tasks, after)
+
+
+# (path pattern, {method: handler}); groups are passed to the handler, converted by name
+ROUTES = [
+    (r"/tasks", {"GET": list_tasks}),
+    (r"/tasks/search", {"GET": search_tasks}),
+    (r"/agenda", {"GET": agenda}),
+    (r"/agenda/(?P<view>\w+)", {"GET": agenda}),
+    (r"/modules", {"GET": modules}),
+    (r"/trash", {"GET": trash}),
+    (r"/tasks/(?P<task_type>\w+)", {"GET": list_tasks, "POST": create_task}),
+    (r"/tasks/(?P<task_type>\w+)/(?P<task_id>\d+)",
+     {"GET": get_task, "PUT": replace_task, "PATCH": patch_task, "DELETE": delete_task}),
+    (r"/tasks/(?P<task_type>\w+)/(?P<task_id>\d+)/restore", {"POST": restore_task})
+]
+ROUTES = [(re.compile(pattern + "/?$"), methods) for pattern, methods in ROUTES]
+
+CONVERTERS = {"task_id": int}
+
+def route(method, path):
+    for pattern, methods in ROUTES:
+        match = pattern.match(path)
+        if match:
+            if method not in methods:
+                raise HTTPError(405, f"{method} is not allowed on {path}")
+            args = {name: CONVERTERS.get(name, str)(value) for name, value in match.groupdict().items()}
+            return methods[method], args
+    raise HTTPError(404, f"No route for {path}")
+
+def respond(method, target, body):
+    """ Run one request to completion; never raises """
+    try:
+        url = urlsplit(target)
+        handler, args = route(method, url.path)
+        return handler(parse_qs(url.query), body, **args)
+    except HTTPError as e:
+        return e.status, {"error": str(e)}
+    except service.NotFound as e:
+        return 404, {"error": str(e)}
+    except (service.ValidationError, ValueError) as e:
+        return 400, {"error": str(e)}
+    except Exception as e:
+        return 500, {"error": f"{type(e).__name__}: {e}"}
+
+
+# --- HTTP/1.1 over asyncio streams ---
+class Server:
+    def __init__(self, workers=WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self.server = None
+        self.follower = None
+
+    async def start(self, host="127.0.0.1", port=8080):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, service.connect)
+        self.server = await asyncio.start_server(self.handle, host, port, reuse_address=True)
+        if changes.POLL_INTERVAL > 0:
+            self.follower = asyncio.create_task(self.follow_changes())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.follower:
+            self.follower.cancel()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    async def follow_changes(self):
+        """ Apply other clients' writes to the cache, as the window does on its change timer """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(changes.POLL_INTERVAL)
+            try:
+                if await loop.run_in_executor(self.executor, service.poll_changes) is None:
+                    # Too far behind to replay; the next requests read the database again
+                    service.invalidate()
+            except Exception:
+                # The database is out of reach; the next poll tries again
+                pass
+
+    @staticmethod
+    async def read_line(reader, status, message):
+        """ One line; longer than the stream's limit answers status """
+        try:
+            return await reader.readline()
+        except ValueError:
+            raise HTTPError(status, message)
+
+    async def read_request(self, reader):
+        line = await asyncio.wait_for(self.read_line(reader, 414, "Request line too long"), KEEPALIVE_TIMEOUT)
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        try:
+            headers, body = await asyncio.wait_for(self.read_message(reader), REQUEST_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "The request took too long to arrive")
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method, target, body, keep_alive
+
+    async def read_message(self, reader):
+        """ The headers and body after a request line """
+        headers = {}
+        while True:
+            line = await self.read_line(reader, 431, "Header line too long")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(431, "Too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            raise HTTPError(411, "Send a Content-Length instead of a chunked body")
+        length = headers.get("content-length") or "0"
+        if not length.isdigit():
+            raise HTTPError(400, "Bad Content-Length")
+        length = int(length)
+        if length > MAX_BODY:
+            raise HTTPError(413, "Body too large")
+        body = await reader.readexactly(length) if length else b""
+        return headers, body
+
+    async def handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except HTTPError as e:
+                    self.write(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, body, keep_alive = request
+                status, payload = await loop.run_in_executor(self.executor, respond, method, target, body)
+                self.write(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def write(self, writer, status, payload, keep_alive):
+        body = b"" if payload is None else json.dumps(payload, default=records.as_dict).encode()
+        head = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", f"Content-Length: {len(body)}"]
+        if body:
+            head.append("Content-Type: application/json")
+        head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+
+async def serve(host, port, workers):
+    server = Server(workers)
+    port = await server.start(host, port)
+    print(f"Serving tasks on http://{host}:{port}", flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the task database as a local HTTP/JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="threads running database calls")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
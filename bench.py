@@ -0,0 +1,370 @@
+""" Benchmarks for the data-access and rendering hot paths.
+
+    python bench.py --sizes 1000,10000 --output bench_report.json
+    python bench.py --baseline bench_baseline.json
+    python bench.py --startup-only --startup-budget 1500
+
+Each size seeds that many tasks per category into a fresh SQLite database, then times the
+logic getters, single inserts, "All Tasks" end to end in an offscreen window, the cost of
+painting and clicking a card, and requests to the HTTP API (api.py), and records the query plan
+of every named statement in queries.py. Results are written as
+JSON; with --baseline any timing that got slower by more than --threshold is reported and the
+exit status is 1.
+
+Startup is measured in fresh interpreters: the import time of display (from -X importtime) and
+the time from interpreter start to the first painted frame of the main window. --startup-budget
+fails the run when the first frame takes longer than that many milliseconds; tests/test_startup.py
+holds both to IMPORT_BUDGET and STARTUP_BUDGET.
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from statistics import median
+import subprocess
+import tempfile
+import platform
+import argparse
+import time
+import json
+import sys
+
+
+def timed(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(median(samples), 4), "min_ms": round(min(samples), 4)}
+
+def per_call(result, calls):
+    return {name: round(value / calls, 4) for name, value in result.items()}
+
+
+# --- Seeding ---
+def seed(logic, count):
+    def rows(task_type):
+        for i in range(count):
+            if task_type == "campus":
+                yield (f"Assignment {i}", f"MOD{i % 12}", "2025-06-05", f"Campus task number {i}")
+            elif task_type == "project":
+                yield (f"Project {i}", "Python, Qt", f"Project task number {i}", logic.PROJECT_LEVELS[i % 3])
+            elif task_type == "learning":
+                yield (f"Learn {i}", ["Python", "Rust", "Go"][i % 3], f"Learning task number {i}")
+            else:
+                yield (f"Task {i}", f"General task number {i}")
+
+    def batches():
+        for task_type in logic.TASK_TYPES:
+            batch = []
+            for row in rows(task_type):
+                batch.append(row)
+                if len(batch) == 5000:
+                    yield task_type, batch
+                    batch = []
+            if batch:
+                yield task_type, batch
+
+    logic.get_storage().execute_batches([("INSERT INTO modules (module) VALUES (%s)", [(f"MOD{i}",) for i in range(12)])])
+    logic.bulk_add_tasks(batches())
+
+
+# --- Benchmarks ---
+def task_memory(logic):
+    """ Bytes held per loaded task, records and their strings included """
+    import tracemalloc
+    import gc
+    logic.cache.invalidate()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tasks = logic.all_tasks()
+        held = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return {"bytes_per_task": round(held / max(len(tasks), 1), 1)}
+
+def query_plans(logic):
+    """ SQLite's plan for every named statement in queries.SQL, to spot one that stopped using its index """
+    import queries
+    storage = logic.get_storage()
+    plans = {}
+    with storage.cursor() as cursor:
+        for name, sql in queries.SQL.items():
+            if name.startswith("search.mysql") or "{" in sql:
+                continue
+            cursor.execute("EXPLAIN QUERY PLAN " + storage.sql(sql), [None] * sql.count("%s"))
+            plans[name] = "; ".join(row[3] for row in cursor.fetchall())
+    return plans
+
+def bench_logic(logic, repeat):
+    results = {}
+    cold = logic.cache.invalidate
+    for name in ["campus_tasks", "project_tasks", "learning_tasks", "general_tasks", "all_tasks"]:
+        results[name] = timed(getattr(logic, name), repeat)
+    results["all_tasks_page_cold"] = timed(lambda: logic.all_tasks_page(limit=100), repeat, setup=cold)
+    results["all_tasks_page_warm"] = timed(lambda: logic.all_tasks_page(limit=100), repeat)
+    results["search_tasks"] = timed(lambda: logic.search_tasks("task 1"), repeat)
+    results["task_memory"] = task_memory(logic)
+    results["query_plans"] = query_plans(logic)
+
+    inserts = 50
+    results["add_general_task"] = per_call(timed(lambda: [logic.add_general_task("Bench", "insert") for _ in range(inserts)], repeat), inserts)
+    results["add_campus_task"] = per_call(timed(lambda: [logic.add_campus_task("Bench", "MOD1", "2025-06-05", "insert") for _ in range(inserts)], repeat), inserts)
+    return results
+
+def bench_display(app, display, logic, repeat):
+    from PySide6.QtCore import QThreadPool
+    from PySide6.QtGui import QImage, QPainter
+    from PySide6.QtWidgets import QStyleOptionViewItem
+
+    window = display.Display()
+    window.resize(1000, 600)
+    window.show()
+    app.processEvents()
+
+    def wait_for_load():
+        while window.loader is not None:
+            QThreadPool.globalInstance().waitForDone(10)
+            app.processEvents()
+
+    def show_all():
+        display.showCategory(window).showAllTasks()
+        wait_for_load()
+        window.taskView.viewport().repaint()
+
+    results = {
+        "showAllTasks_cold": timed(show_all, repeat, setup=logic.cache.invalidate),
+        "showAllTasks_warm": timed(show_all, repeat)
+    }
+
+    # Paint cost of one card, the successor of create_task_card
+    delegate = window.taskView.itemDelegate()
+    option = QStyleOptionViewItem()
+    rows = min(window.taskModel.rowCount(), 100)
+    option.rect = window.taskView.visualRect(window.taskModel.index(0))
+    image = QImage(option.rect.width(), option.rect.height(), QImage.Format_ARGB32)
+
+    def paint_cards():
+        painter = QPainter(image)
+        for row in range(rows):
+            delegate.paint(painter, option, window.taskModel.index(row))
+        painter.end()
+
+    if rows:
+        results["paint_card"] = per_call(timed(paint_cards, repeat), rows)
+
+    # Clicking down the visible cards, the successor of select_card; includes the repaint it causes
+    from PySide6.QtCore import Qt
+    from PySide6.QtTest import QTest
+    viewport = window.taskView.viewport()
+    visible = [row for row in range(rows) if viewport.rect().contains(window.taskView.visualRect(window.taskModel.index(row)))]
+
+    def click_cards():
+        for row in visible:
+            QTest.mouseClick(viewport, Qt.LeftButton, pos=window.taskView.visualRect(window.taskModel.index(row)).center())
+            app.processEvents()
+
+    if visible:
+        results["select_card"] = per_call(timed(click_cards, repeat), len(visible))
+
+    window.close()
+    wait_for_load()
+    return results
+
+# --- HTTP API; the server runs in its own interpreter so the client does not share its GIL ---
+async def http_client(port, paths, count):
+    """ count GETs over one keep-alive connection, cycling through paths """
+    import asyncio
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for i in range(count):
+            writer.write(f"GET {paths[i % len(paths)]} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+            await writer.drain()
+            status = await reader.readline()
+            if b" 200 " not in status:
+                raise RuntimeError(f"{paths[i % len(paths)]}: {status.decode().strip()}")
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+    finally:
+        writer.close()
+
+def bench_api(folder, size, repeat, connections=16, requests=4000):
+    import asyncio
+    env = dict(os.environ, TODO_BACKEND="sqlite", TODO_SQLITE_PATH=os.path.join(folder, "bench.db"),
+               TODO_POOL_SIZE=str(min(connections, 8)))
+    here = os.path.dirname(os.path.abspath(__file__))
+    server = subprocess.Popen([sys.executable, "api.py", "--port", "0"], cwd=here, env=env,
+                              stdout=subprocess.PIPE, text=True)
+    try:
+        port = int(server.stdout.readline().rsplit(":", 1)[1])
+        ids = range(1, size + 1, max(1, size // 1000))
+        gets = [f"/tasks/general/{i}" for i in ids]
+        pages = [f"/tasks/project?limit=20&after=project:{i}" for i in ids]
+
+        def load(paths, clients, total):
+            async def clients_done():
+                await asyncio.gather(*(http_client(port, paths, total // clients) for _ in range(clients)))
+            asyncio.run(clients_done())
+
+        results = {
+            "api_get_task": per_call(timed(lambda: load(gets, 1, 1000), repeat), 1000),
+            "api_list_tasks": per_call(timed(lambda: load(pages, 1, 500), repeat), 500),
+            # Wall time per request with many connections at once; 1000 / this is requests per second
+            "api_concurrent": per_call(timed(lambda: load(gets + pages, connections, requests), repeat), requests)
+        }
+    finally:
+        server.terminate()
+        server.wait()
+    print(f"{size} tasks per category: API {1000 / results['api_concurrent']['median_ms']:.0f} requests/s "
+          f"over {connections} connections", file=sys.stderr)
+    return results
+
+# Startup budgets in milliseconds, checked by tests/test_startup.py
+IMPORT_BUDGET = 500
+STARTUP_BUDGET = 1500
+
+# Run in a fresh interpreter; prints the milliseconds from process start to the first paint
+STARTUP_PROBE = """
+import time
+from PySide6.QtCore import QObject, QEvent
+from PySide6.QtWidgets import QApplication
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            print("first_frame_ms", (time.perf_counter() - START) * 1000, flush=True)
+            app.exit(0)
+        return False
+
+app = QApplication([])
+from main import load_stylesheet
+app.setStyleSheet(load_stylesheet())
+import display
+window = display.Display()
+window.installEventFilter(FirstPaint(window))
+window.show()
+app.exec()
+"""
+
+def import_time_ms(stderr, module):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    for line in stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    return None
+
+def bench_startup(repeat, folder):
+    env = dict(os.environ, TODO_BACKEND="sqlite", TODO_SQLITE_PATH=os.path.join(folder, "startup.db"))
+    here = os.path.dirname(os.path.abspath(__file__))
+    # Process start is approximated by the wall clock just before spawning it
+    code = "import time\nSTART = time.perf_counter() - (time.time() - %r)\n" + STARTUP_PROBE
+    imports, frames = [], []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code % time.time()],
+                              cwd=here, env=env, capture_output=True, text=True, timeout=120)
+        frame = [line.split()[1] for line in proc.stdout.splitlines() if line.startswith("first_frame_ms")]
+        if proc.returncode or not frame:
+            raise RuntimeError(f"startup probe failed: {proc.stderr[-2000:]}")
+        frames.append(float(frame[0]))
+        imports.append(import_time_ms(proc.stderr, "display"))
+
+    def summary(samples):
+        return {"median_ms": round(median(samples), 4), "min_ms": round(min(samples), 4)}
+    return {"import_display": summary(imports), "first_frame": summary(frames)}
+
+def run(sizes, repeat):
+    from PySide6.QtWidgets import QApplication
+    import storage
+    import logic
+    import display
+
+    from main import load_stylesheet
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    app.setStyleSheet(load_stylesheet())
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "results": {}
+    }
+    with tempfile.TemporaryDirectory() as folder:
+        report["results"]["startup"] = bench_startup(repeat, folder)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            storage.set_storage(storage.SQLiteStorage(os.path.join(folder, "bench.db")))
+            logic.cache.invalidate()
+            seed_time = timed(lambda: seed(logic, size), 1)
+            results = {"seed": seed_time}
+            results.update(bench_logic(logic, repeat))
+            results.update(bench_display(app, display, logic, repeat))
+            results.update(bench_api(folder, size, repeat))
+            report["results"][str(size)] = results
+            print(f"{size} tasks per category: done", file=sys.stderr)
+    return report
+
+
+# --- Comparing against a baseline ---
+def regressions(report, baseline, threshold):
+    found = []
+    for size, results in report["results"].items():
+        for name, result in results.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if not before or name == "seed" or "min_ms" not in result:
+                continue
+            # The fastest run is the least disturbed by noise from the rest of the machine
+            old, new = before["min_ms"], result["min_ms"]
+            if old > 0 and new > old * (1 + threshold):
+                found.append(f"{size}/{name}: {old:.3f} ms -> {new:.3f} ms (+{(new / old - 1) * 100:.0f}%)")
+    return found
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ToDo List data access and rendering")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="tasks per category, comma separated")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before it counts as a regression")
+    parser.add_argument("--startup-only", action="store_true", help="only measure startup")
+    parser.add_argument("--startup-budget", type=float, help="maximum milliseconds to the first frame")
+    args = parser.parse_args(argv)
+
+    sizes = [] if args.startup_only else [int(size) for size in args.sizes.split(",")]
+    report = run(sizes, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    startup = report["results"]["startup"]
+    print(f"Startup: import display {startup['import_display']['median_ms']:.0f} ms, "
+          f"first frame {startup['first_frame']['median_ms']:.0f} ms")
+    if args.startup_budget and startup["first_frame"]["median_ms"] > args.startup_budget:
+        print(f"OVER BUDGET first frame {startup['first_frame']['median_ms']:.0f} ms > {args.startup_budget:.0f} ms")
+        return 1
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            return 1
+        print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+from bisect import bisect_left, bisect_right, insort
+import threading
+import time
+import os
+
+CACHE_TTL = float(os.getenv("TODO_CACHE_TTL", "60"))
+
+
+class TaskCache:
+    """ Process-local copy of the task records of each category.
+
+    Each view, a category optionally narrowed to one status, is cached on its own. Pages read
+    from the database are merged in as they arrive. A view only serves reads for the id range
+    that has been read without gaps (loadedUpto), or all of it once it was read to the end
+    (complete). Writes go through put/remove, which move a task between the views of its
+    category as its status changes, so the copy never has to be re-read.
+    """
+    def __init__(self, ttl=CACHE_TTL):
+        # A ttl of 0 keeps entries until they are invalidated
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        # All keyed by view, (task_type, status or None)
+        self._records = {}
+        self._ids = {}
+        self._loadedUpto = {}
+        self._complete = {}
+        self._loadedAt = {}
+        self._lookups = {}
+        # The last value each lookup loaded; kept through expiry and invalidation
+        self._known = {}
+        self.agenda = AgendaIndex()
+
+    def _expired(self, loadedAt):
+        return self.ttl > 0 and time.monotonic() - loadedAt > self.ttl
+
+    def _view(self, view):
+        if view in self._loadedAt and self._expired(self._loadedAt[view]):
+            self._drop(view)
+        if view not in self._records:
+            self._records[view] = {}
+            self._ids[view] = []
+            self._loadedUpto[view] = 0
+            self._complete[view] = False
+            self._loadedAt[view] = time.monotonic()
+        return self._records[view]
+
+    def _views(self, task_type):
+        return [view for view in self._records if view[0] == task_type]
+
+    def _drop(self, view):
+        for store in (self._records, self._ids, self._loadedUpto, self._complete, self._loadedAt):
+            store.pop(view, None)
+
+    def invalidate(self, task_type=None):
+        with self._lock:
+            for view in (self._views(task_type) if task_type else list(self._records)):
+                self._drop(view)
+            if task_type is None:
+                self._lookups.clear()
+            if task_type in (None, "campus"):
+                self.agenda.clear()
+
+    # --- Reads ---
+    def page(self, task_types, position, limit, status=None):
+        """ The same page all_tasks_page would return, or None if part of it is not cached """
+        with self._lock:
+            index, after_id = position
+            tasks = []
+            while index < len(task_types) and len(tasks) < limit:
+                view = (task_types[index], status)
+                records = self._view(view)
+                ids = self._ids[view]
+                start = bisect_right(ids, after_id)
+                taken = ids[start:start + limit - len(tasks)]
+                if not self._complete[view]:
+                    upto = self._loadedUpto[view]
+                    taken = [i for i in taken if i <= upto]
+                    if len(tasks) + len(taken) < limit:
+                        return None
+                tasks.extend(records[i] for i in taken)
+                index, after_id = index + 1, 0
+            return tasks
+
+    def store(self, task_types, position, limit, tasks, status=None):
+        """ Merge a page read from the database and extend the gap-free range of each view """
+        with self._lock:
+            byType = {}
+            for task in tasks:
+                byType.setdefault(task.task_type, []).append(task)
+
+            index, after_id = position
+            lastType = tasks[-1].task_type if tasks else None
+            for order in range(index, len(task_types)):
+                view = (task_types[order], status)
+                records = self._view(view)
+                rows = byType.get(view[0], [])
+                for task in rows:
+                    self._insert(view, records, task)
+
+                start = after_id if order == index else 0
+                # A category was read to the end if the page moved past it or came back short
+                exhausted = len(tasks) < limit or (lastType is not None and task_types.index(lastType) > order)
+                if start <= self._loadedUpto[view]:
+                    if rows:
+                        self._loadedUpto[view] = max(self._loadedUpto[view], rows[-1].task_id)
+                    if exhausted:
+                        self._complete[view] = True
+                if not exhausted:
+                    break
+
+    def records(self, task_type, ids):
+        """ The cached records among ids, by id """
+        with self._lock:
+            found = {}
+            for view in self._views(task_type):
+                records = self._records[view]
+                found.update((task_id, records[task_id]) for task_id in ids if task_id in records)
+            return found
+
+    def lookup(self, name, load):
+        with self._lock:
+            cached = self._lookups.get(name)
+            if cached and not self._expired(cached[1]):
+                return cached[0]
+        value = load()
+        with self._lock:
+            self._lookups[name] = (value, time.monotonic())
+            self._known[name] = value
+        return value
+
+    def known(self, name):
+        """ The value lookup last loaded for name, however old, or None if it never has """
+        with self._lock:
+            return self._known.get(name)
+
+    # --- Write-through ---
+    def _insert(self, view, records, task):
+        if task.task_id not in records:
+            insort(self._ids[view], task.task_id)
+        records[task.task_id] = task
+
+    def _discard(self, view, task_id):
+        if self._records[view].pop(task_id, None) is not None:
+            ids = self._ids[view]
+            del ids[bisect_right(ids, task_id) - 1]
+
+    def put(self, task):
+        with self._lock:
+            task_type = task.task_type
+            self._view((task_type, None))
+            for view in self._views(task_type):
+                if view[1] is None or view[1] == task.status:
+                    self._insert(view, self._view(view), task)
+                else:
+                    self._discard(view, task.task_id)
+            if task_type == "campus":
+                self.agenda.put(task.task_id, task.due_date, task.module, task.status)
+
+    def remove(self, task_type, task_id):
+        with self._lock:
+            for view in self._views(task_type):
+                self._discard(view, task_id)
+            if task_type == "campus":
+                self.agenda.remove(task_id)
+
+
+# Sorts tasks without a due date after every date
+NO_DATE = "\uffff"
+# Bound above every key, undated ones included
+AFTER_ALL = NO_DATE * 2
+
+
+class AgendaIndex:
+    """ Campus task ids sorted by due date, overall and per module.
+
+    Filled a date range or module at a time from what logic.due_tasks reads for it, then kept
+    current by the cache's put/remove. A range it has been filled for, or one inside it, is
+    answered with bisect over the sorted keys; any other has to be read first.
+    """
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._loadedAt = None
+            self._dated = []
+            self._byModule = {}
+            self._entries = {}
+            # Key ranges read in full, (low, high) by module, None for every module
+            self._covered = {}
+
+    def ready(self):
+        with self._lock:
+            if self._loadedAt is not None and self.ttl > 0 and time.monotonic() - self._loadedAt > self.ttl:
+                self.clear()
+            return self._loadedAt is not None
+
+    def bounds(self, start, end, module):
+        # As queries.agenda: only a module's whole list, with neither start nor end, holds its
+        # undated tasks, which sort last here
+        return start or "", end or (AFTER_ALL if module is not None and start is None else NO_DATE)
+
+    def covers(self, start=None, end=None, module=None):
+        """ Whether every task due in the range, or of the module, is in the index """
+        with self._lock:
+            if not self.ready():
+                return False
+            low, high = self.bounds(start, end, module)
+            return any(first <= low and high <= last
+                       for key in {None, module} for first, last in self._covered.get(key, []))
+
+    def cover(self, start=None, end=None, module=None):
+        """ Take the range as read in full; its tasks are added with put """
+        with self._lock:
+            self.ready()
+            if self._loadedAt is None:
+                self._loadedAt = time.monotonic()
+            low, high = self.bounds(start, end, module)
+            merged = []
+            for first, last in sorted(self._covered.get(module, []) + [(low, high)]):
+                if merged and first <= merged[-1][1]:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+                else:
+                    merged.append((first, last))
+            self._covered[module] = merged
+
+    def _add(self, task_id, due, module, status):
+        key = (due or NO_DATE, task_id)
+        self._entries[task_id] = (due, module, status)
+        if due:
+            insort(self._dated, key)
+        insort(self._byModule.setdefault(module, []), key)
+
+    def remove(self, task_id):
+        with self._lock:
+            entry = self._entries.pop(task_id, None)
+            if entry is None:
+                return
+            due, module, status = entry
+            key = (due or NO_DATE, task_id)
+            if due:
+                del self._dated[bisect_left(self._dated, key)]
+            keys = self._byModule[module]
+            del keys[bisect_left(keys, key)]
+
+    def put(self, task_id, due, module, status):
+        with self._lock:
+            if self._loadedAt is None:
+                return
+            self.remove(task_id)
+            self._add(task_id, due, module, status)
+
+    def due(self, start=None, end=None, module=None, status=None):
+        """ Ids due on or after start and before end (ISO dates, None for open), earliest first """
+        with self._lock:
+            keys = self._dated if module is None else self._byModule.get(module, [])
+            low, high = self.bounds(start, end, module)
+            first, last = bisect_left(keys, (low,)), bisect_left(keys, (high,))
+            return [task_id for due, task_id in keys[first:last]
+                    if status is None or self._entries[task_id][2] == status]
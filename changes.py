@@ -0,0 +1,81 @@
+""" Follows the change log so a running window sees what other clients wrote.
+
+Triggers on the task tables number every insert, update and delete in changeLog. poll() asks for
+the entries after the last version it applied, one primary key range read that comes back empty
+while nothing changes, then re-reads the rows they name and writes them through to the cache.
+"""
+import time
+import os
+import logic
+
+# Seconds between polls; 0 turns the watcher off
+POLL_INTERVAL = float(os.getenv("TODO_POLL_INTERVAL", "2"))
+
+# How long a missing version is waited for before it is taken as rolled back
+GAP_WAIT = 10
+
+# Further behind than this and reloading the list is cheaper than replaying the log
+RESYNC_AFTER = 5000
+
+
+class ChangeFeed:
+    """ The last change version this client has applied """
+    def __init__(self):
+        self.version = None
+        self.gapSince = None
+
+    def start(self):
+        """ Begin from the newest change; everything before it is already in what will be loaded """
+        logic.prune_changes()
+        self.version = logic.change_versions()[1]
+        self.gapSince = None
+
+    def poll(self, limit=500):
+        """ Apply the next changes; returns (task_type, task_id, record or None once deleted).
+
+        Returns None when the changes since the last poll are no longer all in the log, or are
+        too many to replay, and the caller should reload instead.
+        """
+        if self.version is None:
+            self.start()
+            return []
+        rows = logic.changes_since(self.version, limit)
+        if not rows:
+            return []
+        if rows[0][0] > self.version + 1 or len(rows) == limit:
+            oldest, newest = logic.change_versions()
+            if oldest > self.version + 1 or newest - self.version > RESYNC_AFTER:
+                self.version = newest
+                self.gapSince = None
+                return None
+
+        # On MySQL versions are handed out when a row is written but show up when its
+        # transaction commits, so a missing version may still arrive. Stop short of it for
+        # a while; the rows past it are applied now and again once it is settled.
+        settled = self.version
+        for version, task_type, task_id in rows:
+            if version != settled + 1:
+                break
+            settled = version
+        if settled < rows[-1][0]:
+            if self.gapSince is None:
+                self.gapSince = time.monotonic()
+            elif time.monotonic() - self.gapSince > GAP_WAIT:
+                settled = rows[-1][0]
+                self.gapSince = None
+        else:
+            self.gapSince = None
+        self.version = settled
+
+        # Ids in the order they changed, each once
+        changed = {}
+        for version, task_type, task_id in rows:
+            changed.setdefault(task_type, {})[task_id] = None
+        results = []
+        for task_type, ids in changed.items():
+            records = logic.saved_tasks(task_type, list(ids))
+            results += [(task_type, task_id, records.get(task_id)) for task_id in ids]
+        return results
+
+
+feed = ChangeFeed()
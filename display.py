@@ -1,27 +1,391 @@
-from PySide6.QtWidgets import *
-from PySide6.QtCore import QDate
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QIcon, QFont, QColor
-import logic
-import sys
-import os
+from PySide6.QtWidgets import (QMainWindow, QWidget, QDialog, QDockWidget, QLabel, QLineEdit, QPushButton,
+                               QComboBox, QDateEdit, QListView, QTableWidget, QTableWidgetItem, QHeaderView,
+                               QAbstractItemView, QStyledItemDelegate, QStyle, QHBoxLayout, QVBoxLayout,
+                               QMessageBox, QFileDialog, QInputDialog, QMenu, QFrame)
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QRect, QThreadPool, QTimer, QElapsedTimer, QObject, QDate
+from PySide6.QtGui import QIcon, QFont, QColor, QPen, QFontMetrics, QKeySequence, QShortcut
+from loader import TaskLoader, TrashLoader, CallLoader, SyncLoader, ChangeLoader
+from metrics import metrics
+from bisect import bisect_left
+import changes
+import service
+import trash
+
+
+#--------------------------------------Task List--------------------------------------#
+
+TaskRole = Qt.UserRole + 1
+
+# Names of the service.SORTS orders and service.FILTERS columns, and where the filter values come from
+SORT_LABELS = {"dueDate": "Due Date", "module": "Module", "name": "Name", "level": "Level", "lang": "Language"}
+FILTER_LABELS = {"module": "All Modules", "level": "All Levels", "lang": "All Languages"}
+FILTER_VALUES = {
+    "module": lambda: service.modules(),
+    "level": lambda: service.PROJECT_LEVELS,
+    "lang": lambda: service.languages()
+}
+
+
+class TaskModel(QAbstractListModel):
+    """ Holds the task rows; the view only asks for the rows it paints """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tasks = []
+        # Rows arrive ordered by (category, id); sortKey maps a task onto that order.
+        # Search results are ranked instead, so ordered is cleared and rows are found by a scan
+        self.sortKey = lambda task: task.key
+        self.ordered = True
+        # Called by fetchMore to request the next page; the view asks when it nears the bottom
+        self.fetcher = None
+        self.hasMore = False
+        self.fetching = False
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.tasks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self.tasks[index.row()]
+        if role == Qt.DisplayRole:
+            return task.name
+        if role == TaskRole:
+            return task
+        return None
+
+    def setTasks(self, tasks):
+        with metrics.timer("render", "set rows"):
+            self.beginResetModel()
+            self.tasks = list(tasks)
+            self.endResetModel()
+
+    def appendTasks(self, tasks):
+        if not tasks:
+            return
+        with metrics.timer("render", "append rows"):
+            first = len(self.tasks)
+            self.beginInsertRows(QModelIndex(), first, first + len(tasks) - 1)
+            self.tasks.extend(tasks)
+            self.endInsertRows()
+
+    def clear(self):
+        self.hasMore = False
+        self.fetching = False
+        self.setTasks([])
+
+    # --- Patch single rows after a change instead of reloading the list ---
+    def findTask(self, task):
+        if not self.ordered:
+            for row, other in enumerate(self.tasks):
+                if other.key == task.key:
+                    return row
+            return -1
+        key = self.sortKey(task)
+        row = bisect_left(self.tasks, key, key=self.sortKey)
+        if row < len(self.tasks) and self.sortKey(self.tasks[row]) == key:
+            return row
+        return -1
+
+    def insertTask(self, task):
+        row = bisect_left(self.tasks, self.sortKey(task), key=self.sortKey)
+        if row == len(self.tasks) and self.hasMore:
+            # Past the loaded pages; it arrives with the page that contains it
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.tasks.insert(row, task)
+        self.endInsertRows()
+
+    def replaceTask(self, task):
+        row = self.findTask(task)
+        if row < 0:
+            return
+        if self.sortKey(self.tasks[row]) != self.sortKey(task):
+            # Moved in a sorted list, e.g. by a new due date
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.tasks[row]
+            self.endRemoveRows()
+            self.insertTask(task)
+            return
+        self.tasks[row] = task
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def removeTask(self, task):
+        row = self.findTask(task)
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.tasks[row]
+        self.endRemoveRows()
+
+    def removeTasks(self, tasks):
+        self.removeKeys(task.key for task in tasks)
+
+    def removeKeys(self, keys):
+        """ Remove the rows of many (task_type, task_id), one beginRemoveRows per run of adjacent rows """
+        keys = set(keys)
+        rows = [row for row, task in enumerate(self.tasks) if task.key in keys]
+        while rows:
+            last = rows.pop()
+            first = last
+            while rows and rows[-1] == first - 1:
+                first = rows.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.tasks[first:last + 1]
+            self.endRemoveRows()
+
+    def replaceTasks(self, tasks):
+        """ Swap in new versions of many rows with a single dataChanged """
+        rows = {task.key: row for row, task in enumerate(self.tasks)}
+        changed = []
+        moved = []
+        for task in tasks:
+            row = rows.get(task.key)
+            if row is None:
+                continue
+            if self.sortKey(self.tasks[row]) != self.sortKey(task):
+                moved.append(task)
+            else:
+                self.tasks[row] = task
+                changed.append(row)
+        if changed:
+            self.dataChanged.emit(self.index(min(changed)), self.index(max(changed)))
+        if moved:
+            self.removeTasks(moved)
+            for task in moved:
+                self.insertTask(task)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.hasMore and not self.fetching and self.fetcher is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self.fetching = True
+            self.fetcher()
+
+
+class TaskDelegate(QStyledItemDelegate):
+    """ Paints a task row as a card; selection and hover are drawn here rather than styled """
+    MARGIN = 4
+    PADDING = 10
+    LINE_SPACING = 6
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.bodyFont = QFont()
+        self.bodyFont.setPixelSize(16)
+        self.bodyFont.setWeight(QFont.DemiBold)
+
+        self.boldFont = QFont(self.bodyFont)
+        self.boldFont.setWeight(QFont.Bold)
+
+        self.bodyMetrics = QFontMetrics(self.bodyFont)
+        self.boldMetrics = QFontMetrics(self.boldFont)
+        self.lineHeight = max(self.bodyMetrics.height(), self.boldMetrics.height())
+
+        # Built once; a click or hover only repaints the rows it touches with these, never the stylesheet
+        self.cardColor = QColor("#9DB2BF")
+        self.hoverColor = QColor("#B1C4CF")
+        self.selectedColor = QColor("#0F4C75")
+        self.cardPen = QPen(QColor("#ccc"), 2)
+        self.selectedPen = QPen(QColor("#00adb5"), 2)
+        self.textColor = QColor("black")
+        self.selectedTextColor = QColor("white")
+
+    # --- Every card reserves the same three lines so the view can use uniform item sizes ---
+    def sizeHint(self, option, index):
+        height = 2 * (self.MARGIN + self.PADDING) + 3 * self.lineHeight + 2 * self.LINE_SPACING
+        return QSize(1, height)
+
+    def infoSegments(self, task):
+        task_type = task.task_type
+        if task_type == "campus":
+            return [("Module: ", False), (str(task.module), True), (f" | Due: {task.due_date}", False)]
+        elif task_type == "project":
+            return [("Tech Stack: ", False), (str(task.tech_stack), True), (f" | Level: {task.level}", False)]
+        elif task_type == "learning":
+            return [("Language: ", False), (str(task.lang), True)]
+        return []
+
+    def drawSegments(self, painter, rect, segments):
+        x = rect.left()
+        for text, bold in segments:
+            font = self.boldFont if bold else self.bodyFont
+            metrics = self.boldMetrics if bold else self.bodyMetrics
+            text = metrics.elidedText(text, Qt.ElideRight, rect.right() - x)
+            painter.setFont(font)
+            painter.drawText(QRect(x, rect.top(), rect.right() - x, rect.height()), Qt.AlignLeft | Qt.AlignVCenter, text)
+            x += metrics.horizontalAdvance(text)
+            if x >= rect.right():
+                break
+
+    def paint(self, painter, option, index):
+        # Only aggregated; one event per painted card would flood the log
+        with metrics.timer("render", "paint card", keep=False):
+            self.paintCard(painter, option, index)
+
+    def paintCard(self, painter, option, index):
+        task = index.data(TaskRole)
+        if task is None:
+            return
+
+        selected = bool(option.state & QStyle.State_Selected)
+        hovered = bool(option.state & QStyle.State_MouseOver)
+
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+
+        card = option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        painter.setPen(self.selectedPen if selected else self.cardPen)
+        painter.setBrush(self.selectedColor if selected else self.hoverColor if hovered else self.cardColor)
+        painter.drawRoundedRect(card, 10, 10)
+
+        painter.setPen(self.selectedTextColor if selected else self.textColor)
+        content = card.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        line = QRect(content.left(), content.top(), content.width(), self.lineHeight)
+
+        status = task.status
+        statusIcon = "🕒" if status == "pending" else "✅" if status == "done" else "⚠️"
+        if task.syncing:
+            # Saved locally, not yet in the database
+            statusIcon = "🔄"
+        painter.setFont(self.bodyFont)
+        painter.drawText(line, Qt.AlignRight | Qt.AlignVCenter, statusIcon)
+        self.drawSegments(painter, line.adjusted(0, 0, -2 * self.lineHeight, 0), [(task.name, True)])
+
+        segments = self.infoSegments(task)
+        if segments:
+            line.translate(0, self.lineHeight + self.LINE_SPACING)
+            self.drawSegments(painter, line, segments)
+
+        line.translate(0, self.lineHeight + self.LINE_SPACING)
+        self.drawSegments(painter, line, [(f"Description: {task.description}", False)])
+
+        painter.restore()
+
+
+#--------------------------------------Diagnostics--------------------------------------#
+
+class StallMonitor(QObject):
+    """ Ticks on the GUI thread and records every time a tick arrives late """
+    INTERVAL = 50
+    STALL_MS = 100
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.clock = QElapsedTimer()
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.INTERVAL)
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        self.clock.start()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def tick(self):
+        late = self.clock.restart() - self.INTERVAL
+        if late >= self.STALL_MS:
+            metrics.record("stall", "event loop", late)
+
+
+class DiagnosticsDock(QDockWidget):
+    """ Query, render and stall timings, refreshed while the dock is open.
+
+    Stalls are only watched while it is open, so a closed dock costs no timer ticks.
+    """
+    def __init__(self, parent=None):
+        super().__init__("Diagnostics", parent)
+        self.setObjectName("diagnostics")
+
+        self.table = QTableWidget(0, 7)
+        self.table.setHorizontalHeaderLabels(["Kind", "Name", "Calls", "Rows", "Avg ms", "Max ms", "Histogram"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+
+        exportButton = QPushButton("Export…")
+        exportButton.clicked.connect(self.exportLog)
+        resetButton = QPushButton("Reset")
+        resetButton.clicked.connect(self.reset)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(resetButton)
+        buttons.addWidget(exportButton)
+
+        content = QWidget()
+        layout = QVBoxLayout(content)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+        self.setWidget(content)
+
+        self.refreshTimer = QTimer(self)
+        self.refreshTimer.setInterval(1000)
+        self.refreshTimer.timeout.connect(self.refresh)
+        self.stallMonitor = StallMonitor(self)
+        self.visibilityChanged.connect(self.onVisibilityChanged)
+
+    def onVisibilityChanged(self, visible):
+        if visible:
+            self.refresh()
+            self.refreshTimer.start()
+            self.stallMonitor.start()
+        else:
+            self.refreshTimer.stop()
+            self.stallMonitor.stop()
+
+    def refresh(self):
+        rows = sorted(metrics.snapshot(), key=lambda item: item[2]["total_ms"], reverse=True)
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(rows))
+        for row, (kind, name, stats) in enumerate(rows):
+            histogram = " ".join(f"{bucket}:{n}" for bucket, n in stats["histogram"].items() if n)
+            values = [kind, name, stats["count"], stats["rows"], stats["avg_ms"], stats["max_ms"], histogram]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, value)
+                if column == 1:
+                    item.setToolTip(name)
+                self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True)
+
+    def reset(self):
+        metrics.reset()
+        self.refresh()
+
+    def exportLog(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export diagnostics", "diagnostics.jsonl", "JSON Lines (*.jsonl)")
+        if path:
+            metrics.export(path)
+
 
 class Display(QMainWindow):
-    def resource_path(self, relative_path):
-        """ Get absolute path to resource, works for dev and for PyInstaller """
-        if hasattr(sys, '_MEIPASS'):
-            return os.path.join(sys._MEIPASS, relative_path)
-        return os.path.join(os.path.abspath("."), relative_path)
-    
     def __init__(self):
         super().__init__()
-        
-        self.selected_card = None
-        
-        logo_path = self.resource_path("ToDo/notepad.png")
+
+        self.loader = None
+        self.loadGeneration = 0
+        self.runningLoaders = {}
+        self.loadTypes = []
+        self.browseTypes = []
+        self.loadPosition = (0, 0)
+        self.pageSize = 100
+        self.selectAllPending = False
+        self.agendaArgs = None
+        # (sort, filters) of a single category list, None for id order; see listOrder
+        self.loadOrder = None
+        # The list shows the trash; its tasks can only be restored
+        self.inTrash = False
         
         self.setWindowTitle("ToDo List")
-        self.setWindowIcon(QIcon(logo_path))
+        # Compiled into resources_rc, registered by main.py
+        self.setWindowIcon(QIcon(":/notepad.png"))
         self.setMinimumSize(1000, 600)
 
         # Main container
@@ -48,10 +412,13 @@ class Display(QMainWindow):
         self.editButton = QPushButton("✏️  Edit Task")
         self.editButton.clicked.connect(self.editTask)
 
+        self.doneButton = QPushButton("✅  Toggle Done")
+        self.doneButton.clicked.connect(self.toggleDone)
+
         button_layout = QVBoxLayout()
         button_layout.setSpacing(15)
 
-        for btn in [self.viewButton, self.addButton, self.editButton, self.deleteButton]:
+        for btn in [self.viewButton, self.addButton, self.editButton, self.doneButton, self.deleteButton]:
             btn.setFixedWidth(140)
             button_layout.addWidget(btn)
 
@@ -73,176 +440,691 @@ class Display(QMainWindow):
         title.setStyleSheet("font-size: 22px; font-weight: bold; margin: 15px 0;")
         right_layout.addWidget(title)
 
-        self.taskScrollArea = QScrollArea()
-        self.taskScrollArea.setWidgetResizable(True)
+        # Search box; waits for a pause in typing before querying
+        self.searchBox = QLineEdit()
+        self.searchBox.setPlaceholderText("🔍  Search tasks…")
+        self.searchBox.setClearButtonEnabled(True)
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(250)
+        self.searchTimer.timeout.connect(self.searchTasks)
+        self.searchBox.textChanged.connect(self.searchTimer.start)
+
+        # Which tasks to list; filtered in SQL, open tasks by default
+        self.statusBox = QComboBox()
+        self.statusBox.addItem("Open", "pending")
+        self.statusBox.addItem("Done", "done")
+        self.statusBox.addItem("All", None)
+        self.statusBox.currentIndexChanged.connect(self.reloadTasks)
 
-        self.taskContent = QWidget()
-        self.taskLayout = QVBoxLayout(self.taskContent)
-        self.taskLayout.setAlignment(Qt.AlignTop)
-        self.taskScrollArea.setWidget(self.taskContent)
+        # Order and field filter of a single category, applied in SQL; filled in by setupListControls
+        self.sortBox = QComboBox()
+        self.sortBox.currentIndexChanged.connect(self.reloadTasks)
+        self.fieldFilterBox = QComboBox()
+        self.fieldFilterBox.currentIndexChanged.connect(self.reloadTasks)
+        self.listControlsType = None
+        # Filter values are read on a pool thread; values for an earlier category are dropped
+        self.lookupLoaders = {}
+        self.lookupGeneration = 0
+        self.setupListControls([])
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(self.searchBox)
+        filter_layout.addWidget(self.sortBox)
+        filter_layout.addWidget(self.fieldFilterBox)
+        filter_layout.addWidget(self.statusBox)
+        right_layout.addLayout(filter_layout)
+
+        # Only the visible rows are painted, so the cost does not grow with the number of tasks
+        self.taskModel = TaskModel(self)
+        self.taskView = QListView()
+        self.taskView.setObjectName("taskView")
+        # Hover is painted by the delegate, so moving the mouse only repaints the two rows involved
+        self.taskView.viewport().setAttribute(Qt.WA_Hover)
+        self.taskView.setModel(self.taskModel)
+        self.taskView.setItemDelegate(TaskDelegate(self.taskView))
+        self.taskView.setUniformItemSizes(True)
+        # Shift/Ctrl-click and Ctrl+A select several tasks for the bulk actions in the context menu
+        self.taskView.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.taskView.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.taskView.customContextMenuRequested.connect(self.showTaskMenu)
+        QShortcut(QKeySequence.Delete, self.taskView, self.deleteTask)
+        self.taskView.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.taskView.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.taskModel.fetcher = self.loadNextPage
+        self.taskView.verticalScrollBar().valueChanged.connect(self.prefetch)
+        self.taskView.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        right_layout.addWidget(self.taskView)
+
+        # Shown for a few seconds after a delete, offering to take it back
+        self.undoTasks = []
+        self.undoToast = QFrame()
+        self.undoToast.setStyleSheet("QFrame { background-color: #27374D; border-radius: 6px; }"
+                                     "QLabel { color: white; font-size: 14px; }")
+        self.undoLabel = QLabel()
+        undoButton = QPushButton("↩️  Undo")
+        undoButton.clicked.connect(self.undoDelete)
+        toast_layout = QHBoxLayout(self.undoToast)
+        toast_layout.addWidget(self.undoLabel)
+        toast_layout.addStretch()
+        toast_layout.addWidget(undoButton)
+        self.undoToast.hide()
+        self.undoTimer = QTimer(self)
+        self.undoTimer.setSingleShot(True)
+        self.undoTimer.setInterval(8000)
+        self.undoTimer.timeout.connect(self.hideUndo)
+        right_layout.addWidget(self.undoToast)
 
-        right_layout.addWidget(self.taskScrollArea)
         main_layout.addLayout(right_layout)
 
-    # --- Create a card widget for each task ---
-    def create_task_card(self, title, module=None, due_date=None, description="", status="pending", task_id=None, task_type=None):
-        card = QFrame()
-        card.setObjectName("taskCard")
-        card.setProperty("selected", False)
-
-        # Attach metadata
-        card.task_id = task_id
-        card.task_type = task_type
-        card.task_data = {
-            "title": title,
-            "module": module,
-            "due_date": due_date,
-            "description": description
-        }
-
-        layout = QVBoxLayout(card)
-
-        titleLabel = QLabel(f"<b>{title}</b>")
-        titleLabel.setStyleSheet("font-size: 16px;")
-
-        # Dynamic info row based on task_type
-        infoText = ""
-        if task_type == "campus":
-            infoText = f"Module: <b>{module}</b> | Due: {due_date}"
-        elif task_type == "project":
-            infoText = f"Tech Stack: <b>{module}</b> | Level: {due_date}"
-        elif task_type == "learning":
-            infoText = f"Language: <b>{module}</b>"
-        elif task_type == "general":
-            infoText = ""
+        # Diagnostics dock, toggled with F12
+        self.diagnostics = DiagnosticsDock(self)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.diagnostics)
+        self.diagnostics.hide()
+        QShortcut(QKeySequence("F12"), self, self.toggleDiagnostics)
+
+        # Queued edits are retried after syncDelay ms, doubling while the database stays away
+        self.syncLoader = None
+        self.syncAgain = False
+        self.syncDelay = 1000
+        self.syncTimer = QTimer(self)
+        self.syncTimer.setSingleShot(True)
+        self.syncTimer.timeout.connect(self.syncTasks)
+
+        # Changes made by other clients are polled for once connected
+        self.changeLoader = None
+        self.changeTimer = QTimer(self)
+        self.changeTimer.setInterval(int(changes.POLL_INTERVAL * 1000))
+        self.changeTimer.timeout.connect(self.pollChanges)
+
+        # Tasks that have expired in the trash are purged once connected and then periodically
+        self.purgeLoader = None
+        self.purgeTimer = QTimer(self)
+        self.purgeTimer.setInterval(int(trash.PURGE_INTERVAL * 1000))
+        self.purgeTimer.timeout.connect(self.purgeTrash)
+
+        # Nothing touches the database until the window is up
+        self.connectLoader = None
+        self.modulesLoader = None
+        self.modulesWaiting = []
+        self.taskButtons = [self.viewButton, self.addButton, self.editButton, self.doneButton, self.deleteButton]
+        QTimer.singleShot(0, self.connectDatabase)
+
+    # --- Connect in the background; the task buttons wait until it is done ---
+    def connectDatabase(self):
+        for btn in self.taskButtons:
+            btn.setEnabled(False)
+        self.statusBar().showMessage("Connecting to the database…")
+        # Opens the connection on a pool thread so the window can paint first
+        self.connectLoader = CallLoader(0, service.connect)
+        self.connectLoader.signals.failed.connect(self.onConnectFailed)
+        self.connectLoader.signals.finished.connect(self.onConnected)
+        QThreadPool.globalInstance().start(self.connectLoader)
+
+    def onConnected(self, generation, result):
+        loader, self.connectLoader = self.connectLoader, None
+        # Even after a failure every action tries to connect again on its own
+        for btn in self.taskButtons:
+            btn.setEnabled(True)
+        if loader and not loader.error:
+            self.statusBar().showMessage("Connected", 3000)
+            # Read the module list now so the module pickers have it without a query
+            self.loadModules()
+        # Edits left over from an earlier session
+        self.syncTasks()
+        if changes.POLL_INTERVAL > 0:
+            self.changeTimer.start()
+        if trash.PURGE_INTERVAL > 0:
+            self.purgeTimer.start()
+            self.purgeTrash()
+
+    def onConnectFailed(self, generation, error):
+        self.statusBar().showMessage(f"Could not connect to the database: {error}")
+
+    # --- Module pickers use the list as last read, read on a worker thread when it never was ---
+    def withModules(self, then):
+        """ Call then(modules) with the module list, at once when it is known """
+        modules = service.known_modules()
+        if modules:
+            then(modules)
+            return
+        self.modulesWaiting.append(then)
+        self.loadModules()
+
+    def loadModules(self):
+        if self.modulesLoader:
+            return
+        self.modulesLoader = CallLoader(0, service.modules)
+        self.modulesLoader.signals.finished.connect(self.onModulesLoaded)
+        QThreadPool.globalInstance().start(self.modulesLoader)
+
+    def onModulesLoaded(self, generation, result):
+        loader, self.modulesLoader = self.modulesLoader, None
+        waiting, self.modulesWaiting = self.modulesWaiting, []
+        if loader.error:
+            if waiting:
+                self.statusBar().showMessage(f"Could not load the modules: {loader.error}")
+            return
+        for then in waiting:
+            then(loader.result)
+
+    # --- Load categories a page at a time on a worker thread, filling the list as rows arrive ---
+    def loadTasks(self, task_types):
+        self.clearSearch()
+        self.clear_tasks()
+        self.agendaArgs = None
+        self.browseTypes = task_types
+        self.loadTypes = task_types
+        self.setupListControls(task_types)
+        self.loadOrder = self.listOrder()
+        if self.loadOrder:
+            # Rows are found by a scan, since an edit can move a row in the sort order
+            self.taskModel.ordered = False
+            self.loadPosition = (0, None)
+            self.taskModel.sortKey = service.sort_key(self.loadOrder[0])
+        else:
+            self.taskModel.ordered = True
+            self.loadPosition = (0, 0)
+            self.taskModel.sortKey = lambda task: (task_types.index(task.task_type), task.task_id)
+        self.taskModel.hasMore = True
+        self.taskModel.fetchMore()
+
+    def loadNextPage(self):
+        if self.inTrash:
+            self.startLoader(TrashLoader(self.loadGeneration, self.loadPosition, self.pageSize))
+            return
+        self.startLoader(TaskLoader(self.loadGeneration, self.loadTypes, self.loadPosition, self.pageSize,
+                                    self.statusFilter(), self.loadOrder))
+
+    def startLoader(self, loader):
+        self.loader = loader
+        self.loader.signals.batch.connect(self.onTasksLoaded)
+        self.loader.signals.finished.connect(self.onLoadFinished)
+        self.loader.signals.failed.connect(self.onLoadFailed)
+        self.runningLoaders[self.loadGeneration] = self.loader
+        self.statusBar().showMessage("Loading tasks…")
+        QThreadPool.globalInstance().start(self.loader)
+
+    # --- Replace the list with the best matches, or go back to the category once the box is cleared ---
+    def searchTasks(self):
+        text = self.searchBox.text().strip()
+        if not text:
+            if self.browseTypes:
+                self.loadTasks(self.browseTypes)
+            else:
+                self.clear_tasks()
+            return
+
+        self.clear_tasks()
+        self.loadTypes = []
+        self.taskModel.ordered = False
+        self.taskModel.fetching = True
+        self.startLoader(CallLoader(self.loadGeneration, service.search_tasks, text, 100, self.statusFilter()))
+
+    def clearSearch(self):
+        """ Empty the search box without starting a search, when another list replaces the results """
+        if self.searchBox.text():
+            self.searchTimer.stop()
+            self.searchBox.blockSignals(True)
+            self.searchBox.clear()
+            self.searchBox.blockSignals(False)
+
+    # --- Campus tasks by due date or module, earliest first ---
+    def loadAgenda(self, start=None, end=None, module=None):
+        self.clearSearch()
+        self.clear_tasks()
+        self.agendaArgs = (start, end, module)
+        self.browseTypes = []
+        self.loadTypes = []
+        self.setupListControls([])
+        self.taskModel.ordered = False
+        self.taskModel.fetching = True
+        self.startLoader(CallLoader(self.loadGeneration, service.agenda, start=start, end=end, module=module,
+                                    status=self.statusFilter()))
+
+    # --- Deleted tasks, most recently deleted first, a page at a time like the categories ---
+    def loadTrash(self):
+        self.clearSearch()
+        self.clear_tasks()
+        self.inTrash = True
+        self.agendaArgs = None
+        self.browseTypes = []
+        self.loadTypes = []
+        self.setupListControls([])
+        self.taskModel.ordered = False
+        self.loadPosition = None
+        self.taskModel.hasMore = True
+        self.taskModel.fetchMore()
+
+    def restoreTasks(self):
+        tasks = self.selected_tasks()
+        if not tasks:
+            return
+        restored = service.queue_restore(tasks)
+        self.taskModel.removeTasks(tasks)
+        self.statusBar().showMessage(f"Restored {len(restored)} tasks", 3000)
+        self.syncTasks()
+
+    # --- Status filter, and the order and field filter of a single category ---
+    def statusFilter(self):
+        return self.statusBox.currentData()
+
+    def matchesFilter(self, task):
+        # Live tasks never belong in the trash, so restored ones leave it
+        if self.inTrash:
+            return False
+        if self.statusFilter() is not None and task.status != self.statusFilter():
+            return False
+        filters = self.loadOrder[1] if self.loadOrder else {}
+        return all(task.columns().get(column) == value for column, value in filters.items())
+
+    def setupListControls(self, task_types):
+        """ Offer the orders and filter values of a single category; other lists keep id order """
+        task_type = task_types[0] if len(task_types) == 1 else None
+        if task_type == self.listControlsType and task_type is not None:
+            return
+        self.listControlsType = task_type
+        for box in (self.sortBox, self.fieldFilterBox):
+            box.blockSignals(True)
+            box.clear()
+        self.sortBox.addItem("Sort: Added", None)
+        for sort in service.SORTS.get(task_type, []):
+            self.sortBox.addItem(f"Sort: {SORT_LABELS[sort]}", sort)
+        column = service.FILTERS[task_type][0] if task_type and service.FILTERS[task_type] else None
+        self.lookupGeneration += 1
+        if column:
+            self.fieldFilterBox.addItem(FILTER_LABELS[column], None)
+            # Held until it finishes, so a superseded one is not collected while it runs
+            loader = self.lookupLoaders[self.lookupGeneration] = CallLoader(self.lookupGeneration, FILTER_VALUES[column])
+            loader.signals.batch.connect(self.onFilterValues)
+            loader.signals.failed.connect(
+                lambda generation, error, column=column: self.onFilterValuesFailed(generation, column, error))
+            loader.signals.finished.connect(lambda generation, result: self.lookupLoaders.pop(generation, None))
+            QThreadPool.globalInstance().start(loader)
+        self.sortBox.setEnabled(task_type is not None)
+        self.fieldFilterBox.setVisible(column is not None)
+        for box in (self.sortBox, self.fieldFilterBox):
+            box.blockSignals(False)
+
+    def onFilterValues(self, generation, values):
+        if generation != self.lookupGeneration:
+            return
+        # Added after "All", which stays selected, so the list is not reloaded
+        self.fieldFilterBox.blockSignals(True)
+        for value in values:
+            self.fieldFilterBox.addItem(value, value)
+        self.fieldFilterBox.blockSignals(False)
+
+    def onFilterValuesFailed(self, generation, column, error):
+        if generation == self.lookupGeneration:
+            self.statusBar().showMessage(f"Could not load the {column} filter: {error}")
+
+    def listOrder(self):
+        """ (sort, filters) for sorted_page, or None to page the cached id order """
+        sort = self.sortBox.currentData()
+        value = self.fieldFilterBox.currentData()
+        filters = {service.FILTERS[self.listControlsType][0]: value} if value is not None else {}
+        return (sort, filters) if sort or filters else None
+
+    def reloadTasks(self):
+        if self.searchBox.text().strip():
+            self.searchTasks()
+        elif self.agendaArgs:
+            self.loadAgenda(*self.agendaArgs)
+        elif self.inTrash:
+            self.loadTrash()
+        elif self.browseTypes:
+            self.loadTasks(self.browseTypes)
+
+    # --- Ask for the next page while the user is still a couple of screens from the bottom ---
+    def prefetch(self):
+        scrollBar = self.taskView.verticalScrollBar()
+        if scrollBar.maximum() - scrollBar.value() <= 2 * self.taskView.viewport().height():
+            self.taskModel.fetchMore()
+
+    def cancelLoad(self):
+        self.selectAllPending = False
+        if self.loader:
+            self.loader.cancel()
+            self.loader = None
+        self.loadGeneration += 1
+
+    def onTasksLoaded(self, generation, cards):
+        # Batches from a cancelled load can still be queued, so drop them here
+        if generation != self.loadGeneration:
+            return
+        self.taskModel.appendTasks(cards)
+        self.statusBar().showMessage(f"Loading tasks… {self.taskModel.rowCount()}")
+
+    def onLoadFinished(self, generation, position):
+        loader = self.runningLoaders.pop(generation, None)
+        if generation != self.loadGeneration or loader is not self.loader:
+            return
+        self.loader = None
+        self.taskModel.fetching = False
+        if loader.error:
+            # Stop paging; reopening the category starts again
+            self.taskModel.hasMore = False
+            return
+        self.loadPosition = position
+        if self.inTrash:
+            # The trash goes on after the (task_type, task_id, deletedAt) of its last row
+            self.taskModel.hasMore = position is not None
+        else:
+            self.taskModel.hasMore = position is not None and position[0] < len(self.loadTypes)
+        self.statusBar().showMessage(f"{self.taskModel.rowCount()} tasks", 3000)
+        if self.selectAllPending:
+            self.selectAllTasks()
+        self.prefetch()
+
+    def onLoadFailed(self, generation, error):
+        if generation != self.loadGeneration:
+            return
+        self.statusBar().showMessage(f"Could not load tasks: {error}")
+
+    # --- Keep the visible list in step with a single added or edited task ---
+    def taskSaved(self, task):
+        self.showTask(task)
+        if task.syncing:
+            self.syncTasks()
+
+    def showTask(self, task):
+        if not self.matchesFilter(task):
+            self.taskModel.removeTask(task)
+        elif self.taskModel.findTask(task) >= 0:
+            self.taskModel.replaceTask(task)
+        elif task.task_type in self.loadTypes:
+            self.taskModel.insertTask(task)
+
+    # --- Push queued edits to the database in the background, backing off while it is unreachable ---
+    def syncTasks(self):
+        if self.syncLoader:
+            self.syncAgain = True
+            return
+        self.syncAgain = False
+        self.syncTimer.stop()
+        self.syncLoader = SyncLoader()
+        self.syncLoader.signals.batch.connect(self.onSynced)
+        self.syncLoader.signals.failed.connect(self.onSyncFailed)
+        self.syncLoader.signals.finished.connect(self.onSyncFinished)
+        QThreadPool.globalInstance().start(self.syncLoader)
+
+    def onSynced(self, generation, results):
+        self.taskModel.removeKeys([(task_type, shown_id)
+                                   for task_type, shown_id, task in results if task is None or task.task_id != shown_id])
+        replaced = [task for task_type, shown_id, task in results if task is not None and task.task_id == shown_id]
+        self.taskModel.replaceTasks(replaced)
+        self.taskModel.removeTasks([task for task in replaced if not self.matchesFilter(task)])
+        for task_type, shown_id, task in results:
+            if task is not None and task.task_id != shown_id:
+                self.showTask(task)
+
+    def onSyncFailed(self, generation, error):
+        self.statusBar().showMessage(f"Offline, {service.queued_edits()} changes waiting to be saved: {error}")
+
+    def onSyncFinished(self, generation, result):
+        loader, self.syncLoader = self.syncLoader, None
+        if loader and loader.error:
+            self.syncTimer.start(self.syncDelay)
+            self.syncDelay = min(self.syncDelay * 2, 60000)
+            return
+        self.syncDelay = 1000
+        parked = service.rejected_edits()
+        if parked:
+            self.statusBar().showMessage(f"{parked} changes were rejected by the database", 5000)
+        if self.syncAgain:
+            self.syncTasks()
+
+    # --- Apply what other clients changed to the visible rows ---
+    def pollChanges(self):
+        if self.changeLoader:
+            return
+        self.changeLoader = ChangeLoader()
+        self.changeLoader.signals.batch.connect(self.onChanges)
+        self.changeLoader.signals.finished.connect(self.onChangesFinished)
+        QThreadPool.globalInstance().start(self.changeLoader)
 
-        infoLabel = QLabel(infoText)
-        descLabel = QLabel(f"Description: {description}")
+    def onChanges(self, generation, results):
+        self.taskModel.removeKeys([(task_type, task_id) for task_type, task_id, task in results if task is None])
+        for task_type, task_id, task in results:
+            if task is None:
+                continue
+            row = self.taskModel.findTask(task)
+            # A row with an edit still queued here is refreshed once that edit has synced
+            if row >= 0 and self.taskModel.tasks[row].syncing:
+                continue
+            self.showTask(task)
 
-        statusIcon = QLabel("🕒" if status == "pending" else "✅" if status == "done" else "⚠️")
-        statusIcon.setAlignment(Qt.AlignRight)
+    def onChangesFinished(self, generation, reload):
+        self.changeLoader = None
+        if reload:
+            service.invalidate()
+            self.reloadTasks()
 
-        topRow = QHBoxLayout()
-        topRow.addWidget(titleLabel)
-        topRow.addWidget(statusIcon)
+    # --- Remove what has expired in the trash, in small batches on a worker thread ---
+    def purgeTrash(self):
+        if self.purgeLoader:
+            return
+        self.purgeLoader = CallLoader(0, service.purge_trash)
+        self.purgeLoader.signals.finished.connect(self.onPurged)
+        QThreadPool.globalInstance().start(self.purgeLoader)
+
+    def onPurged(self, generation, result):
+        loader, self.purgeLoader = self.purgeLoader, None
+        if loader and loader.result and self.inTrash:
+            self.loadTrash()
 
-        layout.addLayout(topRow)
-        if infoText:
-            layout.addWidget(infoLabel)
-        layout.addWidget(descLabel)
+    # --- Undo the last delete while its toast is up ---
+    def showUndo(self, tasks):
+        self.undoTasks = tasks
+        self.undoLabel.setText(f"Deleted “{tasks[0].name}”" if len(tasks) == 1 else f"Deleted {len(tasks)} tasks")
+        self.undoToast.show()
+        self.undoTimer.start()
 
-        # Selection behavior
-        card.mousePressEvent = lambda event: self.select_card(card)
+    def hideUndo(self):
+        self.undoTimer.stop()
+        self.undoToast.hide()
+        self.undoTasks = []
+
+    def undoDelete(self):
+        tasks = self.undoTasks
+        self.hideUndo()
+        if not tasks:
+            return
+        for task in service.queue_restore(tasks):
+            self.showTask(task)
+        self.statusBar().showMessage(f"Restored {len(tasks)} tasks" if len(tasks) > 1 else "Task restored", 3000)
+        self.syncTasks()
 
-        return card
+    def toggleDiagnostics(self):
+        self.diagnostics.setVisible(not self.diagnostics.isVisible())
 
+    def closeEvent(self, event):
+        self.changeTimer.stop()
+        self.purgeTimer.stop()
+        self.cancelLoad()
+        super().closeEvent(event)
 
-    def select_card(self, card):
-        print("Card selected:", card.task_id)
+    def selected_task(self):
+        index = self.taskView.currentIndex()
+        if not index.isValid() or not self.taskView.selectionModel().isSelected(index):
+            return None
+        return index.data(TaskRole)
 
-        if self.selected_card and self.selected_card != card:
-            self.selected_card.setProperty("selected", False)
-            self.selected_card.style().unpolish(self.selected_card)
-            self.selected_card.style().polish(self.selected_card)
+    def selected_tasks(self):
+        indexes = sorted(self.taskView.selectionModel().selectedIndexes(), key=lambda index: index.row())
+        return [index.data(TaskRole) for index in indexes]
 
-        card.setProperty("selected", True)
-        card.style().unpolish(card)
-        card.style().polish(card)
-        self.selected_card = card
+    # --- Bulk actions on the selected tasks; each is queued as one edit per category ---
+    def showTaskMenu(self, pos):
+        tasks = self.selected_tasks()
+        types = {task.task_type for task in tasks}
+        menu = QMenu(self)
+        menu.addAction("Select All", self.selectAllTasks)
+        menu.addSeparator()
+        if self.inTrash:
+            menu.addAction(f"↩️  Restore {len(tasks)} Tasks" if len(tasks) > 1 else "↩️  Restore Task",
+                           self.restoreTasks).setEnabled(bool(tasks))
+            menu.exec(self.taskView.viewport().mapToGlobal(pos))
+            return
+        menu.addAction("✅  Toggle Done", self.toggleDone).setEnabled(bool(tasks))
+        menu.addAction("Change Level…", self.changeLevel).setEnabled(types == {"project"})
+        menu.addAction("Reassign Module…", self.reassignModule).setEnabled(types == {"campus"})
+        menu.addSeparator()
+        menu.addAction(f"🗑️  Delete {len(tasks)} Tasks" if len(tasks) > 1 else "🗑️  Delete Task",
+                       self.deleteTask).setEnabled(bool(tasks))
+        menu.exec(self.taskView.viewport().mapToGlobal(pos))
+
+    def selectAllTasks(self):
+        # Pages still to come are loaded first, so the whole category ends up selected
+        self.selectAllPending = self.taskModel.hasMore
+        if self.selectAllPending:
+            self.taskModel.fetchMore()
+        else:
+            self.taskView.selectAll()
+
+    def bulkUpdate(self, column, value):
+        tasks = self.selected_tasks()
+        if not tasks:
+            return
+        if self.inTrash:
+            QMessageBox.warning(self, "Warning", "Restore the tasks before changing them.")
+            return
+        try:
+            updated = service.queue_update_many(tasks, column, value)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self.taskModel.replaceTasks(updated)
+        # Tasks that no longer match the status filter leave the list
+        self.taskModel.removeTasks([task for task in updated if not self.matchesFilter(task)])
+        self.statusBar().showMessage(f"Updated {len(updated)} tasks", 3000)
+        self.syncTasks()
+
+    def toggleDone(self):
+        tasks = self.selected_tasks()
+        if not tasks:
+            QMessageBox.warning(self, "Warning", "Please select a task to mark done.")
+            return
+        # Done unless every selected task already is, then back to pending
+        self.bulkUpdate("status", "pending" if all(task.status == "done" for task in tasks) else "done")
+
+    def changeLevel(self):
+        level, ok = QInputDialog.getItem(self, "Change Level", "Level:", service.PROJECT_LEVELS, 0, False)
+        if ok:
+            self.bulkUpdate("level", level)
+
+    def reassignModule(self):
+        self.withModules(self.chooseModule)
+
+    def chooseModule(self, modules):
+        module, ok = QInputDialog.getItem(self, "Reassign Module", "Module:", modules, 0, False)
+        if ok and module:
+            self.bulkUpdate("module", module)
 
     
     # --- Clear previous cards ---
     def clear_tasks(self):
-        for i in reversed(range(self.taskLayout.count())):
-            widget = self.taskLayout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
+        self.cancelLoad()
+        self.taskModel.clear()
+        self.inTrash = False
 
     # --- Add methods ---
     def addTask(self):
         taskDialog = addCategory()
         taskDialog.exec()
+        if taskDialog.record:
+            self.taskSaved(taskDialog.record)
 
     def showCategory(self):
         categoryDialog = showCategory(self)
         categoryDialog.exec()
         
     def deleteTask(self):
-        if not self.selected_card:
+        tasks = self.selected_tasks()
+        if not tasks:
             QMessageBox.warning(self, "Warning", "Please select a task to delete.")
             return
+        if self.inTrash:
+            QMessageBox.warning(self, "Warning", f"These tasks are already in the trash and are removed {trash.TRASH_DAYS:g} days after they were deleted.")
+            return
+        if len(tasks) > 1:
+            answer = QMessageBox.question(self, "Delete Tasks", f"Delete {len(tasks)} tasks?")
+            if answer != QMessageBox.Yes:
+                return
 
-        task_id = self.selected_card.task_id
-        task_type = self.selected_card.task_type
-
-        if task_type == "campus":
-            logic.cursor.execute("DELETE FROM campus WHERE assignmentID = %s", (task_id,))
-        elif task_type == "project":
-            logic.cursor.execute("DELETE FROM projects WHERE projectID = %s", (task_id,))
-        elif task_type == "learning":
-            logic.cursor.execute("DELETE FROM learn WHERE techID = %s", (task_id,))
-        elif task_type == "general":
-            logic.cursor.execute("DELETE FROM generalTask WHERE taskID = %s", (task_id,))
-        else:
+        try:
+            service.queue_delete(tasks)
+        except (LookupError, ValueError):
             QMessageBox.warning(self, "Error", "Unknown task type.")
             return
 
-        logic.db.commit()
-        self.clear_tasks()
-        self.selected_card = None
-        QMessageBox.information(self, "Deleted", "Task deleted successfully.")
+        self.taskModel.removeTasks(tasks)
+        self.syncTasks()
+        self.showUndo(tasks)
 
         
     def editTask(self):
-        if not self.selected_card:
+        data = self.selected_task()
+        if not data:
             QMessageBox.warning(self, "Warning", "Please select a task to edit.")
             return
+        if self.inTrash:
+            QMessageBox.warning(self, "Warning", "Restore the task before editing it.")
+            return
 
-        task_type = self.selected_card.task_type
-        task_id = self.selected_card.task_id
-        data = self.selected_card.task_data
-
-        print(f"Editing {task_type} task with ID: {task_id}")
+        task_type = data.task_type
+        task_id = data.task_id
 
         if task_type == "campus":
             dialog = AddCampusTaskDialog()
             dialog.taskID = task_id
             dialog.save.setEnabled(False)
-            dialog.taskName.setText(data["title"])
-            dialog.moduleName.setCurrentText(data["module"])
-            dialog.dueDate.setDate(QDate.fromString(data["due_date"], "yyyy-MM.dd"))
-            dialog.taskDescription.setText(data["description"])
+            dialog.taskName.setText(data.name)
+            # The module list may be out of date, or not read yet while offline
+            if data.module and dialog.moduleName.findText(data.module) < 0:
+                dialog.moduleName.addItem(data.module)
+            dialog.moduleName.setCurrentText(data.module)
+            dialog.dueDate.setDate(QDate.fromString(data.due_date or "", Qt.ISODate))
+            dialog.taskDescription.setText(data.description)
             dialog.exec()
 
         elif task_type == "project":
             dialog = AddProjectTaskDialog()
             dialog.taskID = task_id
             dialog.save.setEnabled(False)
-            dialog.taskName.setText(data["title"])
-            dialog.techStack.setText(data["module"])
-            dialog.descr.setText(data["description"])
-            dialog.level.setCurrentText(data["due_date"])  # Placeholder (can't derive from card)
+            dialog.taskName.setText(data.name)
+            dialog.techStack.setText(data.tech_stack)
+            dialog.descr.setText(data.description)
+            dialog.level.setCurrentText(data.level)
             dialog.exec()
 
         elif task_type == "learning":
             dialog = addLearningTaskDialog()
             dialog.taskID = task_id
             dialog.save.setEnabled(False)
-            dialog.taskName.setText(data["title"])
-            dialog.lang.setText(data["module"])
-            dialog.descr.setText(data["description"])
+            dialog.taskName.setText(data.name)
+            dialog.lang.setText(data.lang)
+            dialog.descr.setText(data.description)
             dialog.exec()
 
         elif task_type == "general":
             dialog = AddGeneralTaskDialog()
             dialog.taskID = task_id
             dialog.save.setEnabled(False)
-            dialog.taskName.setText(data["title"])
-            dialog.descr.setText(data["description"])
+            dialog.taskName.setText(data.name)
+            dialog.descr.setText(data.description)
             dialog.exec()
 
-        self.selected_card = None
-        self.clear_tasks()
+        else:
+            return
+
+        if dialog.record:
+            self.taskSaved(dialog.record)
+        elif dialog.updated:
+            # The task no longer exists
+            self.taskModel.removeTask(data)
 
 
  
@@ -272,6 +1154,22 @@ class showCategory(QDialog):
         self.general = QPushButton("General", self)
         self.general.clicked.connect(self.showGeneralTask)
 
+        # Agenda of campus tasks
+        self.overdue = QPushButton("Overdue", self)
+        self.overdue.clicked.connect(lambda: self.showAgenda("overdue"))
+
+        self.today = QPushButton("Due Today", self)
+        self.today.clicked.connect(lambda: self.showAgenda("today"))
+
+        self.week = QPushButton("Next 7 Days", self)
+        self.week.clicked.connect(lambda: self.showAgenda("week"))
+
+        self.byModule = QPushButton("By Module…", self)
+        self.byModule.clicked.connect(self.showModuleTasks)
+
+        self.trash = QPushButton("🗑️  Trash", self)
+        self.trash.clicked.connect(self.showTrash)
+
         
         layout = QVBoxLayout()
         layout.addWidget(self.all)
@@ -279,50 +1177,50 @@ class showCategory(QDialog):
         layout.addWidget(self.project)
         layout.addWidget(self.learning)
         layout.addWidget(self.general)
+        layout.addWidget(QLabel("Due dates"))
+        layout.addWidget(self.overdue)
+        layout.addWidget(self.today)
+        layout.addWidget(self.week)
+        layout.addWidget(self.byModule)
+        layout.addWidget(self.trash)
         self.setLayout(layout)
         
     def showCampusTask(self):
-        self.parent.clear_tasks()
-        for task in logic.campus_tasks():
-            card = self.parent.create_task_card(task[1], task[2], task[3], task[4], task_id=task[0], task_type="campus")
-            self.parent.taskLayout.addWidget(card)
+        self.parent.loadTasks(["campus"])
         self.close()
 
     def showProjectTask(self):
-        self.parent.clear_tasks()
-        for task in logic.project_tasks():
-            card = self.parent.create_task_card(task[1], task[2], task[4], description=task[3], task_id=task[0], task_type="project")
-            self.parent.taskLayout.addWidget(card)
+        self.parent.loadTasks(["project"])
         self.close()
 
     def showLearningTask(self):
-        self.parent.clear_tasks()
-        for task in logic.learning_tasks():
-            card = self.parent.create_task_card(task[1], task[2], description=task[3], task_id=task[0], task_type="learning")
-            self.parent.taskLayout.addWidget(card)
+        self.parent.loadTasks(["learning"])
         self.close()
 
     def showGeneralTask(self):
-        self.parent.clear_tasks()
-        for task in logic.general_tasks():
-            card = self.parent.create_task_card(task[1], description=task[2], task_id=task[0], task_type="general")
-            self.parent.taskLayout.addWidget(card)
+        self.parent.loadTasks(["general"])
         self.close()
 
     def showAllTasks(self):
-        self.parent.clear_tasks()
-        for task in logic.campus_tasks():
-            card = self.parent.create_task_card(task[1], task[2], task[3], task[4], task_id=task[0], task_type="campus")
-            self.parent.taskLayout.addWidget(card)
-        for task in logic.project_tasks():
-            card = self.parent.create_task_card(task[1], task[2], task[4], description=task[3], task_id=task[0], task_type="project")
-            self.parent.taskLayout.addWidget(card)
-        for task in logic.learning_tasks():
-            card = self.parent.create_task_card(task[1], task[2], description=task[3], task_id=task[0], task_type="learning")
-            self.parent.taskLayout.addWidget(card)
-        for task in logic.general_tasks():
-            card = self.parent.create_task_card(task[1], description=task[2], task_id=task[0], task_type="general")
-            self.parent.taskLayout.addWidget(card)
+        self.parent.loadTasks(["campus", "project", "learning", "general"])
+        self.close()
+
+    def showAgenda(self, view):
+        start, end = service.agenda_range(view)
+        self.parent.loadAgenda(start, end)
+        self.close()
+
+    def showModuleTasks(self):
+        self.parent.withModules(self.chooseModule)
+
+    def chooseModule(self, modules):
+        module, ok = QInputDialog.getItem(self, "By Module", "Module:", modules, 0, False)
+        if ok and module:
+            self.parent.loadAgenda(module=module)
+            self.close()
+
+    def showTrash(self):
+        self.parent.loadTrash()
         self.close()
         
             
@@ -333,6 +1231,7 @@ class showCategory(QDialog):
 class addCategory(QDialog):
     def __init__(self):
         self.taskID = None
+        self.record = None
 
         super().__init__()
         self.setWindowTitle("Add Tasks")
@@ -362,30 +1261,36 @@ class addCategory(QDialog):
         taskDialog = AddCampusTaskDialog()
         taskDialog.update.setEnabled(False)
         taskDialog.exec()
+        self.record = taskDialog.record
         self.close()
         
     def addProjectTask(self):
         taskDialog = AddProjectTaskDialog()
         taskDialog.update.setEnabled(False)
         taskDialog.exec()
+        self.record = taskDialog.record
         self.close()
         
     def addLearningTask(self):
         taskDialog = addLearningTaskDialog()
         taskDialog.update.setEnabled(False)
         taskDialog.exec()
+        self.record = taskDialog.record
         self.close()
         
     def addGeneralTask(self):
         taskDialog = AddGeneralTaskDialog()
         taskDialog.update.setEnabled(False)
         taskDialog.exec()
+        self.record = taskDialog.record
         self.close()
     
     
 class AddCampusTaskDialog(QDialog):
     def __init__(self):
         self.taskID = None
+        self.record = None
+        self.updated = False
 
         super().__init__()
         self.setWindowTitle("Add Campus Task")
@@ -399,9 +1304,8 @@ class AddCampusTaskDialog(QDialog):
         self.dueDate.setDate(QDate.currentDate())
         self.taskDescription = QLineEdit(self)
         
-        logic.cursor.execute("SELECT module FROM modules")
-        for module in logic.cursor.fetchall():
-            self.moduleName.addItem(module[0])
+        # Modules as last read, so the dialog opens without a query
+        self.moduleName.addItems(service.known_modules())
         
         self.save = QPushButton("Save", self)
         self.save.clicked.connect(self.saveTask)
@@ -432,23 +1336,30 @@ class AddCampusTaskDialog(QDialog):
         
     def saveTask(self):
         name = self.taskName.text()
-        module = self.moduleName.currentText()
-        dueDate = self.dueDate.date().toString("yyyy-MM.dd")
+        module = self.moduleName.currentText() or None
+        dueDate = self.dueDate.date().toString(Qt.ISODate)
         task = self.taskDescription.text()
         
-        logic.add_campus_task(name, module, dueDate, task)
+        try:
+            self.record = service.queue_add("campus", {"name": name, "module": module, "dueDate": dueDate, "descr": task})
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
         
         self.close()
         
     def updateTask(self):
         name = self.taskName.text()
-        module = self.moduleName.currentText()
-        dueDate = self.dueDate.date().toString("yyyy-MM.dd")
+        module = self.moduleName.currentText() or None
+        dueDate = self.dueDate.date().toString(Qt.ISODate)
         task = self.taskDescription.text()
         
-        logic.cursor.execute("UPDATE campus SET name = %s, module = %s, dueDate = %s, descr = %s WHERE assignmentID = %s",
-                              (name, module, dueDate, task, self.taskID))
-        logic.db.commit()
+        try:
+            self.record = service.queue_update("campus", self.taskID, {"name": name, "module": module, "dueDate": dueDate, "descr": task})
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self.updated = True
         
         self.close()
         
@@ -456,6 +1367,8 @@ class AddCampusTaskDialog(QDialog):
 class AddProjectTaskDialog(QDialog):
     def __init__(self):
         self.taskID = None
+        self.record = None
+        self.updated = False
 
         super().__init__()
         self.setWindowTitle("Add Project Task")
@@ -465,7 +1378,7 @@ class AddProjectTaskDialog(QDialog):
         self.techStack = QLineEdit(self)
         self.descr = QLineEdit(self)
         self.level = QComboBox(self)
-        self.level.addItems(["Easy", "Intermediate", "Difficult"])
+        self.level.addItems(service.PROJECT_LEVELS)
         
         self.save = QPushButton("Save", self)
         self.save.clicked.connect(self.saveTask)
@@ -499,7 +1412,11 @@ class AddProjectTaskDialog(QDialog):
         descr = self.descr.text()
         level = self.level.currentText()
         
-        logic.add_project_task(name, techStack, descr, level)
+        try:
+            self.record = service.queue_add("project", {"name": name, "techStack": techStack, "descr": descr, "level": level})
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
         
         self.close()
         
@@ -509,9 +1426,12 @@ class AddProjectTaskDialog(QDialog):
         descr = self.descr.text()
         level = self.level.currentText()
         
-        logic.cursor.execute("UPDATE projects SET name = %s, techStack = %s, descr = %s, level = %s WHERE projectID = %s",
-                              (name, techStack, descr, level, self.taskID))
-        logic.db.commit()
+        try:
+            self.record = service.queue_update("project", self.taskID, {"name": name, "techStack": techStack, "descr": descr, "level": level})
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self.updated = True
         
         self.close()
         
@@ -519,6 +1439,8 @@ class AddProjectTaskDialog(QDialog):
 class addLearningTaskDialog(QDialog):
     def __init__(self):
         self.taskID = None
+        self.record = None
+        self.updated = False
 
         super().__init__()
         self.setWindowTitle("Add Learning Task")
@@ -558,7 +1480,11 @@ class addLearningTaskDialog(QDialog):
         lang = self.lang.text()
         descr = self.descr.text()
         
-        logic.add_learning_task(name, lang, descr)
+        try:
+            self.record = service.queue_add("learning", {"name": name, "lang": lang, "descr": descr})
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
         
         self.close()
         
@@ -567,15 +1493,20 @@ class addLearningTaskDialog(QDialog):
         lang = self.lang.text()
         descr = self.descr.text()
         
-        logic.cursor.execute("UPDATE learn SET name = %s, lang = %s, descr = %s WHERE techID = %s",
-                              (name, lang, descr, self.taskID))
-        logic.db.commit()
+        try:
+            self.record = service.queue_update("learning", self.taskID, {"name": name, "lang": lang, "descr": descr})
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self.updated = True
         self.close()
         
         
 class AddGeneralTaskDialog(QDialog):
     def __init__(self):
         self.taskID = None
+        self.record = None
+        self.updated = False
 
         super().__init__()
         self.setWindowTitle("Add General Task")
@@ -611,7 +1542,11 @@ class AddGeneralTaskDialog(QDialog):
         name = self.taskName.text()
         descr = self.descr.text()
         
-        logic.add_general_task(name, descr)
+        try:
+            self.record = service.queue_add("general", {"name": name, "descr": descr})
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
         
         self.close()
         
@@ -619,8 +1554,11 @@ class AddGeneralTaskDialog(QDialog):
         name = self.taskName.text()
         descr = self.descr.text()
         
-        logic.cursor.execute("UPDATE generalTask SET name = %s, descr = %s WHERE taskID = %s",
-                              (name, descr, self.taskID))
-        logic.db.commit()
+        try:
+            self.record = service.queue_update("general", self.taskID, {"name": name, "descr": descr})
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self.updated = True
         self.close()
         
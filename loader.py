@@ -0,0 +1,161 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+import service
+
+
+class LoaderSignals(QObject):
+    batch = Signal(int, object)
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+
+
+class TaskLoader(QRunnable):
+    """ Reads the next page of one or more categories on a pool thread and streams it back """
+    def __init__(self, generation, task_types, position, page_size=100, status=None, order=None):
+        super().__init__()
+        self.generation = generation
+        self.task_types = task_types
+        self.status = status
+        # (sort, filters) of a single category listed with service.sorted_page, None for id order
+        self.order = order
+        # (index into task_types, last primary key read from that category); with an order the
+        # service.sort_position of the last record read instead, since the next page continues
+        # after its sort value
+        self.position = position
+        self.page_size = page_size
+        self.cancelled = False
+        self.error = None
+        # Created on the GUI thread so the signals are delivered there
+        self.signals = LoaderSignals()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        index, after = self.position
+        try:
+            if not self.cancelled:
+                if self.order:
+                    sort, filters = self.order
+                    tasks = service.sorted_page(self.task_types[0], sort, filters, after, self.page_size, self.status)
+                else:
+                    tasks = service.page(self.task_types, self.position, self.page_size, self.status)
+                if tasks:
+                    last = tasks[-1]
+                    index = self.task_types.index(last.task_type)
+                    after = service.sort_position(last, self.order[0]) if self.order else last.task_id
+                    self.signals.batch.emit(self.generation, tasks)
+                if len(tasks) < self.page_size:
+                    index, after = len(self.task_types), 0
+        except Exception as e:
+            self.error = str(e)
+            self.signals.failed.emit(self.generation, self.error)
+        finally:
+            # Always sent, cancelled or not, so the owner can release the loader
+            self.signals.finished.emit(self.generation, (index, after))
+
+
+class TrashLoader(QRunnable):
+    """ Reads the next page of the trash on a pool thread, most recently deleted first """
+    def __init__(self, generation, after=None, page_size=100):
+        super().__init__()
+        self.generation = generation
+        # Where service.trash_page said the previous page ends, None for the first page
+        self.after = after
+        self.page_size = page_size
+        self.cancelled = False
+        self.error = None
+        self.signals = LoaderSignals()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        after = None
+        try:
+            if not self.cancelled:
+                tasks, after = service.trash_page(self.after, self.page_size)
+                if tasks:
+                    self.signals.batch.emit(self.generation, tasks)
+        except Exception as e:
+            self.error = str(e)
+            self.signals.failed.emit(self.generation, self.error)
+        finally:
+            # Where the next page continues, None once the trash has been read to the end
+            self.signals.finished.emit(self.generation, after)
+
+
+class CallLoader(QRunnable):
+    """ Runs one service call on a pool thread, such as a search, the agenda or a purge.
+
+    What it returns is kept in result and sent back as a single batch, then finished follows as
+    after a last page.
+    """
+    def __init__(self, generation, call, *args, **kwargs):
+        super().__init__()
+        self.generation = generation
+        self.call = call
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.error = None
+        self.result = None
+        self.signals = LoaderSignals()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            self.result = self.call(*self.args, **self.kwargs)
+            if not self.cancelled:
+                self.signals.batch.emit(self.generation, self.result)
+        except Exception as e:
+            self.error = str(e)
+            self.signals.failed.emit(self.generation, self.error)
+        finally:
+            self.signals.finished.emit(self.generation, None)
+
+
+class SyncLoader(QRunnable):
+    """ Drains the outbox on a pool thread, sending back each batch of synced records """
+    def __init__(self, generation=0, batch_size=100):
+        super().__init__()
+        self.generation = generation
+        self.batch_size = batch_size
+        self.error = None
+        self.signals = LoaderSignals()
+
+    def run(self):
+        try:
+            while service.queued_edits():
+                results = service.sync(self.batch_size)
+                if results:
+                    self.signals.batch.emit(self.generation, results)
+        except Exception as e:
+            self.error = str(e)
+            self.signals.failed.emit(self.generation, self.error)
+        finally:
+            self.signals.finished.emit(self.generation, None)
+
+
+class ChangeLoader(QRunnable):
+    """ Polls the change log on a pool thread, sending back the rows other clients changed """
+    def __init__(self, generation=0):
+        super().__init__()
+        self.generation = generation
+        self.error = None
+        self.signals = LoaderSignals()
+
+    def run(self):
+        reload = False
+        try:
+            results = service.poll_changes()
+            # Too far behind to replay the changes; the owner reloads the list
+            reload = results is None
+            if results:
+                self.signals.batch.emit(self.generation, results)
+        except Exception as e:
+            self.error = str(e)
+            self.signals.failed.emit(self.generation, self.error)
+        finally:
+            self.signals.finished.emit(self.generation, reload)
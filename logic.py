@@ -1,47 +1,453 @@
-import mysql.connector
-import os
+from queries import SQL, TASK_TYPES, TASK_TABLES, TASK_COLUMNS, TRANSFER_COLUMNS, PROJECT_LEVELS
+from storage import get_storage
+from datetime import date, timedelta
+from cache import TaskCache
+import queries
+import records
+import time
 
-db = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password=os.getenv("MYSQL_PASSWORD"),
-    database="todo"
-    )
+cache = TaskCache()
 
-cursor = db.cursor(buffered=True)
+
+# --- Data access; the active storage backend supplies connections and cursors ---
+def iter_batches(sql, params=(), batch_size=500, stream=False):
+    return get_storage().iter_batches(sql, params, batch_size, stream)
+
+def fetch_all(sql, params=()):
+    return get_storage().fetch_all(sql, params)
+
+def execute(sql, params=()):
+    return get_storage().execute(sql, params)
+
+def connect():
+    get_storage().connect()
+
+
+# --- Reads; the statements are named in queries.SQL ---
+def iso_date(value):
+    # MySQL returns DATE columns as dates; records carry ISO strings on every backend
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+def task_record(row):
+    task_type, task_id, name, detail, extra, descr, status = row
+    return records.READERS[task_type](task_id, name, detail, iso_date(extra), descr, status)
+
+def fetch_records(sql, params=()):
+    return [task_record(row) for row in fetch_all(sql, params)]
 
 def all_tasks():
-    cursor.execute("SELECT * FROM alltasks")
-    return cursor.fetchall()
+    return fetch_records(SQL["tasks.all"])
 
 def general_tasks():
-    cursor.execute("SELECT * FROM generalTask")
-    return cursor.fetchall()
+    return fetch_records(SQL["general.all"])
 
 def campus_tasks():
-    cursor.execute("SELECT * FROM campus")
-    return cursor.fetchall()
+    return fetch_records(SQL["campus.all"])
 
 def project_tasks():
-    cursor.execute("SELECT * FROM projects")
-    return cursor.fetchall()
+    return fetch_records(SQL["project.all"])
 
 def learning_tasks():
-    cursor.execute("SELECT * FROM learn")
-    return cursor.fetchall()
+    return fetch_records(SQL["learning.all"])
+
+def tasks_page(task_type, after_id=0, limit=100):
+    """ Next rows of a category after after_id; walks the primary key index instead of OFFSET """
+    return all_tasks_page([task_type], (0, after_id), limit)
+
+def campus_tasks_page(after_id=0, limit=100):
+    return tasks_page("campus", after_id, limit)
+
+def project_tasks_page(after_id=0, limit=100):
+    return tasks_page("project", after_id, limit)
+
+def learning_tasks_page(after_id=0, limit=100):
+    return tasks_page("learning", after_id, limit)
+
+def general_tasks_page(after_id=0, limit=100):
+    return tasks_page("general", after_id, limit)
+
+def all_tasks_page(task_types=TASK_TYPES, position=(0, 0), limit=100, status=None):
+    """ Next page across several categories, optionally of one status, from the cache when it holds the whole page """
+    tasks = cache.page(task_types, position, limit, status)
+    if tasks is None:
+        tasks = query_tasks_page(task_types, position, limit, status)
+        cache.store(task_types, position, limit, tasks, status)
+    return tasks
+
+def query_tasks_page(task_types, position, limit, status=None):
+    """ Next page across several categories in one UNION ALL query.
+
+    position is (index into task_types, last taskID read from that category). Each branch is
+    limited on its own so no branch reads more than one page from its primary key index, or
+    with a status from its (status, key) index.
+    """
+    index, after_id = position
+    if index >= len(task_types):
+        return []
+    params = []
+    for order in range(index, len(task_types)):
+        if status is not None:
+            params.append(status)
+        if order == index:
+            params.append(after_id)
+        params.append(limit)
+    params.append(limit)
+    return fetch_records(queries.page(task_types, index, status is not None), params)
+
+def ordered_value(sort, value):
+    """ A value of a record's sort field as queries.SORTS orders it """
+    if sort == "level":
+        return PROJECT_LEVELS.index(value) if value in PROJECT_LEVELS else None
+    return value
+
+def sort_value(task, sort):
+    """ The value of a record that queries.SORTS orders it by """
+    return ordered_value(sort, getattr(task, records.FIELDS[sort]))
+
+def sort_position(task, sort=None):
+    """ (value of the sort field, id) of a record, which sorted_tasks_page continues after """
+    return getattr(task, records.FIELDS[sort]) if sort else None, task.task_id
+
+def sort_key(sort=None):
+    """ Python key putting records in the order of sorted_tasks_page, NULLs first """
+    if sort is None:
+        return lambda task: task.task_id
+    def key(task):
+        value = sort_value(task, sort)
+        return value is not None, value, task.task_id
+    return key
+
+def sorted_tasks_page(task_type, sort=None, filters=None, after=None, limit=100, status=None):
+    """ Next page of one category ordered by sort, a queries.SORTS name or None for id order, narrowed to filters.
+
+    filters maps queries.FILTERS columns to the value to match; after is the sort_position of the
+    last record of the previous page, which pages seek past. They are not read from the cache,
+    whose views hold whole categories in id order.
+    """
+    if sort is not None and sort not in queries.SORTS[task_type]:
+        raise ValueError(f"{task_type} tasks cannot be sorted by {sort}")
+    filters = filters or {}
+    unknown = set(filters) - set(queries.FILTERS[task_type])
+    if unknown:
+        raise ValueError(f"{task_type} tasks cannot be filtered by {', '.join(sorted(unknown))}")
+    columns = sorted(filters)
+    params = [filters[column] for column in columns]
+    if status is not None:
+        params.append(status)
+    position = None
+    if after is not None:
+        value, after_id = after
+        value = ordered_value(sort, value) if sort else None
+        position = "id" if sort is None else "null" if value is None else "value"
+        params += [value, value, after_id] if position == "value" else [after_id]
+    params.append(limit)
+    return fetch_records(queries.sorted_page(task_type, sort, columns, status is not None, position), params)
+
+def get_task(task_type, task_id):
+    tasks = fetch_records(SQL[f"{task_type}.get"], (task_id,))
+    return tasks[0] if tasks else None
+
+def get_tasks(keys):
+    """ Records for a list of (task_type, task_id), in the same order; one query per category """
+    found = {}
+    for task_type in TASK_TYPES:
+        ids = [task_id for t, task_id in keys if t == task_type]
+        if ids:
+            for task in fetch_records(queries.get_many(task_type, len(ids)), ids):
+                found[(task_type, task.task_id)] = task
+    return [found[key] for key in keys if key in found]
+
+def search_tasks(text, limit=50, status=None):
+    """ Best full-text matches across every category, best first; status is matched in the query """
+    return get_tasks([tuple(key) for key in get_storage().search(text, limit, status)])
+
+def due_tasks(start=None, end=None, module=None, status=None):
+    """ Campus tasks due on or after start and before end (ISO dates, None for open), earliest first.
+
+    A range the cache's agenda index does not cover yet is read with one index range query and
+    written through to the cache; the index then answers it, and any range inside it, until the
+    cache expires. Only tasks in the range are read.
+    """
+    if not cache.agenda.covers(start, end, module):
+        params = [value for value in (module, start, end) if value is not None]
+        tasks = fetch_records(queries.agenda(start is not None, end is not None, module is not None), params)
+        cache.agenda.cover(start, end, module)
+        for task in tasks:
+            cache.put(task)
+    ids = cache.agenda.due(start, end, module, status)
+    found = cache.records("campus", ids)
+    missing = [("campus", task_id) for task_id in ids if task_id not in found]
+    for task in get_tasks(missing):
+        cache.put(task)
+        found[task.task_id] = task
+    return [found[task_id] for task_id in ids if task_id in found]
+
+def agenda_range(view, today=None):
+    """ (start, end) of a named agenda view """
+    today = today or date.today()
+    if view == "overdue":
+        return None, today.isoformat()
+    if view == "today":
+        return today.isoformat(), (today + timedelta(days=1)).isoformat()
+    if view == "week":
+        return today.isoformat(), (today + timedelta(days=7)).isoformat()
+    raise ValueError(f"Unknown agenda view: {view}")
+
+def modules():
+    return cache.lookup("modules", lambda: [row[0] for row in fetch_all(SQL["modules.all"])])
+
+def known_modules():
+    """ The module list as last read, without a query; None if it has not been read yet """
+    return cache.known("modules")
+
+def languages():
+    return cache.lookup("languages", lambda: [row[0] for row in fetch_all(SQL["learning.langs"])])
+
+
+# --- Writes; each one reads back the affected row, writes it through to the cache and returns it ---
+def _saved(task_type, task_id):
+    task = get_task(task_type, task_id)
+    if task:
+        cache.put(task)
+    else:
+        cache.remove(task_type, task_id)
+    return task
 
 def add_general_task(name, descr):
-    cursor.execute("INSERT INTO generalTask (name, descr) VALUES (%s, %s)", (name, descr))
-    db.commit()
+    return add_task("general", (name, descr))
 
 def add_project_task(name, techStack, descr, level):
-    cursor.execute("INSERT INTO projects (name, techStack, descr, level) VALUES (%s, %s, %s, %s)", (name, techStack, descr, level))
-    db.commit()
+    return add_task("project", (name, techStack, descr, level))
 
 def add_campus_task(name, module, dueDate, task):
-    cursor.execute("INSERT INTO campus (name, module, dueDate, descr) VALUES (%s, %s, %s, %s)", (name, module, dueDate, task))
-    db.commit()
+    return add_task("campus", (name, module, dueDate, task))
 
 def add_learning_task(name, lang, descr):
-    cursor.execute("INSERT INTO learn (name, lang, descr) VALUES (%s, %s, %s)", (name, lang, descr))
-    db.commit()
+    return add_task("learning", (name, lang, descr))
+
+def update_general_task(taskID, name, descr):
+    return update_task("general", taskID, (name, descr))
+
+def update_project_task(taskID, name, techStack, descr, level):
+    return update_task("project", taskID, (name, techStack, descr, level))
+
+def update_campus_task(taskID, name, module, dueDate, task):
+    return update_task("campus", taskID, (name, module, dueDate, task))
+
+def update_learning_task(taskID, name, lang, descr):
+    return update_task("learning", taskID, (name, lang, descr))
+
+def add_task(task_type, values, status=None):
+    """ Insert a row of TASK_COLUMNS values into any category, with status in the same statement if given """
+    if status is None:
+        return _saved(task_type, get_storage().insert(SQL[f"{task_type}.insert"], values))
+    return _saved(task_type, get_storage().insert(SQL[f"{task_type}.import"], (*values, status)))
+
+def update_task(task_type, task_id, values):
+    execute(SQL[f"{task_type}.update"], (*values, task_id))
+    return _saved(task_type, task_id)
+
+# --- Bulk transfer ---
+def values_record(task_type, task_id, values, status="pending"):
+    """ The record a row with these TASK_COLUMNS values reads back as """
+    return records.from_columns(task_type, task_id, dict(zip(TASK_COLUMNS[task_type], values)), status)
+
+def bulk_add_tasks(batches, statement="insert"):
+    """ Insert (task_type, rows) batches with executemany, all in one transaction.
+
+    Rows hold TASK_COLUMNS for the insert statement, or TRANSFER_COLUMNS for import.
+    """
+    storage = get_storage()
+    moduleRows = []
+
+    def statements():
+        for task_type, rows in batches:
+            if task_type == "campus":
+                # campus.module must name a module, so unknown ones are added first
+                modules = [(module,) for module in sorted({row[1] for row in rows if row[1]})]
+                if modules:
+                    moduleRows.append(len(modules))
+                    yield SQL["modules.add"].format(insert_ignore=storage.insert_ignore), modules
+            yield SQL[f"{task_type}.{statement}"], rows
+
+    try:
+        return storage.execute_batches(statements()) - sum(moduleRows)
+    finally:
+        cache.invalidate()
+
+def export_tasks(task_type, batch_size=1000):
+    """ Stream a category's TRANSFER_COLUMNS tuples in primary key order through a server-side cursor """
+    return iter_batches(SQL[f"{task_type}.export"], batch_size=batch_size, stream=True)
+
+def delete_task(task_type, task_id):
+    """ Move a task to the trash; restore_tasks brings it back until it is purged """
+    if task_type not in TASK_TABLES:
+        raise ValueError(f"Unknown task type: {task_type}")
+    rowcount = execute(SQL[f"{task_type}.delete"], (time.time(), task_id))
+    cache.remove(task_type, task_id)
+    return rowcount > 0
+
+
+# --- Bulk edits; one set-based statement per chunk of ids ---
+# Columns a bulk edit may set, with the record field each one is shown in
+BULK_COLUMNS = {
+    "campus": {"status": "status", "module": "module"},
+    "project": {"status": "status", "level": "level"},
+    "learning": {"status": "status"},
+    "general": {"status": "status"}
+}
+
+TASK_STATUSES = ["pending", "done"]
+
+# Ids per IN list, well under the bound-parameter limit of every backend
+BULK_CHUNK = 500
+
+def bulk_statements(task_type, ids, column=None, value=None):
+    """ (sql, params) that move the ids to the trash, or set column to value on them """
+    if column is not None and column not in BULK_COLUMNS[task_type]:
+        raise ValueError(f"{column} cannot be bulk edited on {task_type} tasks")
+    now = time.time()
+    for start in range(0, len(ids), BULK_CHUNK):
+        chunk = ids[start:start + BULK_CHUNK]
+        if column is None:
+            yield queries.bulk_delete(task_type, len(chunk)), [now] + chunk
+        else:
+            yield queries.bulk_update(task_type, column, len(chunk)), [value] + chunk
+
+def restore_statements(task_type, ids):
+    """ (sql, params) that take the ids back out of the trash """
+    for start in range(0, len(ids), BULK_CHUNK):
+        chunk = ids[start:start + BULK_CHUNK]
+        yield queries.bulk_restore(task_type, len(chunk)), chunk
+
+def update_tasks(task_type, ids, column, value):
+    """ Set column to value on many tasks in one transaction; returns the saved records by id """
+    storage = get_storage()
+    with storage.cursor(commit=True) as cursor:
+        for sql, params in bulk_statements(task_type, ids, column, value):
+            cursor.execute(storage.sql(sql), params)
+    return saved_tasks(task_type, ids)
+
+def restore_tasks(task_type, ids):
+    """ Take tasks out of the trash in one transaction; returns the restored records by id """
+    storage = get_storage()
+    with storage.cursor(commit=True) as cursor:
+        for sql, params in restore_statements(task_type, ids):
+            cursor.execute(storage.sql(sql), params)
+    return saved_tasks(task_type, ids)
+
+def saved_tasks(task_type, ids):
+    """ Re-read many rows of a category, writing them through to the cache; returns them by id """
+    found = {task.task_id: task for task in get_tasks([(task_type, task_id) for task_id in ids])}
+    for task_id in ids:
+        if task_id in found:
+            cache.put(found[task_id])
+        else:
+            cache.remove(task_type, task_id)
+    return found
+
+
+# --- Queued edits from the outbox ---
+def apply_ops(ops, resolve):
+    """ Apply (key, op, task_type, task_id, values, provisional) edits in one transaction.
+
+    Each key is written to appliedOps in the same transaction, so a batch that is retried after
+    its commit went through is skipped instead of applied twice. Negative task ids name rows
+    added by an earlier edit; they are looked up in this batch first, then through resolve.
+    Returns the real task id of every edit, or for the _many edits the list of them.
+    """
+    storage = get_storage()
+    created = {}
+    results = []
+
+    def real(task_id):
+        if task_id is not None and task_id < 0:
+            return created.get(task_id) or resolve(task_id)
+        return task_id
+
+    with storage.cursor(commit=True) as cursor:
+        for key, op, task_type, task_id, values, provisional in ops:
+            cursor.execute(storage.sql(SQL["ops.applied"]), (key,))
+            row = cursor.fetchone()
+            if op in ("update_many", "delete_many", "restore_many"):
+                task_id = [real(i) for i in values["ids"]]
+                if row is None:
+                    ids = [i for i in task_id if i is not None]
+                    statements = (restore_statements(task_type, ids) if op == "restore_many" else
+                                  bulk_statements(task_type, ids, values.get("column"), values.get("value")))
+                    for sql, params in statements:
+                        cursor.execute(storage.sql(sql), params)
+            elif row is None:
+                task_id = real(task_id)
+                if op == "add":
+                    cursor.execute(storage.sql(SQL[f"{task_type}.insert"]), values)
+                    task_id = cursor.lastrowid
+                elif op == "update":
+                    cursor.execute(storage.sql(SQL[f"{task_type}.update"]), (*values, task_id))
+                else:
+                    cursor.execute(storage.sql(SQL[f"{task_type}.delete"]), (time.time(), task_id))
+            else:
+                task_id = row[0]
+            if row is None:
+                cursor.execute(storage.sql(SQL["ops.record"]),
+                               (key, None if isinstance(task_id, list) else task_id, time.time()))
+            if op == "add":
+                created[provisional] = task_id
+            results.append(task_id)
+    return results
+
+# --- Trash ---
+def trash_page(after=None, limit=100, task_types=TASK_TYPES):
+    """ Deleted tasks not yet purged, most recently deleted first, and where the next page continues.
+
+    after is None on the first page, then what the previous page returned: the (task_type, task_id,
+    deletedAt) of its last task, or None once there are no more.
+    """
+    index = None
+    params = []
+    if after:
+        task_type, task_id, deleted_at = after
+        index = task_types.index(task_type)
+    for order in range(len(task_types)):
+        if after:
+            params += [deleted_at, deleted_at, task_id] if order == index else [deleted_at]
+        params.append(limit)
+    rows = fetch_all(queries.trash(task_types, index), params + [limit])
+    last = rows[-1] if len(rows) == limit else None
+    return [task_record(row[:7]) for row in rows], (last[0], last[1], last[7]) if last else None
+
+def trash(limit=100, task_types=TASK_TYPES):
+    """ The most recently deleted tasks, the first page of trash_page """
+    return trash_page(None, limit, task_types)[0]
+
+def purge_expired(task_type, before, batch_size=200):
+    """ Remove up to batch_size tasks of a category deleted before the given time, for good.
+
+    The ids are read from the deletedAt index first and deleted by primary key in a short
+    transaction of their own, so only those rows are ever locked. Returns how many were removed.
+    """
+    ids = [row[0] for row in fetch_all(SQL[f"{task_type}.expired"], (before, batch_size))]
+    if not ids:
+        return 0
+    return execute(queries.purge(task_type, len(ids)), (*ids, before))
+
+def prune_applied_ops(age=86400):
+    """ Forget idempotency keys once no retry can still refer to them """
+    execute(SQL["ops.prune"], (time.time() - age,))
+
+
+# --- Changes logged by the task table triggers, from this client or any other ---
+def change_versions():
+    """ Oldest and newest version still in changeLog, (0, 0) while it is empty """
+    oldest, newest = fetch_all(SQL["changes.versions"])[0]
+    return oldest or 0, newest or 0
+
+def changes_since(version, limit=500):
+    """ (version, task_type, task_id) of the changes after version, oldest first """
+    return fetch_all(SQL["changes.since"], (version, limit))
+
+def prune_changes(keep=100000):
+    """ Keep the newest keep changes; a client further behind than that reloads instead """
+    newest = change_versions()[1]
+    if newest > keep:
+        execute(SQL["changes.prune"], (newest - keep,))
@@ -1,28 +1,33 @@
-import PySide6
-from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QFile, QIODevice
 import sys
-import display as display
 
-app = QApplication(sys.argv)
+# Registers the :/ resources compiled from resources.qrc
+import resources_rc
 
-import sys
-import os
 
-def resource_path(relative_path):
-    """ Get absolute path to resource, works for dev and for PyInstaller """
-    if hasattr(sys, '_MEIPASS'):
-        return os.path.join(sys._MEIPASS, relative_path)
-    return os.path.join(os.path.abspath("."), relative_path)
+def load_stylesheet(path=":/styles.css"):
+    """ Read a stylesheet out of the compiled resources """
+    css = QFile(path)
+    if not css.open(QIODevice.ReadOnly | QIODevice.Text):
+        raise FileNotFoundError(path)
+    try:
+        return bytes(css.readAll()).decode("utf-8")
+    finally:
+        css.close()
 
 
-css_path = resource_path("ToDo/styles.css")
-with open(css_path, "r") as f:
-    css = f.read()
-app.setStyleSheet(css)
+def main():
+    app = QApplication(sys.argv)
+    app.setStyleSheet(load_stylesheet())
 
-window = display.Display()
+    # Imported once the application exists; the database is only opened after the window shows
+    import display
+    window = display.Display()
+    window.show()
 
-window.show()
+    return app.exec()
 
-sys.exit(app.exec())
 
+if __name__ == "__main__":
+    sys.exit(main())
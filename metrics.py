@@ -0,0 +1,157 @@
+from collections import deque
+import threading
+import time
+import json
+import re
+
+# Upper bounds of the latency histogram buckets in milliseconds
+BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, float("inf")]
+
+
+class Stats:
+    __slots__ = ("count", "rows", "total_ms", "max_ms", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * len(BUCKETS_MS)
+
+    def add(self, ms, rows=0):
+        self.count += 1
+        self.rows += rows
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.histogram[i] += 1
+                break
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "rows": self.rows,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0,
+            "max_ms": round(self.max_ms, 3),
+            "histogram": {("inf" if bound == float("inf") else f"<={bound}ms"): n
+                          for bound, n in zip(BUCKETS_MS, self.histogram)}
+        }
+
+
+class Metrics:
+    """ Thread-safe timings of queries, rendering and event-loop stalls.
+
+    Stats are aggregated per (kind, name); for queries the name is the SQL with whitespace and
+    IN lists collapsed. Individual events are kept in a bounded ring for the structured log.
+    """
+    def __init__(self, history=2000):
+        self._lock = threading.Lock()
+        self.stats = {}
+        self.events = deque(maxlen=history)
+
+    def record(self, kind, name, ms, rows=0, keep=True):
+        with self._lock:
+            stats = self.stats.get((kind, name))
+            if stats is None:
+                stats = self.stats[(kind, name)] = Stats()
+            stats.add(ms, rows)
+            if keep:
+                self.events.append({"ts": time.time(), "kind": kind, "name": name, "ms": round(ms, 3), "rows": rows})
+
+    def add_rows(self, kind, name, rows):
+        """ Rows read after the statement was timed, e.g. by fetchall """
+        with self._lock:
+            stats = self.stats.get((kind, name))
+            if stats:
+                stats.rows += rows
+
+    def timer(self, kind, name, keep=True):
+        return _Timer(self, kind, name, keep)
+
+    def snapshot(self, kind=None):
+        with self._lock:
+            return [(k, name, stats.as_dict()) for (k, name), stats in self.stats.items() if kind is None or k == kind]
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.events.clear()
+
+    def export(self, path):
+        """ Write the recent events and the aggregated stats as JSON lines """
+        with self._lock:
+            events = list(self.events)
+            stats = [(k, name, s.as_dict()) for (k, name), s in self.stats.items()]
+        with open(path, "w", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+            for kind, name, summary in stats:
+                f.write(json.dumps({"kind": "summary", "of": kind, "name": name, **summary}) + "\n")
+
+
+class _Timer:
+    __slots__ = ("metrics", "kind", "name", "keep", "start")
+
+    def __init__(self, metrics, kind, name, keep):
+        self.metrics, self.kind, self.name, self.keep = metrics, kind, name, keep
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.kind, self.name, (time.perf_counter() - self.start) * 1000, keep=self.keep)
+
+
+def query_name(sql):
+    sql = re.sub(r"\s+", " ", sql).strip()
+    return re.sub(r"IN \((?:[%?s]+, )*[%?s]+\)", "IN (...)", sql)
+
+
+class TimedCursor:
+    """ Wraps a DB-API cursor and records every statement it runs """
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+        self._name = None
+
+    def _timed(self, method, sql, params):
+        self._name = query_name(sql)
+        start = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            # Result sets are counted as they are fetched; writes report affected rows here
+            rows = max(self._cursor.rowcount or 0, 0) if self._cursor.description is None else 0
+            self._metrics.record("query", self._name, (time.perf_counter() - start) * 1000, rows)
+
+    def execute(self, sql, params=()):
+        return self._timed(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, rows):
+        return self._timed(self._cursor.executemany, sql, rows)
+
+    def _fetched(self, rows):
+        if self._name and rows:
+            self._metrics.add_rows("query", self._name, len(rows))
+        return rows
+
+    def fetchall(self):
+        return self._fetched(self._cursor.fetchall())
+
+    def fetchmany(self, size):
+        return self._fetched(self._cursor.fetchmany(size))
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._fetched([row])
+        return row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+metrics = Metrics()
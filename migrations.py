@@ -0,0 +1,454 @@
+""" Versioned schema of the task database, for SQLite and MySQL.
+
+MIGRATIONS[n - 1] brings a database from version n - 1 to n. Each version lists the steps of
+each backend: SQL statements, or functions taking a cursor for changes that depend on what the
+database already has. SQLite keeps its version in PRAGMA user_version and runs every version in
+one transaction. MySQL keeps it in schemaVersion; its DDL commits as it goes, so every MySQL step
+is written to be safe to run again after a failure.
+"""
+from datetime import date
+
+# Searchable tables in category order, with their primary key and detail column
+SEARCH_TABLES = [
+    ("campus", "assignmentID", "module"),
+    ("projects", "projectID", "techStack"),
+    ("learn", "techID", "lang"),
+    ("generalTask", "taskID", None)
+]
+
+ALLTASKS_VIEW = """alltasks AS
+    SELECT 'campus' AS taskType, assignmentID AS taskID, name, module AS detail, dueDate AS extra, descr FROM campus
+    UNION ALL SELECT 'project', projectID, name, techStack, level, descr FROM projects
+    UNION ALL SELECT 'learning', techID, name, lang, NULL, descr FROM learn
+    UNION ALL SELECT 'general', taskID, name, NULL, NULL, descr FROM generalTask"""
+
+ALLTASKS_STATUS_VIEW = """alltasks AS
+    SELECT 'campus' AS taskType, assignmentID AS taskID, name, module AS detail, dueDate AS extra, descr, status FROM campus
+    UNION ALL SELECT 'project', projectID, name, techStack, level, descr, status FROM projects
+    UNION ALL SELECT 'learning', techID, name, lang, NULL, descr, status FROM learn
+    UNION ALL SELECT 'general', taskID, name, NULL, NULL, descr, status FROM generalTask"""
+
+TASK_TABLES = [table for table, key, detail in SEARCH_TABLES]
+
+# Category of each table, as written to changeLog
+CHANGE_TYPES = {"campus": "campus", "projects": "project", "learn": "learning", "generalTask": "general"}
+
+# (table, name, columns) of the SQLite indexes that only cover rows outside the trash
+LIVE_INDEXES = [(table, f"{table}_status", f"status, {key}") for table, key, detail in SEARCH_TABLES] + [
+    (table, f"{table}_name", "name") for table in TASK_TABLES
+] + [
+    ("campus", "campus_dueDate", "dueDate"),
+    ("projects", "projects_level_name", "level, name"),
+    ("learn", "learn_lang_name", "lang, name")
+]
+
+# (table, name, columns) of the indexes lists narrowed to one status are sorted on (queries.SORTS):
+# the status, the sort column, then the key, so such a page is read in order instead of sorted
+STATUS_SORT_INDEXES = [(table, f"{table}_status_{column}", f"status, {column}, {key}") for table, key, column in [
+    ("campus", "assignmentID", "dueDate"),
+    ("campus", "assignmentID", "module"),
+    ("campus", "assignmentID", "name"),
+    ("projects", "projectID", "name"),
+    ("learn", "techID", "lang"),
+    ("learn", "techID", "name"),
+    ("generalTask", "taskID", "name")
+]]
+
+# Where a project's level comes in the order lists sort levels in (queries.PROJECT_LEVELS); NULL
+# for any other value. projects.levelRank is generated from it so that order can be indexed.
+LEVEL_RANK = "CASE level WHEN 'Easy' THEN 0 WHEN 'Intermediate' THEN 1 WHEN 'Difficult' THEN 2 END"
+
+# (table, name, columns) of the indexes of the level order, and of lists narrowed to one status and
+# to a value of a filter column (queries.FILTERS), then sorted on another
+RANK_SORT_INDEXES = [
+    ("projects", "projects_levelRank", "levelRank, projectID"),
+    ("projects", "projects_status_levelRank", "status, levelRank, projectID")
+] + [(table, f"{table}_status_{column}_{sort}", f"status, {column}, {sort}, {key}") for table, key, column, sort in [
+    ("campus", "assignmentID", "module", "dueDate"),
+    ("projects", "projectID", "level", "name"),
+    ("learn", "techID", "lang", "name")
+]]
+
+
+# --- SQLite helpers ---
+def sqlite_search_triggers(order, table, key, detail):
+    """ Keep the tasksearch row of every task in step with its table """
+    new = f"new.{detail}" if detail else "NULL"
+    return [
+        f"""CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO tasksearch (rowid, name, descr, detail) VALUES (new.{key} * 4 + {order}, new.name, new.descr, {new});
+        END""",
+        f"""CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN
+            DELETE FROM tasksearch WHERE rowid = old.{key} * 4 + {order};
+        END""",
+        f"""CREATE TRIGGER {table}_search_update AFTER UPDATE ON {table} BEGIN
+            DELETE FROM tasksearch WHERE rowid = old.{key} * 4 + {order};
+            INSERT INTO tasksearch (rowid, name, descr, detail) VALUES (new.{key} * 4 + {order}, new.name, new.descr, {new});
+        END"""
+    ]
+
+
+def sqlite_change_triggers(table, key):
+    """ Log the id of every row written to table in changeLog """
+    return [
+        f"""CREATE TRIGGER {table}_changes_{event.lower()} AFTER {event} ON {table} BEGIN
+            INSERT INTO changeLog (taskType, taskID) VALUES ('{CHANGE_TYPES[table]}', {row}.{key});
+        END"""
+        for event, row in [("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")]
+    ]
+
+
+# --- MySQL helpers ---
+def mysql_add_index(table, name, columns, kind="INDEX"):
+    def step(cursor):
+        cursor.execute("SELECT COUNT(*) FROM information_schema.statistics "
+                       "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s", (table, name))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"ALTER TABLE {table} ADD {kind} {name} ({columns})")
+    return step
+
+def mysql_drop_index(table, name):
+    def step(cursor):
+        cursor.execute("SELECT COUNT(*) FROM information_schema.statistics "
+                       "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s", (table, name))
+        if cursor.fetchone()[0]:
+            cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+    return step
+
+def mysql_add_column(table, name, definition):
+    def step(cursor):
+        cursor.execute("SELECT COUNT(*) FROM information_schema.columns "
+                       "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s", (table, name))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+    return step
+
+def mysql_clear_invalid_dates(table, key, column):
+    # Checked here rather than with STR_TO_DATE, which fails the whole UPDATE under strict sql_mode
+    # on the very strings it should reject, such as 2025-02-30
+    def step(cursor):
+        cursor.execute(f"SELECT {key}, {column} FROM {table} WHERE {column} IS NOT NULL")
+        invalid = [(task_id,) for task_id, value in cursor.fetchall() if isinstance(value, str) and not is_iso_date(value)]
+        if invalid:
+            cursor.executemany(f"UPDATE {table} SET {column} = NULL WHERE {key} = %s", invalid)
+    return step
+
+def is_iso_date(value):
+    """ Whether value is a real date written as YYYY-MM-DD """
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return len(value) == 10
+
+def mysql_add_foreign_key(table, name, definition):
+    def step(cursor):
+        cursor.execute("SELECT COUNT(*) FROM information_schema.table_constraints "
+                       "WHERE table_schema = DATABASE() AND table_name = %s AND constraint_name = %s", (table, name))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+    return step
+
+def mysql_replace_view(definition):
+    # Older deployments may keep alltasks as a table of their own; the app never read it, so it
+    # is left as it is rather than failing the migration
+    name = definition.split()[0]
+    def step(cursor):
+        cursor.execute("SELECT COUNT(*) FROM information_schema.tables "
+                       "WHERE table_schema = DATABASE() AND table_name = %s AND table_type = 'BASE TABLE'", (name,))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"CREATE OR REPLACE VIEW {definition}")
+    return step
+
+def mysql_drop_view(name):
+    # Only the view; a table of the same name belongs to an older deployment and is left alone
+    def step(cursor):
+        cursor.execute("SELECT COUNT(*) FROM information_schema.tables "
+                       "WHERE table_schema = DATABASE() AND table_name = %s AND table_type = 'VIEW'", (name,))
+        if cursor.fetchone()[0]:
+            cursor.execute(f"DROP VIEW {name}")
+    return step
+
+def mysql_change_triggers(table, key):
+    def step(cursor):
+        for event, row in [("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")]:
+            name = f"{table}_changes_{event.lower()}"
+            cursor.execute("SELECT COUNT(*) FROM information_schema.triggers "
+                           "WHERE trigger_schema = DATABASE() AND trigger_name = %s", (name,))
+            if cursor.fetchone()[0] == 0:
+                cursor.execute(f"CREATE TRIGGER {name} AFTER {event} ON {table} FOR EACH ROW "
+                               f"INSERT INTO changeLog (taskType, taskID) VALUES ('{CHANGE_TYPES[table]}', {row}.{key})")
+    return step
+
+
+MIGRATIONS = [
+    {
+        "sqlite": [
+            "CREATE TABLE IF NOT EXISTS modules (module TEXT PRIMARY KEY)",
+            """CREATE TABLE IF NOT EXISTS campus (
+                assignmentID INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                module TEXT,
+                dueDate TEXT,
+                descr TEXT
+            )""",
+            """CREATE TABLE IF NOT EXISTS projects (
+                projectID INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                techStack TEXT,
+                descr TEXT,
+                level TEXT
+            )""",
+            """CREATE TABLE IF NOT EXISTS learn (
+                techID INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                lang TEXT,
+                descr TEXT
+            )""",
+            """CREATE TABLE IF NOT EXISTS generalTask (
+                taskID INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                descr TEXT
+            )""",
+            "CREATE INDEX IF NOT EXISTS campus_module ON campus (module)",
+            "CREATE INDEX IF NOT EXISTS campus_dueDate ON campus (dueDate)",
+            "CREATE INDEX IF NOT EXISTS projects_level ON projects (level)",
+            "CREATE INDEX IF NOT EXISTS learn_lang ON learn (lang)",
+            """CREATE VIEW IF NOT EXISTS alltasks AS
+                SELECT 'campus' AS taskType, assignmentID AS taskID, name, descr FROM campus
+                UNION ALL SELECT 'project', projectID, name, descr FROM projects
+                UNION ALL SELECT 'learning', techID, name, descr FROM learn
+                UNION ALL SELECT 'general', taskID, name, descr FROM generalTask"""
+        ],
+        # The tables as the app has always used them; later versions change them in place
+        "mysql": [
+            "CREATE TABLE IF NOT EXISTS modules (module VARCHAR(100) PRIMARY KEY) ENGINE=InnoDB",
+            """CREATE TABLE IF NOT EXISTS campus (
+                assignmentID INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                module VARCHAR(100),
+                dueDate VARCHAR(10),
+                descr TEXT
+            ) ENGINE=InnoDB""",
+            """CREATE TABLE IF NOT EXISTS projects (
+                projectID INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                techStack VARCHAR(255),
+                descr TEXT,
+                level VARCHAR(20)
+            ) ENGINE=InnoDB""",
+            """CREATE TABLE IF NOT EXISTS learn (
+                techID INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                lang VARCHAR(100),
+                descr TEXT
+            ) ENGINE=InnoDB""",
+            """CREATE TABLE IF NOT EXISTS generalTask (
+                taskID INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                descr TEXT
+            ) ENGINE=InnoDB""",
+            mysql_add_index("campus", "campus_module", "module"),
+            mysql_add_index("campus", "campus_dueDate", "dueDate"),
+            mysql_add_index("projects", "projects_level", "level"),
+            mysql_add_index("learn", "learn_lang", "lang")
+        ]
+    },
+    {
+        # One shape for every category, with taskType as the discriminator
+        "sqlite": ["DROP VIEW IF EXISTS alltasks", f"CREATE VIEW {ALLTASKS_VIEW}"],
+        "mysql": [mysql_replace_view(ALLTASKS_VIEW)]
+    },
+    {
+        # Full-text search. On SQLite an FTS5 index kept in step by triggers, whose rowid packs
+        # the category and the task id (taskID * 4 + category) so a row is found without a scan.
+        "sqlite": ["CREATE VIRTUAL TABLE tasksearch USING fts5(name, descr, detail, prefix='2 3')"] + [
+            statement
+            for order, (table, key, detail) in enumerate(SEARCH_TABLES)
+            for statement in [
+                f"INSERT INTO tasksearch (rowid, name, descr, detail) SELECT {key} * 4 + {order}, name, descr, {detail or 'NULL'} FROM {table}"
+            ] + sqlite_search_triggers(order, table, key, detail)
+        ],
+        "mysql": [
+            mysql_add_index(table, "search", f"name, descr, {detail}" if detail else "name, descr", "FULLTEXT")
+            for table, key, detail in SEARCH_TABLES
+        ]
+    },
+    {
+        # Keys of the outbox edits already applied, so a retried batch skips them
+        "sqlite": ["CREATE TABLE appliedOps (opKey TEXT PRIMARY KEY, taskID INTEGER, appliedAt REAL NOT NULL)"],
+        "mysql": ["CREATE TABLE IF NOT EXISTS appliedOps (opKey CHAR(32) PRIMARY KEY, taskID INT, appliedAt DOUBLE NOT NULL) ENGINE=InnoDB"]
+    },
+    {
+        # Due dates as ISO dates instead of "yyyy-MM.dd" strings, campus.module as a foreign key
+        # of modules, and name indexes. Dates that cannot be read are cleared.
+        "sqlite": [
+            "UPDATE campus SET dueDate = replace(dueDate, '.', '-') WHERE dueDate GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9].[0-9][0-9]'",
+            # date() rolls impossible days over, so anything it does not return unchanged is not a date
+            "UPDATE campus SET dueDate = NULL WHERE dueDate IS NOT NULL AND date(dueDate, '+0 days') IS NOT dueDate",
+            "INSERT OR IGNORE INTO modules (module) SELECT DISTINCT module FROM campus WHERE module IS NOT NULL",
+            # SQLite cannot add a foreign key to a table, so campus is rebuilt
+            "DROP VIEW alltasks",
+            """CREATE TABLE campus_new (
+                assignmentID INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                module TEXT REFERENCES modules (module) ON UPDATE CASCADE ON DELETE SET NULL,
+                dueDate DATE,
+                descr TEXT
+            )""",
+            "INSERT INTO campus_new (assignmentID, name, module, dueDate, descr) SELECT assignmentID, name, module, dueDate, descr FROM campus",
+            "DROP TABLE campus",
+            "ALTER TABLE campus_new RENAME TO campus",
+            f"CREATE VIEW {ALLTASKS_VIEW}",
+            "CREATE INDEX campus_module ON campus (module)",
+            "CREATE INDEX campus_dueDate ON campus (dueDate)",
+            "CREATE INDEX campus_name ON campus (name)",
+            "CREATE INDEX projects_name ON projects (name)",
+            "CREATE INDEX learn_name ON learn (name)",
+            "CREATE INDEX generalTask_name ON generalTask (name)"
+        ] + sqlite_search_triggers(0, *SEARCH_TABLES[0]),
+        "mysql": [
+            "UPDATE campus SET dueDate = REPLACE(dueDate, '.', '-') WHERE dueDate LIKE '____-__.__'",
+            mysql_clear_invalid_dates("campus", "assignmentID", "dueDate"),
+            "ALTER TABLE campus MODIFY dueDate DATE NULL",
+            "INSERT IGNORE INTO modules (module) SELECT DISTINCT module FROM campus WHERE module IS NOT NULL",
+            mysql_add_foreign_key("campus", "campus_module_fk",
+                                  "FOREIGN KEY (module) REFERENCES modules (module) ON UPDATE CASCADE ON DELETE SET NULL"),
+            mysql_add_index("campus", "campus_name", "name"),
+            mysql_add_index("projects", "projects_name", "name"),
+            mysql_add_index("learn", "learn_name", "name"),
+            mysql_add_index("generalTask", "generalTask_name", "name")
+        ]
+    },
+    {
+        # Task status, "pending" or "done"
+        "sqlite": [
+            f"ALTER TABLE {table} ADD COLUMN status TEXT NOT NULL DEFAULT 'pending'" for table in TASK_TABLES
+        ] + ["DROP VIEW alltasks", f"CREATE VIEW {ALLTASKS_STATUS_VIEW}"],
+        "mysql": [
+            mysql_add_column(table, "status", "VARCHAR(10) NOT NULL DEFAULT 'pending'") for table in TASK_TABLES
+        ] + [mysql_replace_view(ALLTASKS_STATUS_VIEW)]
+    },
+    {
+        # Status-filtered pages walk (status, key) instead of skipping finished tasks
+        "sqlite": [f"CREATE INDEX {table}_status ON {table} (status, {key})" for table, key, detail in SEARCH_TABLES],
+        "mysql": [mysql_add_index(table, f"{table}_status", f"status, {key}") for table, key, detail in SEARCH_TABLES]
+    },
+    {
+        # Every write to a task table, numbered in the order it was made, so running clients can
+        # fetch what changed since the version they last saw
+        "sqlite": [
+            "CREATE TABLE changeLog (version INTEGER PRIMARY KEY AUTOINCREMENT, taskType TEXT NOT NULL, taskID INTEGER NOT NULL)"
+        ] + [statement for table, key, detail in SEARCH_TABLES for statement in sqlite_change_triggers(table, key)],
+        "mysql": [
+            """CREATE TABLE IF NOT EXISTS changeLog (
+                version BIGINT AUTO_INCREMENT PRIMARY KEY,
+                taskType VARCHAR(10) NOT NULL,
+                taskID INT NOT NULL
+            ) ENGINE=InnoDB"""
+        ] + [mysql_change_triggers(table, key) for table, key, detail in SEARCH_TABLES]
+    },
+    {
+        # Lists narrowed to one module, level or language and sorted within it (queries.SORTS).
+        # Each replaces the single-column index it starts with, the campus.module foreign key included.
+        "sqlite": [
+            "CREATE INDEX campus_module_dueDate ON campus (module, dueDate)",
+            "CREATE INDEX projects_level_name ON projects (level, name)",
+            "CREATE INDEX learn_lang_name ON learn (lang, name)",
+            "DROP INDEX campus_module",
+            "DROP INDEX projects_level",
+            "DROP INDEX learn_lang"
+        ],
+        "mysql": [
+            mysql_add_index("campus", "campus_module_dueDate", "module, dueDate"),
+            mysql_add_index("projects", "projects_level_name", "level, name"),
+            mysql_add_index("learn", "learn_lang_name", "lang, name"),
+            mysql_drop_index("campus", "campus_module"),
+            mysql_drop_index("projects", "projects_level"),
+            mysql_drop_index("learn", "learn_lang")
+        ]
+    },
+    {
+        # Soft delete: deletedAt is set when a task goes to the trash and the row is purged once it
+        # expires (trash.py). On SQLite the indexes lists are read through are rebuilt as partial
+        # indexes of the live rows (LIVE_INDEXES) and the trash gets one of its own;
+        # campus_module_dueDate stays whole since the module foreign key looks rows up through it.
+        # MySQL has no partial indexes, so it only gets the deletedAt index; its live reads skip
+        # the few rows in the trash as they go.
+        "sqlite": [
+            f"ALTER TABLE {table} ADD COLUMN deletedAt REAL" for table in TASK_TABLES
+        ] + [
+            statement
+            for table, name, columns in LIVE_INDEXES
+            for statement in [f"DROP INDEX {name}", f"CREATE INDEX {name} ON {table} ({columns}) WHERE deletedAt IS NULL"]
+        ] + [f"CREATE INDEX {table}_deleted ON {table} (deletedAt) WHERE deletedAt IS NOT NULL" for table in TASK_TABLES],
+        "mysql": [
+            mysql_add_column(table, "deletedAt", "DOUBLE NULL") for table in TASK_TABLES
+        ] + [mysql_add_index(table, f"{table}_deleted", "deletedAt") for table in TASK_TABLES]
+    },
+    {
+        # Sorted lists of open or done tasks (STATUS_SORT_INDEXES); partial like the other list
+        # indexes on SQLite. Level is sorted on an expression no column index serves; see version 13.
+        "sqlite": [f"CREATE INDEX {name} ON {table} ({columns}) WHERE deletedAt IS NULL"
+                   for table, name, columns in STATUS_SORT_INDEXES],
+        "mysql": [mysql_add_index(table, name, columns) for table, name, columns in STATUS_SORT_INDEXES]
+    },
+    {
+        # The alltasks view: nothing reads it, every list goes through queries.py, and it would
+        # also show the trash
+        "sqlite": ["DROP VIEW IF EXISTS alltasks"],
+        "mysql": [mysql_drop_view("alltasks")]
+    },
+    {
+        # The level order as a column (LEVEL_RANK), generated rather than stored, and the indexes
+        # the level order and filtered lists of one status are read through (RANK_SORT_INDEXES)
+        "sqlite": [f"ALTER TABLE projects ADD COLUMN levelRank INTEGER GENERATED ALWAYS AS ({LEVEL_RANK}) VIRTUAL"] + [
+            f"CREATE INDEX {name} ON {table} ({columns}) WHERE deletedAt IS NULL" for table, name, columns in RANK_SORT_INDEXES
+        ],
+        "mysql": [mysql_add_column("projects", "levelRank", f"TINYINT AS ({LEVEL_RANK}) VIRTUAL")] + [
+            mysql_add_index(table, name, columns) for table, name, columns in RANK_SORT_INDEXES
+        ]
+    }
+]
+
+
+# --- Runner ---
+def schema_version(cursor, backend):
+    if backend == "sqlite":
+        cursor.execute("PRAGMA user_version")
+        return cursor.fetchone()[0]
+    cursor.execute("CREATE TABLE IF NOT EXISTS schemaVersion (version INT NOT NULL)")
+    cursor.execute("SELECT MAX(version) FROM schemaVersion")
+    return cursor.fetchone()[0] or 0
+
+def set_schema_version(cursor, backend, version):
+    if backend == "sqlite":
+        cursor.execute(f"PRAGMA user_version = {version}")
+    else:
+        cursor.execute("INSERT INTO schemaVersion (version) VALUES (%s)", (version,))
+
+def migrate(conn, backend):
+    """ Bring the database behind conn up to the latest version; returns the versions applied """
+    # Buffered on MySQL so a statement can follow a fetchone
+    cursor = conn.cursor(buffered=True) if backend == "mysql" else conn.cursor()
+    try:
+        version = schema_version(cursor, backend)
+        applied = []
+        for number, steps in enumerate(MIGRATIONS[version:], start=version + 1):
+            if backend == "sqlite":
+                conn.execute("BEGIN")
+            try:
+                for step in steps[backend]:
+                    if callable(step):
+                        step(cursor)
+                    else:
+                        cursor.execute(step)
+                set_schema_version(cursor, backend, number)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append(number)
+        return applied
+    finally:
+        cursor.close()
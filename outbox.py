@@ -0,0 +1,226 @@
+""" Local write-ahead log of task edits.
+
+Adds, updates and deletes from the dialogs are appended to a small SQLite file next to the app
+and answered straight away with a provisional record. drain() applies them to the database in
+order, in batched transactions, and hands back the stored records. An edit stays in the log
+until its batch commits, so nothing is lost while the database is unreachable.
+"""
+import threading
+import sqlite3
+import json
+import uuid
+import time
+import os
+from dataclasses import replace
+import logic
+
+OUTBOX_PATH = os.getenv("TODO_OUTBOX_PATH", "outbox.db")
+
+# DB-API errors that will fail the same way on every retry
+PERMANENT_ERRORS = {"IntegrityError", "DataError", "ProgrammingError", "NotSupportedError"}
+
+
+class Outbox:
+    """ Append-only queue of edits, read back in the order they were made """
+    def __init__(self, path=None):
+        self.path = path or OUTBOX_PATH
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            # One connection shared by the GUI and the sync worker, serialised by the lock
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # An edit the user has been told about must survive a crash
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS ops (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                opKey TEXT NOT NULL UNIQUE,
+                op TEXT NOT NULL,
+                taskType TEXT NOT NULL,
+                taskID INTEGER,
+                payload TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lastError TEXT,
+                parked INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL
+            )""")
+            # Real ids of provisional rows, for edits queued against them before they synced
+            conn.execute("CREATE TABLE IF NOT EXISTS provisional (id INTEGER PRIMARY KEY, taskID INTEGER NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    def append(self, op, task_type, task_id=None, values=None):
+        """ Queue an edit; returns its sequence number """
+        with self._lock:
+            cursor = self._connection().execute(
+                "INSERT INTO ops (opKey, op, taskType, taskID, payload, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (uuid.uuid4().hex, op, task_type, task_id, json.dumps(values), time.time()))
+            return cursor.lastrowid
+
+    def pending(self, limit):
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT seq, opKey, op, taskType, taskID, payload FROM ops WHERE parked = 0 ORDER BY seq LIMIT ?",
+                (limit,)).fetchall()
+        return [(seq, key, op, task_type, task_id, json.loads(payload)) for seq, key, op, task_type, task_id, payload in rows]
+
+    def count(self):
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM ops WHERE parked = 0").fetchone()[0]
+
+    def parked(self):
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM ops WHERE parked = 1").fetchone()[0]
+
+    def resolve(self, provisional):
+        with self._lock:
+            row = self._connection().execute("SELECT taskID FROM provisional WHERE id = ?", (-provisional,)).fetchone()
+        return row[0] if row else None
+
+    def complete(self, ops, ids):
+        """ Drop edits that reached the database and remember the ids their adds were given """
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany("INSERT OR REPLACE INTO provisional (id, taskID) VALUES (?, ?)",
+                                 [(op[0], task_id) for op, task_id in zip(ops, ids) if op[2] == "add"])
+                conn.executemany("DELETE FROM ops WHERE seq = ?", [(op[0],) for op in ops])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def failed(self, ops, error, park=False):
+        with self._lock:
+            self._connection().executemany(
+                "UPDATE ops SET attempts = attempts + 1, lastError = ?, parked = ? WHERE seq = ?",
+                [(error, int(park), op[0]) for op in ops])
+
+
+outbox = Outbox()
+
+
+# --- Queueing; each returns the record to show until the edit has synced ---
+def provisional_record(task_type, task_id, values):
+    return replace(logic.values_record(task_type, task_id, values), syncing=True)
+
+def add_task(task_type, values):
+    seq = outbox.append("add", task_type, values=list(values))
+    # Negative ids never collide with database keys and sort ahead of them
+    return provisional_record(task_type, -seq, values)
+
+def update_task(task_type, task_id, values):
+    outbox.append("update", task_type, task_id, list(values))
+    cached = logic.cache.records(task_type, [task_id]).get(task_id)
+    task = provisional_record(task_type, task_id, values)
+    if cached:
+        task = replace(task, status=cached.status)
+    if task_id > 0:
+        logic.cache.put(task)
+    return task
+
+def delete_task(task_type, task_id):
+    if task_type not in logic.TASK_TABLES:
+        raise ValueError(f"Unknown task type: {task_type}")
+    outbox.append("delete", task_type, task_id)
+    if task_id > 0:
+        logic.cache.remove(task_type, task_id)
+
+
+def by_type(tasks):
+    grouped = {}
+    for task in tasks:
+        grouped.setdefault(task.task_type, []).append(task)
+    return grouped.items()
+
+def update_tasks(tasks, column, value):
+    """ Set one column on many tasks, queued as one edit per category """
+    groups = by_type(tasks)
+    for task_type, group in groups:
+        if column not in logic.BULK_COLUMNS[task_type]:
+            raise ValueError(f"{column} cannot be bulk edited on {task_type} tasks")
+    updated = []
+    for task_type, group in groups:
+        field = logic.BULK_COLUMNS[task_type][column]
+        outbox.append("update_many", task_type, values={"ids": [task.task_id for task in group],
+                                                        "column": column, "value": value})
+        for task in group:
+            task = replace(task, syncing=True, **{field: value})
+            if task.task_id > 0:
+                logic.cache.put(task)
+            updated.append(task)
+    return updated
+
+def delete_tasks(tasks):
+    for task_type, group in by_type(tasks):
+        if task_type not in logic.TASK_TABLES:
+            raise ValueError(f"Unknown task type: {task_type}")
+        outbox.append("delete_many", task_type, values={"ids": [task.task_id for task in group]})
+        for task in group:
+            if task.task_id > 0:
+                logic.cache.remove(task_type, task.task_id)
+
+def restore_tasks(tasks):
+    """ Take deleted tasks back out of the trash, queued as one edit per category """
+    restored = []
+    for task_type, group in by_type(tasks):
+        if task_type not in logic.TASK_TABLES:
+            raise ValueError(f"Unknown task type: {task_type}")
+        outbox.append("restore_many", task_type, values={"ids": [task.task_id for task in group]})
+        for task in group:
+            task = replace(task, syncing=True)
+            if task.task_id > 0:
+                logic.cache.put(task)
+            restored.append(task)
+    return restored
+
+
+# --- Syncing ---
+def drain(batch_size=100):
+    """ Apply the oldest queued edits in one transaction.
+
+    Returns (task_type, shown id, record) for each row the edits touched, where the shown id is
+    the one the edit was queued with and the record is what the database now holds (None once deleted). Errors
+    that a retry could fix, such as a lost connection, are raised and the edits stay queued.
+    """
+    ops = outbox.pending(batch_size)
+    if not ops:
+        return []
+    try:
+        ids = logic.apply_ops([(key, op, task_type, task_id, values, -seq)
+                               for seq, key, op, task_type, task_id, values in ops], outbox.resolve)
+    except Exception as e:
+        permanent = type(e).__name__ in PERMANENT_ERRORS
+        if permanent and len(ops) > 1:
+            # Apply them one at a time so only the edit at fault is set aside
+            return [result for _ in ops for result in drain(1)]
+        outbox.failed(ops, str(e), park=permanent)
+        if not permanent:
+            raise
+        # Put the rows back the way the database has them
+        shown = shown_ids(ops[0])
+        return synced(ops[0][3], shown, [outbox.resolve(i) if i is not None and i < 0 else i for i in shown])
+
+    outbox.complete(ops, ids)
+    results = []
+    for op, real in zip(ops, ids):
+        results += synced(op[3], shown_ids(op), real if isinstance(real, list) else [real])
+    if not outbox.count():
+        logic.prune_applied_ops()
+    return results
+
+def shown_ids(op):
+    """ The ids the view shows for the rows an edit touches """
+    seq, key, kind, task_type, task_id, values = op
+    if kind == "add":
+        return [-seq]
+    if kind in ("update_many", "delete_many", "restore_many"):
+        return values["ids"]
+    return [task_id]
+
+def synced(task_type, shown, real):
+    records = logic.saved_tasks(task_type, [i for i in real if i])
+    return [(task_type, s, records.get(r)) for s, r in zip(shown, real)]
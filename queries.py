@@ -0,0 +1,263 @@
+""" Every statement the app sends to the task database, by name.
+
+Statements are written with %s placeholders and explicit column lists. storage.Storage runs them
+as server-side prepared statements on MySQL and through each connection's statement cache on
+SQLite, so a statement is parsed once per connection rather than on every call. Statements whose
+text depends on the call, such as IN lists or pages over several categories, are built by the
+functions below from the same pieces; each shape is then prepared once like a named one.
+"""
+from migrations import SEARCH_TABLES
+
+TASK_TYPES = ["campus", "project", "learning", "general"]
+
+# Table and primary key of each category, used for keyset paging
+TASK_TABLES = {
+    "campus": ("campus", "assignmentID"),
+    "project": ("projects", "projectID"),
+    "learning": ("learn", "techID"),
+    "general": ("generalTask", "taskID")
+}
+
+# Columns written by the add_* functions, in the order they take them
+TASK_COLUMNS = {
+    "campus": ["name", "module", "dueDate", "descr"],
+    "project": ["name", "techStack", "descr", "level"],
+    "learning": ["name", "lang", "descr"],
+    "general": ["name", "descr"]
+}
+
+# Columns transfer.py exports and imports: those of add_*, then the status
+TRANSFER_COLUMNS = {task_type: columns + ["status"] for task_type, columns in TASK_COLUMNS.items()}
+
+PROJECT_LEVELS = ["Easy", "Intermediate", "Difficult"]
+
+# Every category is read into the same columns: taskType, taskID, name, detail, extra, descr, status
+ROW_COLUMNS = "taskType, taskID, name, detail, extra, descr, status"
+
+# Columns of each category read as detail and extra
+ROW_DETAILS = {
+    "campus": ("module", "dueDate"),
+    "project": ("techStack", "level"),
+    "learning": ("lang", "NULL"),
+    "general": ("NULL", "NULL")
+}
+
+def task_select(task_type, *columns):
+    """ SELECT of a category's rows as ROW_COLUMNS, then any further columns """
+    table, key = TASK_TABLES[task_type]
+    detail, extra = ROW_DETAILS[task_type]
+    return (f"SELECT '{task_type}' AS taskType, {key} AS taskID, name, {detail} AS detail, {extra} AS extra, "
+            f"{', '.join(('descr', 'status') + columns)} FROM {table}")
+
+TASK_SELECTS = {task_type: task_select(task_type) for task_type in TASK_TYPES}
+
+# Deleted rows keep their deletedAt time until purged; all other statements only see live rows
+LIVE = "deletedAt IS NULL"
+
+def live(task_type, *conditions):
+    """ TASK_SELECTS of a category narrowed to live rows and conditions """
+    return f"{TASK_SELECTS[task_type]} WHERE {' AND '.join((LIVE,) + conditions)}"
+
+# Search categories in the order of SEARCH_TABLES; the SQLite index numbers rows by it
+SEARCH_TYPES = ["campus", "project", "learning", "general"]
+
+
+def marks(count):
+    return ", ".join(["%s"] * count)
+
+def mysql_search(status=False):
+    """ Best matches among live tasks of every category, of one status when status is set.
+
+    Parameters: for each branch the query twice, then the status (when status is set); then the limit.
+    """
+    # Every branch matches the same boolean query twice, once to filter and once to score
+    branches = []
+    for order, (table, key, detail) in enumerate(SEARCH_TABLES):
+        columns = f"name, descr, {detail}" if detail else "name, descr"
+        match = f"MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)"
+        conditions = [match, LIVE] + (["status = %s"] if status else [])
+        branches.append(f"SELECT '{SEARCH_TYPES[order]}' AS taskType, {key} AS taskID, {match} AS score "
+                        f"FROM {table} WHERE {' AND '.join(conditions)}")
+    return f"SELECT taskType, taskID FROM ({' UNION ALL '.join(branches)}) AS s ORDER BY score DESC LIMIT %s"
+
+def sqlite_search(status=False):
+    """ Rowids of the best tasksearch matches among live tasks, of one status when status is set.
+
+    Parameters: the query, then the status once per category (when status is set), then the limit.
+    """
+    # Deleted tasks keep their tasksearch row until purged, so the rowid, which packs the key and
+    # the category, is checked against its table's primary key
+    conditions = " AND ".join([LIVE] + (["status = %s"] if status else []))
+    rows = " ".join(f"WHEN {order} THEN EXISTS (SELECT 1 FROM {table} WHERE {key} = tasksearch.rowid / 4 "
+                    f"AND {conditions})" for order, (table, key, detail) in enumerate(SEARCH_TABLES))
+    return (f"SELECT rowid FROM tasksearch WHERE tasksearch MATCH %s AND CASE tasksearch.rowid % 4 {rows} END "
+            f"ORDER BY bm25(tasksearch, 10.0, 1.0, 3.0) LIMIT %s")
+
+SQL = {
+    "tasks.all": " UNION ALL ".join(live(t) for t in TASK_TYPES),
+    "modules.all": "SELECT module FROM modules",
+    # INSERT IGNORE or INSERT OR IGNORE, see Storage.insert_ignore
+    "modules.add": "{insert_ignore} INTO modules (module) VALUES (%s)",
+    "learning.langs": f"SELECT DISTINCT lang FROM learn WHERE {LIVE} AND lang IS NOT NULL ORDER BY lang",
+    "search.mysql": mysql_search(),
+    "search.mysql.status": mysql_search(status=True),
+    "search.sqlite": sqlite_search(),
+    "search.sqlite.status": sqlite_search(status=True),
+    "ops.applied": "SELECT taskID FROM appliedOps WHERE opKey = %s",
+    "ops.record": "INSERT INTO appliedOps (opKey, taskID, appliedAt) VALUES (%s, %s, %s)",
+    "ops.prune": "DELETE FROM appliedOps WHERE appliedAt < %s",
+    "changes.versions": "SELECT MIN(version), MAX(version) FROM changeLog",
+    "changes.since": "SELECT version, taskType, taskID FROM changeLog WHERE version > %s ORDER BY version LIMIT %s",
+    "changes.prune": "DELETE FROM changeLog WHERE version <= %s"
+}
+
+def task_statements(task_type):
+    """ <type>.all, .get, .insert, .import, .update, .delete, .export and .expired of a category """
+    table, key = TASK_TABLES[task_type]
+    columns = TASK_COLUMNS[task_type]
+    transferred = TRANSFER_COLUMNS[task_type]
+    return {
+        f"{task_type}.all": live(task_type),
+        f"{task_type}.get": live(task_type, f"{key} = %s"),
+        f"{task_type}.insert": f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks(len(columns))})",
+        f"{task_type}.import": f"INSERT INTO {table} ({', '.join(transferred)}) VALUES ({marks(len(transferred))})",
+        f"{task_type}.update": f"UPDATE {table} SET {', '.join(f'{column} = %s' for column in columns)} "
+                               f"WHERE {key} = %s AND {LIVE}",
+        # Moves the row to the trash at the given time
+        f"{task_type}.delete": f"UPDATE {table} SET deletedAt = %s WHERE {key} = %s AND {LIVE}",
+        f"{task_type}.export": f"SELECT {', '.join(transferred)} FROM {table} WHERE {LIVE} ORDER BY {key}",
+        # Oldest ids deleted before a time, for purge
+        f"{task_type}.expired": f"SELECT {key} FROM {table} WHERE deletedAt < %s ORDER BY deletedAt LIMIT %s"
+    }
+
+for task_type in TASK_TYPES:
+    SQL.update(task_statements(task_type))
+
+
+# --- Sorted and filtered lists of one category ---
+# Orders a category can be listed in, as the SQL it is sorted on. The primary key follows, so each
+# order is total and pages continue after the (value, id) of the last row read. NULL values come
+# first on both backends.
+SORTS = {
+    "campus": {"dueDate": "dueDate", "module": "module", "name": "name"},
+    # Generated from level in PROJECT_LEVELS order (migrations.LEVEL_RANK)
+    "project": {"level": "levelRank", "name": "name"},
+    "learning": {"lang": "lang", "name": "name"},
+    "general": {"name": "name"}
+}
+
+# Columns a category's list can be narrowed to one value of
+FILTERS = {
+    "campus": ["module"],
+    "project": ["level"],
+    "learning": ["lang"],
+    "general": []
+}
+
+
+# --- Statements shaped by the call ---
+def get_many(task_type, count):
+    """ Rows of a category by a list of count ids """
+    return live(task_type, f"{TASK_TABLES[task_type][1]} IN ({marks(count)})")
+
+def page(task_types, index, status=False):
+    """ The next page across task_types[index:], one limited branch per category.
+
+    Parameters: for each branch the status (when status is set), the id to continue after (first
+    branch only) and its limit, then the overall limit.
+    """
+    branches = []
+    for order in range(index, len(task_types)):
+        task_type = task_types[order]
+        key = TASK_TABLES[task_type][1]
+        conditions = []
+        if status:
+            conditions.append("status = %s")
+        if order == index:
+            conditions.append(f"{key} > %s")
+        branches.append(f"SELECT {ROW_COLUMNS} FROM ({live(task_type, *conditions)} ORDER BY {key} LIMIT %s) AS b{order}")
+    orders = " ".join(f"WHEN '{t}' THEN {i}" for i, t in enumerate(task_types))
+    return (f"SELECT {ROW_COLUMNS} FROM ({' UNION ALL '.join(branches)}) AS t "
+            f"ORDER BY CASE taskType {orders} END, taskID LIMIT %s")
+
+def agenda(start=False, end=False, module=False):
+    """ Campus tasks of a due date range, earliest first, read on the dueDate or (module, dueDate) index.
+
+    Parameters: the module, start and end, each only when set. Only a module's whole list, with
+    neither start nor end, holds undated tasks; both backends return them first, and the cache's
+    agenda index sorts them last.
+    """
+    conditions = []
+    if module:
+        conditions.append("module = %s")
+    elif not (start or end):
+        conditions.append("dueDate IS NOT NULL")
+    if start:
+        conditions.append("dueDate >= %s")
+    if end:
+        conditions.append("dueDate < %s")
+    return f"{live('campus', *conditions)} ORDER BY dueDate, assignmentID"
+
+def bulk_delete(task_type, count):
+    """ Move count ids to the trash at the given time """
+    table, key = TASK_TABLES[task_type]
+    return f"UPDATE {table} SET deletedAt = %s WHERE {key} IN ({marks(count)}) AND {LIVE}"
+
+def bulk_restore(task_type, count):
+    table, key = TASK_TABLES[task_type]
+    return f"UPDATE {table} SET deletedAt = NULL WHERE {key} IN ({marks(count)})"
+
+def bulk_update(task_type, column, count):
+    """ Set column, which the caller has checked against BULK_COLUMNS, on count ids """
+    table, key = TASK_TABLES[task_type]
+    return f"UPDATE {table} SET {column} = %s WHERE {key} IN ({marks(count)}) AND {LIVE}"
+
+def purge(task_type, count):
+    """ Remove count ids for good, if they are still in the trash since before the given time """
+    table, key = TASK_TABLES[task_type]
+    return f"DELETE FROM {table} WHERE {key} IN ({marks(count)}) AND deletedAt < %s"
+
+def trash(task_types, after=None):
+    """ Deleted rows of task_types, most recently deleted first, then in category order and newest
+    id first; ROW_COLUMNS then deletedAt.
+
+    after is None on the first page, otherwise the index into task_types of the last row read:
+    the branch of its category continues after that row's (deletedAt, id), earlier categories
+    after its deletedAt and later ones from it. Each branch reads at most the limit from its
+    deletedAt index. Parameters: for each branch the deletedAt (deletedAt, deletedAt, id in the
+    branch of after) when after is set and its limit, then the overall limit.
+    """
+    branches = []
+    for order, task_type in enumerate(task_types):
+        key = TASK_TABLES[task_type][1]
+        conditions = ["deletedAt IS NOT NULL"]
+        if after is not None:
+            # The first half is a plain range, so the index seeks to the position instead of walking to it
+            conditions.append("deletedAt < %s" if order < after else "deletedAt <= %s" if order > after else
+                              f"deletedAt <= %s AND (deletedAt < %s OR {key} < %s)")
+        branches.append(f"SELECT {ROW_COLUMNS}, deletedAt FROM ({task_select(task_type, 'deletedAt')} "
+                        f"WHERE {' AND '.join(conditions)} ORDER BY deletedAt DESC, {key} DESC LIMIT %s) AS b{order}")
+    orders = " ".join(f"WHEN '{t}' THEN {i}" for i, t in enumerate(task_types))
+    return (f"SELECT {ROW_COLUMNS}, deletedAt FROM ({' UNION ALL '.join(branches)}) AS t "
+            f"ORDER BY deletedAt DESC, CASE taskType {orders} END, taskID DESC LIMIT %s")
+
+def sorted_page(task_type, sort, filters, status=False, after=None):
+    """ The next page of one category in a SORTS order, or id order for None, narrowed to the FILTERS columns named.
+
+    after is None on the first page, "id" in id order, otherwise "null" after a row whose sort
+    value is NULL and "value" after any other. Parameters: the filter values, the status when
+    set, then id after "id" or "null", or value, value, id after "value", then the limit.
+    """
+    key = TASK_TABLES[task_type][1]
+    conditions = [f"{column} = %s" for column in filters]
+    if status:
+        conditions.append("status = %s")
+    order = SORTS[task_type][sort] if sort else None
+    if after == "id":
+        conditions.append(f"{key} > %s")
+    elif after == "null":
+        conditions.append(f"(({order} IS NULL AND {key} > %s) OR {order} IS NOT NULL)")
+    elif after == "value":
+        # The first half is a plain range, so the index seeks to the position instead of walking to it
+        conditions.append(f"{order} >= %s AND ({order} > %s OR {key} > %s)")
+    return f"{live(task_type, *conditions)} ORDER BY {f'{order}, ' if order else ''}{key} LIMIT %s"
@@ -0,0 +1,109 @@
+""" Task records, one slotted class per category.
+
+Every query reads a category into the same columns (taskType, taskID, name, detail, extra, descr,
+status; see queries.TASK_SELECTS) and READERS turns such a row into the record of its category: the
+fields a category class declares itself are read, in order, from the detail and extra columns.
+One record is shared by the cache, the list model and the outbox, so records are never changed
+in place; an edit makes a new one with dataclasses.replace().
+"""
+from dataclasses import dataclass, fields
+from typing import ClassVar, Optional
+import sys
+
+# Table column behind each record field, as named in TASK_COLUMNS and the import files
+COLUMNS = {
+    "name": "name",
+    "description": "descr",
+    "module": "module",
+    "due_date": "dueDate",
+    "tech_stack": "techStack",
+    "level": "level",
+    "lang": "lang"
+}
+FIELDS = {column: field for field, column in COLUMNS.items()}
+
+
+@dataclass(slots=True)
+class Task:
+    task_type: ClassVar[str] = None
+
+    task_id: int
+    name: str
+    description: Optional[str] = None
+    status: str = "pending"
+    # Saved locally, not yet in the database
+    syncing: bool = False
+
+    @property
+    def key(self):
+        return self.task_type, self.task_id
+
+    def columns(self):
+        """ The record's values by table column """
+        return {COLUMNS[field.name]: getattr(self, field.name) for field in fields(self) if field.name in COLUMNS}
+
+    def as_dict(self):
+        """ The stored fields by name, for JSON """
+        return {"task_type": self.task_type,
+                **{field.name: getattr(self, field.name) for field in fields(self) if field.name != "syncing"}}
+
+
+@dataclass(slots=True)
+class CampusTask(Task):
+    task_type: ClassVar[str] = "campus"
+
+    module: Optional[str] = None
+    # ISO date
+    due_date: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ProjectTask(Task):
+    task_type: ClassVar[str] = "project"
+
+    tech_stack: Optional[str] = None
+    level: Optional[str] = None
+
+
+@dataclass(slots=True)
+class LearningTask(Task):
+    task_type: ClassVar[str] = "learning"
+
+    lang: Optional[str] = None
+
+
+@dataclass(slots=True)
+class GeneralTask(Task):
+    task_type: ClassVar[str] = "general"
+
+
+RECORD_TYPES = {cls.task_type: cls for cls in (CampusTask, ProjectTask, LearningTask, GeneralTask)}
+
+
+def shared(value):
+    # Modules, languages, levels and dates repeat across thousands of rows; keep one copy of each
+    return sys.intern(value) if type(value) is str else value
+
+def row_reader(cls):
+    """ Build cls from the columns of a row, positionally since this runs once per row read """
+    own = len(fields(cls)) - len(fields(Task))
+    if own == 2:
+        return lambda task_id, name, detail, extra, descr, status: \
+            cls(task_id, name, descr, sys.intern(status), False, shared(detail), shared(extra))
+    if own == 1:
+        return lambda task_id, name, detail, extra, descr, status: \
+            cls(task_id, name, descr, sys.intern(status), False, shared(detail))
+    return lambda task_id, name, detail, extra, descr, status: cls(task_id, name, descr, sys.intern(status))
+
+# Called with a row's columns after taskType
+READERS = {task_type: row_reader(cls) for task_type, cls in RECORD_TYPES.items()}
+
+def from_columns(task_type, task_id, values, status="pending"):
+    """ The record of a row holding these values, by table column """
+    return RECORD_TYPES[task_type](task_id=task_id, status=status, **{FIELDS[column]: value for column, value in values.items()})
+
+def as_dict(task):
+    """ json.dumps default for records """
+    if isinstance(task, Task):
+        return task.as_dict()
+    raise TypeError(f"{type(task).__name__} is not JSON serializable")
@@ -0,0 +1,129 @@
+# Resource object code (Python 3)
+# Created by: object code
+# Created by: The Resource Compiler for Qt version 6.8.1
+# WARNING! All changes made in this file will be lost!
+
+from PySide6 import QtCore
+
+qt_resource_data = b"\
+\x00\x00\x02\xd4\
+\x89\
+PNG\x0d\x0a\x1a\x0a\x00\x00\x00\x0dIHDR\x00\
+\x00\x00\x10\x00\x00\x00\x10\x08\x06\x00\x00\x00\x1f\xf3\xffa\
+\x00\x00\x00\x04sBIT\x08\x08\x08\x08|\x08d\x88\
+\x00\x00\x00\x09pHYs\x00\x00\x00o\x00\x00\x00o\
+\x01\xf1\xa2\xdcC\x00\x00\x00\x19tEXtSof\
+tware\x00www.inksca\
+pe.org\x9b\xee<\x1a\x00\x00\x02QID\
+AT8\x8dm\x92OH\x14Q\x1c\xc7?o\xe6\xed\
+\xec\xee\xec\xaa!\xba\xbb\x19\xb1E\xa8H\xf9\xe7d\xb1\
+\x22JIt\xb1N\xea-\xea\xd0\xc5\xa8K D]\
+#\xe8\x22\xe8\xa1\x83\xf7 %\x02O\x12HV\xdb\xa1\
+ /J\x16{\xd00t\xd50V\x9d\xdc\xd1\x99y\
+\x1d\x5cgw\xd5\xef\xed\xbd\xdf\xfb~\xf8\xbe\xef{B\
+)\xc5\xa5\xfb3\x89\xe5\xd5\xdcp\xac:\xf2b}\xd3\
+\xbac\x06\xe5;\x85\xd6\xaa\xeb\xde\xb6\xd4\xf5\xad\xdd\xfc\
+~SUex*3\xd63\xc3\x11\x89/Y\xfbY\
+v\xe3\xdf\xd0\xd3\x97\xb3\xf2\xc1@\x13\x13\xd3Kt\xb6\
+\xc5\x99_\xcaa\x86%\x91p\x80\xc5\xdf[\x5cn\x89\
+\x93j\x8b\xfd\xe99\x1b\x8e\x03\xde!@\x0axTY\
+a\xc8TK\x8cD\x8dIk}5\xc9\xd3Q\xf2\x9e\
+\x22\x18\x94\x84\x83\x12#\xa0Q\x173q<jfV\
+v\xfb\xba\xeb\xc2\xaf\xfd\x04_\xb3\xb6:\x1a\x0b\xe0\xaf\
+\xed\xe2\x9d0\x09\xe9\xe2^\xf7`k\x1a\xbc8\x93\x99\
+\x0f\xf2p\xf0c\xdb\xc1r\x8a\x8e\xefY\x81S\x08j\
+\xe8p\xe3\x9c\x00\xa0e\xf8n\xbf'\x18\xc3\x15\xa8\xce\
+\xe4g\x09\xe0*\x98^\xdb+\x03\xfc\x5c\x0c\xe1\xb8\x07\
+&]S\xb4'\x14\xa9\xb5QNU.t\xe3*X\
+\xb7\x10\x9e\xba\x22\x01t\x01\xcdU\x12\xcb-\x02T\xad\
+\xe7\x03\x00\xea2\xa3$\xadqh\xd4\x02\xe8\xa0\xdex\
+\x0830+\x01<\x05\xeb\xb6W\x96`\xc3\xd2\xd9/\
+\x00\x1ej#t\x89qP\x0a,\x0bb\x1e\xf4V\xac\
+\x88O\xc6U\xed\xa4\x02K5\x14\x18a\xa0\xd4\xec\xba\
+ eVk6\x1ay?\xbf#\x014\x01\xb1\xa0\x86\
+%\x8b\x09j#\x8a\xdb\xf6(\xbdN\xb9\xd95\xa2[\
+2\xe2\xd4\xd37\xbf\x03\xe0\x978\x97+\x7f\x85\x9b\xee\
+\xd41\xb3m\xc6\xf9\xd6\xfe\xeaIGCr\xe7\xf0\x9c\
+_\xe2\xb5\xb8Q\x06\xe8\x8f\x0b\xd8\xbc\x0e\x0bo}s\
+:5\x894\x22\xf9\xd2+\xfa\x09\xc6\x97\xf3l\xed\x1f\
+\x00.\x86r\x04\x13\x80\x1e\x86\x86[\xd8\xbf\xd2\xa4S\
+\x938\xba\x89\xa4\x5c~\x82\xc1\x0b&\xf9\xc2\xd7kv\
+2\xb0\x99\xc1\xd6+\xc8E\xcf3\xd7\xf1\x18G\x0b\x9e\
+X\xb2\x04\xf2@\xa8&X|\x10\xcbm\xe0c\xa0\x9e\
+]\xccc\x06!\xb4\x5c\xe9ZC\xf0\xbc\x00\xf1\xb5\xa7\
+G\xb1\xc5q\xb3\xd4X\xed:cL\x94\xee\xfd\x07\xac\
+\xb7\xf6\x14\xe3\xd2_\x02\x00\x00\x00\x00IEND\xae\
+B`\x82\
+\x00\x00\x02\x99\
+Q\
+MainWindow{\x0a    \
+background-color\
+:#DDE6ED ;\x0a    c\
+olor: black;\x0a}\x0a\x0a\
+QListView#taskVi\
+ew {\x0a    backgro\
+und-color: #9DB2\
+BF;\x0a    border-r\
+adius: 10px;\x0a   \
+ padding: 10px;\x0a\
+    border: 2px \
+solid #ccc;\x0a    \
+color: black;\x0a}\x0a\
+\x0aQLabel {\x0a    co\
+lor: black;\x0a    \
+font-size: 16px;\
+\x0a    font-weight\
+: 580;\x0a}\x0a\x0aQPushB\
+utton {\x0a    back\
+ground-color: wh\
+ite;\x0a    border:\
+ 1px solid #ccc;\
+\x0a    border-radi\
+us: 6px;\x0a    pad\
+ding: 8px;\x0a    f\
+ont-size: 14px;\x0a\
+    text-align: \
+left;\x0a    color:\
+ #333;\x0a}\x0a\x0aQPushB\
+utton:hover {\x0a  \
+  background-col\
+or: #d7d0d0;\x0a}\x0a\x0a\
+QListWidget {\x0a  \
+  width: 200px;\x0a\
+    background-c\
+olor: #0F4C75;\x0a \
+   color: white;\
+\x0a    border: 1px\
+ solid #666e7b;\x0a\
+    padding: 5px\
+;\x0a    font-size:\
+ 16px;\x0a}\
+"
+
+qt_resource_name = b"\
+\x00\x0b\
+\x06\x9d\x82\xc7\
+\x00n\
+\x00o\x00t\x00e\x00p\x00a\x00d\x00.\x00p\x00n\x00g\
+\x00\x0a\
+\x02\xcd\x12\xa3\
+\x00s\
+\x00t\x00y\x00l\x00e\x00s\x00.\x00c\x00s\x00s\
+"
+
+qt_resource_struct = b"\
+\x00\x00\x00\x00\x00\x02\x00\x00\x00\x02\x00\x00\x00\x01\
+\x00\x00\x00\x00\x00\x00\x00\x00\
+\x00\x00\x00\x1c\x00\x00\x00\x00\x00\x01\x00\x00\x02\xd8\
+\x00\x00\x01\xa1N\xf1\xe2\xcf\
+\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x00\x00\
+\x00\x00\x01\x97@\x85\xef\xe8\
+"
+
+def qInitResources():
+    QtCore.qRegisterResourceData(0x03, qt_resource_struct, qt_resource_name, qt_resource_data)
+
+def qCleanupResources():
+    QtCore.qUnregisterResourceData(0x03, qt_resource_struct, qt_resource_name, qt_resource_data)
+
+qInitResources()
@@ -0,0 +1,251 @@
+""" Task operations without the GUI.
+
+Everything a client does with tasks goes through here: paged, searched and agenda reads, direct
+writes for scripts and the HTTP API (api.py), and the queued writes of the desktop client, which
+reach the database through the outbox. Fields are validated the same way on both paths.
+"""
+from datetime import date
+from records import Task
+import changes
+import queries
+import outbox
+import logic
+import trash
+
+TASK_TYPES = logic.TASK_TYPES
+TASK_STATUSES = logic.TASK_STATUSES
+PROJECT_LEVELS = logic.PROJECT_LEVELS
+
+# Writable fields of each category, named as in the import/export files
+FIELDS = logic.TASK_COLUMNS
+
+# Orders and single-value filters each category can be listed with, besides id order
+SORTS = {task_type: list(sorts) for task_type, sorts in queries.SORTS.items()}
+FILTERS = queries.FILTERS
+
+
+class ValidationError(ValueError):
+    pass
+
+
+class NotFound(LookupError):
+    pass
+
+
+def connect():
+    logic.connect()
+    changes.feed.start()
+
+
+# --- Validation ---
+def check_type(task_type):
+    if task_type not in TASK_TYPES:
+        raise NotFound(f"Unknown task type: {task_type}")
+
+def task_values(task_type, fields, current=None, queued=False):
+    """ Column values, in FIELDS order, of a task with these fields; missing ones are taken from current.
+
+    Queued edits are checked without touching the database: a module is looked up in the list as last
+    read, and with none read yet it is left to the foreign key when the edit syncs.
+    """
+    check_type(task_type)
+    if not isinstance(fields, dict):
+        raise ValidationError("Expected an object of task fields")
+    unknown = set(fields) - set(FIELDS[task_type]) - {"status"}
+    if unknown:
+        raise ValidationError(f"Unknown fields for {task_type} tasks: {', '.join(sorted(unknown))}")
+
+    values = current.columns() if current else {}
+    for column in FIELDS[task_type]:
+        value = fields.get(column, values.get(column))
+        if value is not None and not isinstance(value, str):
+            raise ValidationError(f"{column} must be a string")
+        values[column] = value
+
+    if not (values["name"] or "").strip():
+        raise ValidationError("A task needs a name")
+    if task_type == "campus":
+        values["module"] = values["module"] or None
+        values["dueDate"] = values["dueDate"] or None
+        if values["dueDate"]:
+            try:
+                date.fromisoformat(values["dueDate"])
+            except ValueError:
+                raise ValidationError(f"dueDate must be a date as YYYY-MM-DD, not {values['dueDate']!r}")
+        modules = logic.known_modules() if queued else logic.modules()
+        if values["module"] and modules is not None and values["module"] not in modules:
+            raise ValidationError(f"Unknown module: {values['module']}")
+    if task_type == "project" and values["level"] not in PROJECT_LEVELS:
+        raise ValidationError(f"level must be one of {', '.join(PROJECT_LEVELS)}")
+    if "status" in fields and fields["status"] not in TASK_STATUSES:
+        raise ValidationError(f"status must be one of {', '.join(TASK_STATUSES)}")
+    return tuple(values[column] for column in FIELDS[task_type])
+
+def check_column(tasks, column, value):
+    for task in tasks:
+        check_type(task.task_type)
+        if column not in logic.BULK_COLUMNS[task.task_type]:
+            raise ValidationError(f"{column} cannot be bulk edited on {task.task_type} tasks")
+    if column == "status" and value not in TASK_STATUSES:
+        raise ValidationError(f"status must be one of {', '.join(TASK_STATUSES)}")
+    if column == "level" and value not in PROJECT_LEVELS:
+        raise ValidationError(f"level must be one of {', '.join(PROJECT_LEVELS)}")
+
+
+# --- Reads ---
+def page(task_types=TASK_TYPES, position=(0, 0), limit=100, status=None) -> list[Task]:
+    """ The tasks after position, (index into task_types, last id read), in category and id order """
+    for task_type in task_types:
+        check_type(task_type)
+    return logic.all_tasks_page(task_types, position, limit, status)
+
+def list_tasks(task_types=TASK_TYPES, after=None, limit=100, status=None):
+    """ One page and the (task_type, task_id) to continue after, None on the last page """
+    position = (0, 0)
+    if after:
+        task_type, task_id = after
+        if task_type not in task_types:
+            raise ValidationError(f"Cannot continue after a {task_type} task here")
+        position = (task_types.index(task_type), task_id)
+    tasks = page(task_types, position, limit, status)
+    last = tasks[-1] if len(tasks) == limit else None
+    return tasks, last.key if last else None
+
+def sorted_page(task_type, sort=None, filters=None, after=None, limit=100, status=None) -> list[Task]:
+    """ The tasks of one category after the sort_position after, ordered by sort (None for id order) and narrowed to filters """
+    check_type(task_type)
+    if sort is not None and sort not in SORTS[task_type]:
+        raise ValidationError(f"{task_type} tasks can be sorted by {', '.join(SORTS[task_type])}")
+    unknown = set(filters or {}) - set(FILTERS[task_type])
+    if unknown:
+        raise ValidationError(f"{task_type} tasks cannot be filtered by {', '.join(sorted(unknown))}")
+    return logic.sorted_tasks_page(task_type, sort, filters, after, limit, status)
+
+def sort_key(sort=None):
+    return logic.sort_key(sort)
+
+def sort_position(task, sort=None):
+    return logic.sort_position(task, sort)
+
+def get_task(task_type, task_id) -> Task:
+    check_type(task_type)
+    task = logic.cache.records(task_type, [task_id]).get(task_id) or logic.get_task(task_type, task_id)
+    if task is None:
+        raise NotFound(f"No {task_type} task {task_id}")
+    return task
+
+def search_tasks(text, limit=50, status=None) -> list[Task]:
+    return logic.search_tasks(text, limit, status)
+
+def agenda(view=None, start=None, end=None, module=None, status=None) -> list[Task]:
+    """ Campus tasks of a named agenda view (overdue, today, week), or due from start until before end """
+    if view:
+        try:
+            start, end = logic.agenda_range(view)
+        except ValueError as e:
+            raise NotFound(str(e))
+    return logic.due_tasks(start, end, module, status)
+
+def agenda_range(view):
+    return logic.agenda_range(view)
+
+def modules():
+    return logic.modules()
+
+def known_modules():
+    """ The module list as last read, without a query; empty if it has not been read yet """
+    return logic.known_modules() or []
+
+def languages():
+    return logic.languages()
+
+
+# --- Direct writes, applied before they return ---
+def create_task(task_type, fields) -> Task:
+    return logic.add_task(task_type, task_values(task_type, fields), fields.get("status"))
+
+def update_task(task_type, task_id, fields, partial=False) -> Task:
+    """ Replace a task's fields, or with partial only the ones given """
+    current = get_task(task_type, task_id)
+    values = task_values(task_type, fields, current if partial else None)
+    task = current
+    if not partial or set(fields) - {"status"}:
+        task = logic.update_task(task_type, task_id, values)
+    if task is not None and "status" in fields:
+        task = logic.update_tasks(task_type, [task_id], "status", fields["status"]).get(task_id)
+    if task is None:
+        raise NotFound(f"No {task_type} task {task_id}")
+    return task
+
+def delete_task(task_type, task_id):
+    """ Move a task to the trash """
+    check_type(task_type)
+    if not logic.delete_task(task_type, task_id):
+        raise NotFound(f"No {task_type} task {task_id}")
+
+def restore_task(task_type, task_id) -> Task:
+    """ Take a task back out of the trash """
+    check_type(task_type)
+    task = logic.restore_tasks(task_type, [task_id]).get(task_id)
+    if task is None:
+        raise NotFound(f"No {task_type} task {task_id} in the trash")
+    return task
+
+
+# --- Queued writes; answered with a provisional record, applied by sync() ---
+def queue_add(task_type, fields) -> Task:
+    return outbox.add_task(task_type, task_values(task_type, fields, queued=True))
+
+def queue_update(task_type, task_id, fields) -> Task:
+    return outbox.update_task(task_type, task_id, task_values(task_type, fields, queued=True))
+
+def queue_update_many(tasks, column, value) -> list[Task]:
+    check_column(tasks, column, value)
+    return outbox.update_tasks(tasks, column, value)
+
+def queue_delete(tasks):
+    for task in tasks:
+        check_type(task.task_type)
+    if len(tasks) == 1:
+        outbox.delete_task(*tasks[0].key)
+    else:
+        outbox.delete_tasks(tasks)
+
+def queue_restore(tasks) -> list[Task]:
+    """ Undo queue_delete, or restore tasks picked from the trash """
+    for task in tasks:
+        check_type(task.task_type)
+    return outbox.restore_tasks(tasks)
+
+def sync(batch_size=100):
+    """ Apply one batch of queued edits; see outbox.drain """
+    return outbox.drain(batch_size)
+
+def queued_edits():
+    return outbox.outbox.count()
+
+def rejected_edits():
+    return outbox.outbox.parked()
+
+
+# --- Trash ---
+def trash_page(after=None, limit=100):
+    """ One page of the trash, most recently deleted first, and the (task_type, task_id, deletedAt) to
+    continue after, None on the last page """
+    if after and after[0] not in TASK_TYPES:
+        raise ValidationError(f"Cannot continue after a {after[0]} task here")
+    return logic.trash_page(after, limit)
+
+def purge_trash():
+    """ Remove the tasks that have expired in the trash; see trash.purge """
+    return trash.purge()
+
+
+# --- Other clients ---
+def poll_changes():
+    """ What other clients changed since the last poll; see changes.ChangeFeed.poll """
+    return changes.feed.poll()
+
+def invalidate():
+    """ Forget cached tasks, e.g. after falling too far behind the change log """
+    logic.cache.invalidate()
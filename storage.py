@@ -0,0 +1,372 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from migrations import migrate
+from metrics import metrics, TimedCursor
+from queries import SQL, SEARCH_TYPES
+import threading
+import sqlite3
+import time
+import re
+import os
+
+BACKEND = os.getenv("TODO_BACKEND", "mysql")
+
+# Statements kept prepared per connection; the named ones in queries.SQL plus the shapes built per call
+STATEMENT_CACHE = 256
+
+
+class Storage:
+    """ Common interface of the task stores; SQL is written with %s placeholders """
+    name = None
+    # INSERT that skips rows whose key already exists
+    insert_ignore = "INSERT IGNORE"
+
+    def connection(self):
+        raise NotImplementedError
+
+    def connect(self):
+        """ Open the first connection ahead of the first query """
+        with self.connection():
+            pass
+
+    def sql(self, text):
+        return text
+
+    @contextmanager
+    def cursor(self, commit=False, stream=False):
+        # stream asks for a server-side cursor where the backend has one
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield TimedCursor(cursor, metrics)
+                if commit:
+                    conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def retrying(self, operation):
+        """ Run operation(); MySQL runs it once more on a new connection if its connection had dropped """
+        return operation()
+
+    def fetch_all(self, sql, params=()):
+        def run():
+            with self.cursor() as cursor:
+                cursor.execute(self.sql(sql), params)
+                return cursor.fetchall()
+        return self.retrying(run)
+
+    def iter_batches(self, sql, params=(), batch_size=500, stream=False):
+        """ Yield the result in lists of at most batch_size rows """
+        with self.cursor(stream=stream) as cursor:
+            cursor.execute(self.sql(sql), params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    def execute(self, sql, params=()):
+        def run():
+            with self.cursor(commit=True) as cursor:
+                cursor.execute(self.sql(sql), params)
+                return cursor.rowcount
+        return self.retrying(run)
+
+    def insert(self, sql, params=()):
+        """ Run an INSERT and return the generated primary key """
+        def run():
+            with self.cursor(commit=True) as cursor:
+                cursor.execute(self.sql(sql), params)
+                return cursor.lastrowid
+        return self.retrying(run)
+
+    def execute_batches(self, batches):
+        """ executemany each (sql, rows) batch inside a single transaction; returns the number of rows.
+
+        Not retried, since batches may be a generator already partly read.
+        """
+        count = 0
+        with self.cursor(commit=True) as cursor:
+            for sql, rows in batches:
+                cursor.executemany(self.sql(sql), rows)
+                count += len(rows)
+        return count
+
+    def search(self, text, limit=50, status=None):
+        """ (taskType, taskID) of the best full-text matches for text, best first, of one status if given """
+        raise NotImplementedError
+
+
+def search_terms(text):
+    return re.findall(r"\w+", text.lower())
+
+
+#--------------------------------------MySQL--------------------------------------#
+
+# Server gone away and lost connection: the connection is dead, the statement can be sent again
+DROPPED_ERRORS = {2006, 2013, 2055}
+
+class MySQLStorage(Storage):
+    name = "mysql"
+
+    def __init__(self, pool_size=None, pool_timeout=None, **config):
+        self.config = {
+            "host": os.getenv("MYSQL_HOST", "localhost"),
+            "user": os.getenv("MYSQL_USER", "root"),
+            "password": os.getenv("MYSQL_PASSWORD"),
+            "database": os.getenv("MYSQL_DATABASE", "todo")
+        }
+        self.config.update(config)
+        self.pool_size = pool_size or int(os.getenv("TODO_POOL_SIZE", "5"))
+        self.pool_timeout = pool_timeout or float(os.getenv("TODO_POOL_TIMEOUT", "10"))
+        # Idle connections, most recently used last, and how many are open in all
+        self._idle = []
+        self._open = 0
+        self._available = threading.Condition()
+        self._migrateLock = threading.Lock()
+        self._migrated = False
+        # Prepared cursors by server connection id, then by statement
+        self._prepared = {}
+
+    def _checkout(self):
+        """ Borrow an idle connection, or open one while fewer than pool_size are; waits otherwise.
+
+        Connections are not pinged here, which would cost a round trip per statement; one that
+        has dropped fails on use and is replaced (see retrying).
+        """
+        import mysql.connector
+        from mysql.connector.errors import PoolError
+
+        with self._available:
+            if not self._available.wait_for(lambda: self._idle or self._open < self.pool_size, self.pool_timeout):
+                raise PoolError("Failed getting connection; pool exhausted")
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+        try:
+            return mysql.connector.connect(**self.config)
+        except Exception:
+            self._checkin(None)
+            raise
+
+    def _checkin(self, conn, dropped=False):
+        stale = []
+        with self._available:
+            if conn is None:
+                self._open -= 1
+            elif dropped:
+                # The server restarted or went away, so the idle connections are most likely gone too
+                stale, self._idle = self._idle, []
+                self._open -= 1 + len(stale)
+            else:
+                self._idle.append(conn)
+            self._available.notify_all()
+        for conn in stale:
+            self.discard(conn)
+
+    def discard(self, conn):
+        from mysql.connector.errors import Error
+
+        # Statements prepared in the lost session went with it
+        self._prepared.pop(conn.connection_id, None)
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        from mysql.connector.errors import Error
+
+        conn = self._checkout()
+        dropped = False
+        try:
+            if not self._migrated:
+                with self._migrateLock:
+                    if not self._migrated:
+                        migrate(conn, self.name)
+                        self._migrated = True
+            yield conn
+        except Error as e:
+            dropped = e.errno in DROPPED_ERRORS
+            raise
+        finally:
+            if dropped:
+                self.discard(conn)
+            self._checkin(conn, dropped)
+
+    def retrying(self, operation):
+        from mysql.connector.errors import Error
+
+        try:
+            return operation()
+        except Error as e:
+            if e.errno not in DROPPED_ERRORS:
+                raise
+            return operation()
+
+    @contextmanager
+    def cursor(self, commit=False, stream=False):
+        from mysql.connector.errors import Error
+
+        with self.connection() as conn:
+            if stream:
+                # Unbuffered cursors leave the result on the server and read it as it is fetched
+                cursor = conn.cursor(buffered=False)
+            else:
+                cursor = PreparedCursor(conn, self._prepared.setdefault(conn.connection_id, OrderedDict()))
+            try:
+                yield TimedCursor(cursor, metrics)
+                if commit:
+                    conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except Error:
+                    # The connection is gone, and its transaction with it; report what failed first
+                    pass
+                raise
+            finally:
+                if stream:
+                    conn.consume_results()
+                cursor.close()
+
+
+    # --- Full-text search ---
+    def search(self, text, limit=50, status=None):
+        terms = search_terms(text)
+        if not terms:
+            return []
+        # Boolean mode: every word must match, each as a prefix so results follow what is being typed
+        against = " ".join(f"+{term}*" for term in terms)
+        if status is None:
+            return self.fetch_all(SQL["search.mysql"], [against] * (2 * len(SEARCH_TYPES)) + [limit])
+        return self.fetch_all(SQL["search.mysql.status"], [against, against, status] * len(SEARCH_TYPES) + [limit])
+
+
+class PreparedCursor:
+    """ Runs each statement on a server-side prepared cursor kept for it on the connection.
+
+    Results are read in full at execute, as buffered cursors do, so another statement can run
+    on the connection before they are fetched. The least recently used statement is closed once
+    the connection holds STATEMENT_CACHE of them. executemany goes through a plain buffered cursor
+    instead, which sends an INSERT as one multi-row statement where a prepared one runs every row.
+    """
+    def __init__(self, conn, statements):
+        self._conn = conn
+        self._statements = statements
+        self._cursor = None
+        self._plain = None
+        self._rows = []
+
+    def _prepared(self, sql):
+        entry = self._statements.get(sql)
+        if entry is None:
+            if len(self._statements) >= STATEMENT_CACHE:
+                self._statements.popitem(last=False)[1][0].close()
+            # The connector reuses a statement only when given the very same string again
+            entry = self._statements[sql] = (self._conn.cursor(prepared=True), sql)
+        else:
+            self._statements.move_to_end(sql)
+        return entry
+
+    def execute(self, sql, params=()):
+        self._cursor, sql = self._prepared(sql)
+        self._cursor.execute(sql, tuple(params))
+        self._rows = self._cursor.fetchall() if self._cursor.description else []
+
+    def executemany(self, sql, rows):
+        if self._plain is None:
+            self._plain = self._conn.cursor(buffered=True)
+        self._cursor = self._plain
+        self._cursor.executemany(sql, [tuple(row) for row in rows])
+        self._rows = []
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def close(self):
+        # The statements stay prepared for the next checkout of the connection
+        if self._plain is not None:
+            self._plain.close()
+        self._cursor = self._plain = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+#--------------------------------------SQLite--------------------------------------#
+
+class SQLiteStorage(Storage):
+    name = "sqlite"
+    insert_ignore = "INSERT OR IGNORE"
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("TODO_SQLITE_PATH", "todo.db")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._migrated = False
+
+    def sql(self, text):
+        return text.replace("%s", "?")
+
+    def _connect(self):
+        # sqlite3 keeps the compiled statement of each SQL text it has run, up to cached_statements
+        conn = sqlite3.connect(self.path, timeout=30, cached_statements=STATEMENT_CACHE)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def search(self, text, limit=50, status=None):
+        terms = search_terms(text)
+        if not terms:
+            return []
+        # Every word must match, each as a prefix so results follow what is being typed
+        match = " ".join(f'"{term}"*' for term in terms)
+        if status is None:
+            rows = self.fetch_all(SQL["search.sqlite"], (match, limit))
+        else:
+            rows = self.fetch_all(SQL["search.sqlite.status"], [match] + [status] * len(SEARCH_TYPES) + [limit])
+        return [(SEARCH_TYPES[rowid % 4], rowid // 4) for (rowid,) in rows]
+
+    @contextmanager
+    def connection(self):
+        # sqlite3 connections may not cross threads, so each thread keeps its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            with self._lock:
+                if not self._migrated:
+                    migrate(conn, self.name)
+                    self._migrated = True
+            self._local.conn = conn
+        yield conn
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage():
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = SQLiteStorage() if BACKEND == "sqlite" else MySQLStorage()
+        return _storage
+
+def set_storage(storage):
+    """ Swap the active store, e.g. to point the app at another database file """
+    global _storage
+    with _storage_lock:
+        _storage = storage
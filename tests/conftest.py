@@ -0,0 +1,67 @@
+""" Fixtures shared by the tests; every test that takes store runs once per backend.
+
+The MySQL runs need a server the MYSQL_* settings reach and are skipped without one. They use
+their own database, TODO_TEST_MYSQL_DATABASE (default todo_test), which is dropped and created
+again at the start of the session and emptied before each test.
+"""
+import os
+import pytest
+from cache import TaskCache
+import storage
+import changes
+import outbox
+import logic
+
+MYSQL_DATABASE = os.getenv("TODO_TEST_MYSQL_DATABASE", "todo_test")
+
+# Emptied before each MySQL test, children first
+MYSQL_TABLES = ["campus", "projects", "learn", "generalTask", "modules", "appliedOps", "changeLog"]
+
+
+def mysql_settings():
+    return {"host": os.getenv("MYSQL_HOST", "localhost"), "user": os.getenv("MYSQL_USER", "root"),
+            "password": os.getenv("MYSQL_PASSWORD")}
+
+def recreate_mysql_database(name):
+    """ Drop and create a database; skips the test when there is no server """
+    try:
+        import mysql.connector
+        server = mysql.connector.connect(connection_timeout=2, **mysql_settings())
+    except Exception as e:
+        pytest.skip(f"no MySQL server: {e}")
+    cursor = server.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS {name}")
+    cursor.execute(f"CREATE DATABASE {name}")
+    server.close()
+
+@pytest.fixture(scope="session")
+def mysql_storage():
+    recreate_mysql_database(MYSQL_DATABASE)
+    return storage.MySQLStorage(database=MYSQL_DATABASE)
+
+@pytest.fixture
+def mysql_conn():
+    """ A connection to an empty MySQL database of its own, for migration tests """
+    import mysql.connector
+    name = f"{MYSQL_DATABASE}_migrate"
+    recreate_mysql_database(name)
+    conn = mysql.connector.connect(database=name, **mysql_settings())
+    yield conn
+    conn.close()
+
+@pytest.fixture(params=["sqlite", "mysql"])
+def store(request, tmp_path, monkeypatch):
+    """ An empty, migrated task database as the active storage, with a fresh cache, outbox and change feed """
+    if request.param == "sqlite":
+        active = storage.SQLiteStorage(str(tmp_path / "tasks.db"))
+    else:
+        active = request.getfixturevalue("mysql_storage")
+        with active.cursor(commit=True) as cursor:
+            for table in MYSQL_TABLES:
+                cursor.execute(f"DELETE FROM {table}")
+    monkeypatch.setattr(storage, "_storage", active)
+    monkeypatch.setattr(logic, "cache", TaskCache())
+    monkeypatch.setattr(outbox, "outbox", outbox.Outbox(str(tmp_path / "outbox.db")))
+    monkeypatch.setattr(changes, "feed", changes.ChangeFeed())
+    active.connect()
+    return active
@@ -0,0 +1,70 @@
+import pytest
+import logic
+import queries
+import storage
+from cache import TaskCache
+
+RANGES = [
+    (None, None, None),
+    ("2025-06-03", "2025-06-08", None),
+    ("2025-06-03", None, None),
+    (None, "2025-06-05", None),
+    (None, None, "A"),
+    ("2025-06-03", "2025-06-08", "B"),
+    (None, "2025-06-05", "A"),
+    ("2025-06-03", None, "A"),
+]
+
+
+@pytest.fixture
+def tasks(store):
+    store.execute("INSERT INTO modules (module) VALUES (%s), (%s)", ("A", "B"))
+    added = [logic.add_campus_task(f"t{i}", "AB"[i % 2], f"2025-06-{i + 1:02d}", "d") for i in range(10)]
+    added += [logic.add_campus_task("undated", "A", None, "d")]
+    logic.update_tasks("campus", [added[4].task_id], "status", "done")
+    logic.cache.invalidate()
+    return logic.campus_tasks()
+
+def expected(tasks, start, end, module, status=None):
+    due = [t for t in tasks
+           if (module is None or t.module == module) and (module is not None or t.due_date)
+           and (start is None or (t.due_date and t.due_date >= start))
+           and (end is None or (t.due_date and t.due_date < end))
+           and (status is None or t.status == status)]
+    return sorted(due, key=lambda t: (t.due_date or "￿", t.task_id))
+
+@pytest.mark.parametrize("start, end, module", RANGES)
+@pytest.mark.parametrize("status", [None, "pending"])
+def test_due_tasks_cold(tasks, monkeypatch, start, end, module, status):
+    monkeypatch.setattr(logic, "cache", TaskCache())
+    assert logic.due_tasks(start, end, module, status) == expected(tasks, start, end, module, status)
+
+def test_due_tasks_reads_only_uncovered_ranges(tasks, monkeypatch):
+    reads = []
+    fetch = logic.fetch_records
+    monkeypatch.setattr(logic, "fetch_records", lambda sql, params=(): reads.append(params) or fetch(sql, params))
+    logic.due_tasks("2025-06-01", "2025-06-09")
+    logic.due_tasks("2025-06-02", "2025-06-05", "A")
+    assert reads == [["2025-06-01", "2025-06-09"]]
+    for start, end, module in RANGES:
+        assert logic.due_tasks(start, end, module) == expected(tasks, start, end, module)
+    # Every dated task, then module A's undated ones
+    assert reads[1:] == [[], ["A"]]
+
+def test_due_tasks_follow_writes(tasks):
+    assert logic.due_tasks(None, None, "A") == expected(tasks, None, None, "A")
+    added = logic.add_campus_task("new", "A", "2025-06-04", "d")
+    logic.update_campus_task(tasks[0].task_id, "t0", "A", "2025-06-20", "d")
+    logic.delete_task("campus", tasks[2].task_id)
+    tasks = logic.campus_tasks()
+    assert added in tasks
+    for start, end, module in RANGES:
+        assert logic.due_tasks(start, end, module) == expected(tasks, start, end, module)
+
+@pytest.mark.parametrize("module, index", [(False, "campus_dueDate"), (True, "campus_module_dueDate")])
+def test_agenda_reads_a_range_of_the_index(store, module, index):
+    if not isinstance(store, storage.SQLiteStorage):
+        pytest.skip("SQLite query plan")
+    sql = queries.agenda(True, True, module)
+    plan = "; ".join(row[3] for row in store.fetch_all("EXPLAIN QUERY PLAN " + sql, [None] * sql.count("%s")))
+    assert f"SEARCH campus USING INDEX {index}" in plan and "TEMP B-TREE" not in plan
@@ -0,0 +1,158 @@
+import asyncio
+import json
+from urllib.parse import quote
+import pytest
+import api
+import changes
+import logic
+
+
+# --- Routing and parameters, straight through respond() ---
+@pytest.mark.parametrize("method, target, status", [
+    ("GET", "/tasks", 200),
+    ("GET", "/tasks/", 200),
+    ("GET", "/tasks/general?limit=5", 200),
+    ("GET", "/tasks/search?q=x", 200),
+    ("GET", "/agenda/week", 200),
+    ("GET", "/modules", 200),
+    ("GET", "/trash", 200),
+    ("GET", "/nowhere", 404),
+    ("GET", "/tasks/general/999", 404),
+    ("GET", "/tasks/chores", 404),
+    ("PUT", "/tasks", 405),
+    ("DELETE", "/tasks/general", 405),
+    ("GET", "/tasks?limit=0", 400),
+    ("GET", "/tasks?limit=many", 400),
+    ("GET", "/tasks?status=maybe", 400),
+    ("GET", "/tasks?after=general", 400),
+    ("GET", "/tasks/general?sort=colour", 400),
+    ("GET", "/trash?after=general:1", 400),
+    ("GET", "/trash?after=chores:1:5.0", 400),
+    ("GET", "/trash?after=general:1:5.0", 200),
+])
+def test_routes(store, method, target, status):
+    assert api.respond(method, target, b"")[0] == status
+
+def test_task_lifecycle(store):
+    status, task = api.respond("POST", "/tasks/general", b'{"name": "write", "descr": "d", "status": "done"}')
+    assert status == 201 and task.status == "done"
+    path = f"/tasks/general/{task.task_id}"
+    assert api.respond("PATCH", path, b'{"name": "rewrite"}')[1].name == "rewrite"
+    assert api.respond("PUT", path, b'{"descr": "d"}')[0] == 400
+    assert api.respond("DELETE", path, b"") == (204, None)
+    assert api.respond("GET", path, b"")[0] == 404
+    assert api.respond("POST", path + "/restore", b"")[1].name == "rewrite"
+
+@pytest.mark.parametrize("body", [b"{", b"[]", b'{"name": "x", "descr": "d", "colour": "red"}',
+                                  b'{"name": "x", "descr": "d", "status": "maybe"}'])
+def test_bad_bodies(store, body):
+    assert api.respond("POST", "/tasks/general", body)[0] == 400
+    assert logic.general_tasks() == []
+
+@pytest.mark.parametrize("sort", ["level", "name"])
+def test_sorted_pages_continue_after_a_deleted_task(store, sort):
+    for i in range(7):
+        logic.add_project_task(f"p{i % 4}", "py", "d", logic.PROJECT_LEVELS[i % 3])
+    expected = sorted(logic.project_tasks(), key=logic.sort_key(sort))
+    tasks, after = [], None
+    while True:
+        target = f"/tasks/project?sort={sort}&limit=3" + (f"&after={quote(after)}" if after else "")
+        status, page = api.respond("GET", target, b"")
+        assert status == 200
+        tasks += page["tasks"]
+        after = page["next"]
+        if not after:
+            break
+        # The task the next page continues after is gone before it is asked for
+        api.respond("DELETE", f"/tasks/project/{page['tasks'][-1].task_id}", b"")
+    assert tasks == expected
+
+def test_created_status_is_written_with_the_task(store, monkeypatch):
+    # One statement, so there is never a moment the task exists as pending
+    monkeypatch.setattr(logic, "update_tasks", None)
+    status, task = api.respond("POST", "/tasks/general", b'{"name": "x", "descr": "d", "status": "done"}')
+    assert status == 201 and logic.get_task("general", task.task_id).status == "done"
+
+
+# --- Over a socket ---
+def serve(test):
+    """ Run the coroutine test(port) against a server on a free port """
+    async def run():
+        server = api.Server(workers=2)
+        port = await server.start(port=0)
+        try:
+            await test(port)
+        finally:
+            await server.close()
+    asyncio.run(run())
+
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        headers[name.lower()] = value.strip()
+    body = await reader.readexactly(int(headers["content-length"]))
+    return status, headers, json.loads(body) if body else None
+
+def request(method, target, body=b"", close=False):
+    head = f"{method} {target} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n"
+    return (head + ("Connection: close\r\n" if close else "") + "\r\n").encode() + body
+
+def test_keep_alive(store):
+    async def test(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request("POST", "/tasks/general", b'{"name": "a", "descr": "d"}'))
+        status, headers, task = await read_response(reader)
+        assert status == 201 and headers["connection"] == "keep-alive"
+        # Two requests sent together are answered in order on the same connection
+        writer.write(request("GET", f"/tasks/general/{task['task_id']}") + request("GET", "/nowhere", close=True))
+        first, second = await read_response(reader), await read_response(reader)
+        assert first[0] == 200 and first[2]["name"] == "a"
+        assert second[0] == 404 and second[1]["connection"] == "close"
+        assert await reader.read() == b""
+        writer.close()
+    serve(test)
+
+@pytest.mark.parametrize("raw, status", [
+    (b"GARBAGE\r\n\r\n", 400),
+    (b"GET /" + b"x" * 70000 + b" HTTP/1.1\r\n\r\n", 414),
+    (b"GET /tasks HTTP/1.1\r\nX-Long: " + b"x" * 70000 + b"\r\n\r\n", 431),
+    (b"GET /tasks HTTP/1.1\r\n" + b"".join(b"X-%d: 1\r\n" % i for i in range(api.MAX_HEADERS + 1)) + b"\r\n", 431),
+    (b"POST /tasks/general HTTP/1.1\r\nContent-Length: -1\r\n\r\n", 400),
+    (b"POST /tasks/general HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % (api.MAX_BODY + 1), 413),
+    (b"POST /tasks/general HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n", 411),
+], ids=["request line", "long target", "long header", "many headers", "negative length", "large body", "chunked"])
+def test_malformed_requests(store, raw, status):
+    async def test(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        answer = await read_response(reader)
+        assert answer[0] == status and answer[1]["connection"] == "close"
+        writer.close()
+    serve(test)
+
+def test_slow_request_times_out(store, monkeypatch):
+    monkeypatch.setattr(api, "REQUEST_TIMEOUT", 0.2)
+    async def test(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        # The request line, then headers that never finish
+        writer.write(b"GET /tasks HTTP/1.1\r\nHost: test\r\n")
+        assert (await asyncio.wait_for(read_response(reader), 5))[0] == 408
+        writer.close()
+    serve(test)
+
+def test_other_clients_writes_are_served(store, monkeypatch):
+    monkeypatch.setattr(changes, "POLL_INTERVAL", 0.05)
+    task = logic.add_general_task("before", "d")
+    async def test(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request("GET", "/tasks/general"))
+        assert [t["name"] for t in (await read_response(reader))[2]["tasks"]] == ["before"]
+        # Written past this process's cache, as another client would
+        store.execute("UPDATE generalTask SET name = %s WHERE taskID = %s", ("after", task.task_id))
+        await asyncio.sleep(0.5)
+        writer.write(request("GET", "/tasks/general", close=True))
+        assert [t["name"] for t in (await read_response(reader))[2]["tasks"]] == ["after"]
+        writer.close()
+    serve(test)
@@ -0,0 +1,26 @@
+import storage
+import changes
+import logic
+
+
+def test_feed_replays_other_clients_writes(store):
+    kept = logic.add_general_task("kept", "d")
+    gone = logic.add_general_task("gone", "d")
+    changes.feed.start()
+    assert changes.feed.poll() == []
+
+    logic.update_general_task(kept.task_id, "renamed", "d")
+    logic.delete_task("general", gone.task_id)
+    added = logic.add_general_task("added", "d")
+    results = {task_id: task for task_type, task_id, task in changes.feed.poll()}
+    assert results[kept.task_id].name == "renamed"
+    assert results[gone.task_id] is None
+    assert results[added.task_id] == added
+    assert changes.feed.poll() == []
+
+def test_feed_asks_for_a_reload_when_too_far_behind(store, monkeypatch):
+    changes.feed.start()
+    monkeypatch.setattr(changes, "RESYNC_AFTER", 10)
+    logic.bulk_add_tasks([("general", [(f"g{i}", "d") for i in range(20)])])
+    assert changes.feed.poll(limit=5) is None
+    assert changes.feed.poll() == []
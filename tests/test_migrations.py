@@ -0,0 +1,64 @@
+import sqlite3
+import pytest
+import migrations
+
+
+def test_sqlite_upgrade_from_string_dates(tmp_path, monkeypatch):
+    conn = sqlite3.connect(str(tmp_path / "old.db"))
+    conn.execute("PRAGMA foreign_keys=ON")
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS[:4])
+    migrations.migrate(conn, "sqlite")
+    conn.execute("INSERT INTO campus (name, module, dueDate, descr) VALUES "
+                 "('a', 'NEW', '2025-06.05', 'x'), ('b', NULL, 'garbage', 'y'), ('c', 'M2', '2025-02.30', 'z')")
+    conn.commit()
+    monkeypatch.undo()
+
+    applied = migrations.migrate(conn, "sqlite")
+    assert applied == list(range(5, len(migrations.MIGRATIONS) + 1))
+    assert conn.execute("SELECT name, module, dueDate, status, deletedAt FROM campus ORDER BY name").fetchall() == [
+        ("a", "NEW", "2025-06-05", "pending", None), ("b", None, None, "pending", None), ("c", "M2", None, "pending", None)]
+    assert conn.execute("SELECT module FROM modules ORDER BY module").fetchall() == [("M2",), ("NEW",)]
+    # Rows written before the search index existed are found
+    assert conn.execute("SELECT COUNT(*) FROM tasksearch WHERE tasksearch MATCH 'a'").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'alltasks'").fetchone()[0] == 0
+    # Running again finds nothing to do
+    assert migrations.migrate(conn, "sqlite") == []
+
+
+@pytest.mark.parametrize("value, valid", [("2025-06-05", True), ("2024-02-29", True), ("2025-02-30", False),
+                                          ("2025-1-5", False), ("20250605", False), ("garbage", False)])
+def test_is_iso_date(value, valid):
+    assert migrations.is_iso_date(value) is valid
+
+
+# The tables as the app created them before there were migrations
+MYSQL_BASELINE = [
+    "CREATE TABLE modules (module VARCHAR(100) PRIMARY KEY)",
+    "CREATE TABLE campus (assignmentID INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(255) NOT NULL, "
+    "module VARCHAR(100), dueDate VARCHAR(10), descr TEXT)",
+    "CREATE TABLE projects (projectID INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(255) NOT NULL, "
+    "techStack VARCHAR(255), descr TEXT, level VARCHAR(20))",
+    "CREATE TABLE learn (techID INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(255) NOT NULL, lang VARCHAR(100), descr TEXT)",
+    "CREATE TABLE generalTask (taskID INT AUTO_INCREMENT PRIMARY KEY, name VARCHAR(255) NOT NULL, descr TEXT)",
+    "CREATE TABLE alltasks (taskID INT, name VARCHAR(255), descr TEXT)"
+]
+
+def test_mysql_upgrade_from_baseline(mysql_conn):
+    cursor = mysql_conn.cursor(buffered=True)
+    for statement in MYSQL_BASELINE:
+        cursor.execute(statement)
+    cursor.execute("INSERT INTO campus (name, module, dueDate, descr) VALUES "
+                   "('a', 'NEW', '2025-06.05', 'x'), ('b', NULL, 'garbage', 'y'), ('c', 'M2', '2025-02.30', 'z'), "
+                   "('d', NULL, '2025-1-5', 'w')")
+    mysql_conn.commit()
+
+    assert migrations.migrate(mysql_conn, "mysql") == list(range(1, len(migrations.MIGRATIONS) + 1))
+    cursor.execute("SELECT name, module, dueDate, status, deletedAt FROM campus ORDER BY name")
+    assert [(name, module, due and due.isoformat(), status, deleted) for name, module, due, status, deleted in cursor.fetchall()] == [
+        ("a", "NEW", "2025-06-05", "pending", None), ("b", None, None, "pending", None), ("c", "M2", None, "pending", None),
+        ("d", None, None, "pending", None)]
+    # The old alltasks table is left alone
+    cursor.execute("SELECT table_type FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = 'alltasks'")
+    assert cursor.fetchone()[0] == "BASE TABLE"
+    assert migrations.migrate(mysql_conn, "mysql") == []
+    cursor.close()
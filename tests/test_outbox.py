@@ -0,0 +1,78 @@
+import pytest
+import logic
+import outbox
+import service
+import storage
+
+
+def test_queued_edits_sync_in_order(store):
+    task = service.queue_add("general", {"name": "draft", "descr": "d"})
+    assert task.task_id < 0 and task.syncing
+    service.queue_update("general", task.task_id, {"name": "final", "descr": "d"})
+    assert service.queued_edits() == 2
+
+    results = service.sync()
+    assert service.queued_edits() == 0
+    shown = {shown_id: record for task_type, shown_id, record in results}
+    saved = shown[task.task_id]
+    assert saved.task_id > 0 and saved.name == "final" and not saved.syncing
+    assert logic.get_task("general", saved.task_id) == saved
+
+def test_edits_queued_against_a_synced_add(store):
+    task = service.queue_add("general", {"name": "a", "descr": "d"})
+    real = service.sync()[0][2]
+    # Queued against the provisional id the list still shows
+    service.queue_update_many([task], "status", "done")
+    service.sync()
+    assert logic.get_task("general", real.task_id).status == "done"
+
+def test_retried_batch_is_applied_once(store):
+    ops = [("key-1", "add", "general", None, ["once", "d"], -1),
+           ("key-2", "update_many", "general", None, {"ids": [-1], "column": "status", "value": "done"}, -2)]
+    first = logic.apply_ops(ops, lambda provisional: None)
+    # The commit went through but the reply was lost; the same batch comes again
+    second = logic.apply_ops(ops, lambda provisional: None)
+    assert first == second
+    assert [(task.name, task.status) for task in logic.general_tasks()] == [("once", "done")]
+
+def test_rejected_edit_is_parked(store):
+    good = service.queue_add("general", {"name": "good", "descr": "d"})
+    outbox.outbox.append("add", "general", values=[None, "name is NOT NULL"])
+    service.queue_add("general", {"name": "after", "descr": "d"})
+    service.sync()
+    assert service.queued_edits() == 0 and service.rejected_edits() == 1
+    assert sorted(task.name for task in logic.general_tasks()) == ["after", "good"]
+    assert good.task_id < 0
+
+def test_delete_and_undo_before_sync(store):
+    task = service.queue_add("general", {"name": "oops", "descr": "d"})
+    service.queue_delete([task])
+    service.queue_restore([task])
+    service.sync()
+    assert [t.name for t in logic.general_tasks()] == ["oops"]
+
+class Offline:
+    def __getattr__(self, name):
+        raise ConnectionError("database unreachable")
+
+def test_queued_campus_edits_stay_off_the_database(store, monkeypatch):
+    store.execute("INSERT INTO modules (module) VALUES (%s)", ("A",))
+    assert logic.modules() == ["A"]
+    monkeypatch.setattr(storage, "_storage", Offline())
+    task = service.queue_add("campus", {"name": "essay", "module": "A", "dueDate": "2025-06-05", "descr": "d"})
+    service.queue_update("campus", task.task_id, {"name": "essay", "module": "A", "dueDate": "2025-06-06", "descr": "d"})
+    with pytest.raises(service.ValidationError):
+        service.queue_add("campus", {"name": "other", "module": "Z", "dueDate": None, "descr": "d"})
+
+    monkeypatch.setattr(storage, "_storage", store)
+    service.sync()
+    assert [(t.name, t.due_date) for t in logic.campus_tasks()] == [("essay", "2025-06-06")]
+
+def test_unchecked_module_is_parked_on_sync(store, monkeypatch):
+    # Never read the module list, so the foreign key decides
+    monkeypatch.setattr(storage, "_storage", Offline())
+    service.queue_add("campus", {"name": "essay", "module": "Z", "dueDate": None, "descr": "d"})
+    monkeypatch.setattr(storage, "_storage", store)
+    service.sync()
+    assert service.queued_edits() == 0 and service.rejected_edits() == 1
+    assert logic.campus_tasks() == []
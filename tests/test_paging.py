@@ -0,0 +1,108 @@
+import pytest
+import queries
+import storage
+import logic
+
+
+@pytest.fixture
+def tasks(store):
+    store.execute("INSERT INTO modules (module) VALUES (%s)", ("A",))
+    store.execute("INSERT INTO modules (module) VALUES (%s)", ("B",))
+    logic.bulk_add_tasks([
+        ("campus", [(f"c{i % 7}", "AB"[i % 2] if i % 3 else None, f"2025-0{1 + i % 9}-1{i % 10}" if i % 4 else None, "d")
+                    for i in range(40)]),
+        ("project", [(f"p{i % 5}", "py", "d", logic.PROJECT_LEVELS[i % 3]) for i in range(30)]),
+        ("general", [(f"g{i}", "d") for i in range(25)])
+    ])
+    ids = [task.task_id for task in logic.general_tasks()]
+    logic.update_tasks("general", ids[::3], "status", "done")
+    return sorted(logic.all_tasks(), key=lambda task: (logic.TASK_TYPES.index(task.task_type), task.task_id))
+
+def read_pages(limit, **kwargs):
+    tasks, position = [], (0, 0)
+    types = kwargs.pop("task_types", logic.TASK_TYPES)
+    while position[0] < len(types):
+        page = logic.all_tasks_page(types, position, limit, **kwargs)
+        tasks += page
+        if len(page) < limit:
+            break
+        position = (types.index(page[-1].task_type), page[-1].task_id)
+    return tasks
+
+@pytest.mark.parametrize("limit", [1, 7, 100])
+def test_pages_cover_every_category_in_order(tasks, limit):
+    assert read_pages(limit) == tasks
+    # Again from the cache
+    assert read_pages(limit) == tasks
+
+@pytest.mark.parametrize("status", ["pending", "done"])
+def test_status_pages(tasks, status):
+    assert read_pages(4, status=status) == [task for task in tasks if task.status == status]
+
+def test_pages_of_some_categories(tasks):
+    types = ["general", "project"]
+    expected = sorted((task for task in tasks if task.task_type in types),
+                      key=lambda task: (types.index(task.task_type), task.task_id))
+    assert read_pages(6, task_types=types) == expected
+
+def read_sorted(task_type, sort, filters, status, limit=6):
+    tasks, after = [], None
+    while True:
+        page = logic.sorted_tasks_page(task_type, sort, filters, after, limit, status)
+        tasks += page
+        if len(page) < limit:
+            return tasks
+        after = logic.sort_position(page[-1], sort)
+
+@pytest.mark.parametrize("task_type, sort, filters", [
+    ("campus", "dueDate", {}), ("campus", "module", {}), ("campus", "name", {}), ("campus", "dueDate", {"module": "A"}),
+    ("campus", None, {"module": "B"}), ("project", "level", {}), ("project", "name", {"level": "Easy"}),
+    ("general", "name", {})
+])
+@pytest.mark.parametrize("status", [None, "pending"])
+def test_sorted_pages(tasks, task_type, sort, filters, status):
+    expected = [task for task in tasks if task.task_type == task_type
+                and (status is None or task.status == status)
+                and all(task.columns()[column] == value for column, value in filters.items())]
+    expected.sort(key=logic.sort_key(sort))
+    assert read_sorted(task_type, sort, filters, status) == expected
+
+def query_plan(store, sql):
+    if not isinstance(store, storage.SQLiteStorage):
+        pytest.skip("SQLite query plan")
+    return "; ".join(row[3] for row in store.fetch_all("EXPLAIN QUERY PLAN " + sql, [None] * sql.count("%s")))
+
+@pytest.mark.parametrize("task_type, sort", [
+    (task_type, sort) for task_type in logic.TASK_TYPES for sort in queries.SORTS[task_type]
+])
+@pytest.mark.parametrize("after", [None, "value"])
+def test_status_pages_are_read_in_index_order(store, task_type, sort, after):
+    plan = query_plan(store, queries.sorted_page(task_type, sort, [], True, after))
+    assert f"_status_{queries.SORTS[task_type][sort]} (status=?" in plan and "TEMP B-TREE" not in plan
+
+@pytest.mark.parametrize("task_type, sort, column", [
+    ("campus", "dueDate", "module"), ("project", "name", "level"), ("learning", "name", "lang")
+])
+@pytest.mark.parametrize("after", [None, "value"])
+def test_filtered_status_pages_are_read_in_index_order(store, task_type, sort, column, after):
+    plan = query_plan(store, queries.sorted_page(task_type, sort, [column], True, after))
+    assert f"_status_{column}_{sort} (status=? AND {column}=?" in plan and "TEMP B-TREE" not in plan
+
+@pytest.mark.parametrize("after", [None, "value"])
+def test_level_pages_are_read_in_index_order(store, after):
+    plan = query_plan(store, queries.sorted_page("project", "level", [], False, after))
+    assert "USING INDEX projects_levelRank" in plan and "TEMP B-TREE" not in plan
+
+def test_bad_sort_and_filter(tasks):
+    with pytest.raises(ValueError):
+        logic.sorted_tasks_page("general", "dueDate")
+    with pytest.raises(ValueError):
+        logic.sorted_tasks_page("general", None, {"module": "A"})
+
+def test_cache_follows_writes(tasks):
+    read_pages(100)
+    task = logic.add_general_task("new", "d")
+    assert read_pages(100)[-1] == task
+    logic.update_tasks("general", [task.task_id], "status", "done")
+    assert task.key not in [t.key for t in read_pages(100, status="pending")]
+    assert read_pages(100, status="done")[-1].key == task.key
@@ -0,0 +1,115 @@
+import pytest
+import migrations
+import storage
+import logic
+
+
+def test_migrated_to_latest(store):
+    with store.connection() as conn:
+        cursor = conn.cursor()
+        assert migrations.schema_version(cursor, store.name) == len(migrations.MIGRATIONS)
+        cursor.close()
+
+def test_add_get_update_delete(store):
+    task = logic.add_general_task("Laundry", "Sunday")
+    assert (task.name, task.description, task.status) == ("Laundry", "Sunday", "pending")
+    assert logic.get_task("general", task.task_id) == task
+
+    updated = logic.update_general_task(task.task_id, "Laundry", "Saturday")
+    assert updated.description == "Saturday"
+
+    assert logic.delete_task("general", task.task_id)
+    assert logic.get_task("general", task.task_id) is None
+    assert not logic.delete_task("general", task.task_id)
+
+def test_categories_read_into_their_records(store):
+    store.execute("INSERT INTO modules (module) VALUES (%s)", ("CS101",))
+    campus = logic.add_campus_task("Essay", "CS101", "2025-06-05", "2000 words")
+    project = logic.add_project_task("Site", "py", "static", "Easy")
+    learning = logic.add_learning_task("Rust", "rust", "book")
+    assert (campus.module, campus.due_date) == ("CS101", "2025-06-05")
+    assert (project.tech_stack, project.level) == ("py", "Easy")
+    assert learning.lang == "rust"
+    assert sorted(task.key for task in logic.all_tasks()) == sorted([campus.key, project.key, learning.key])
+
+def test_bulk_add_and_export(store):
+    rows = [(f"g{i}", "d") for i in range(1200)]
+    assert logic.bulk_add_tasks([("general", rows[:700]), ("general", rows[700:])]) == 1200
+    batches = list(logic.export_tasks("general", batch_size=500))
+    assert [len(batch) for batch in batches] == [500, 500, 200]
+    assert [tuple(row) for batch in batches for row in batch] == [row + ("pending",) for row in rows]
+
+def test_mysql_executemany_is_not_prepared():
+    # MySQL Connector runs a prepared executemany row by row; a plain cursor sends one INSERT
+    class Cursor:
+        def __init__(self, **kind):
+            self.kind, self.calls = kind, []
+        def executemany(self, sql, rows):
+            self.calls.append((sql, rows))
+        def close(self):
+            pass
+    class Conn:
+        def cursor(self, **kind):
+            self.opened = Cursor(**kind)
+            return self.opened
+    conn = Conn()
+    cursor = storage.PreparedCursor(conn, {})
+    cursor.executemany("INSERT INTO generalTask (name, descr) VALUES (%s, %s)", [["a", "d"], ["b", "d"]])
+    assert conn.opened.kind == {"buffered": True}
+    assert conn.opened.calls[0][1] == [("a", "d"), ("b", "d")]
+
+def test_mysql_dropped_connection_is_replaced_and_retried(monkeypatch):
+    mysql = pytest.importorskip("mysql.connector")
+    opened = []
+    class Cursor:
+        description, rowcount = [("n",)], 1
+        def __init__(self, conn):
+            self.conn = conn
+        def execute(self, sql, params):
+            if self.conn.dropped:
+                raise mysql.errors.OperationalError(msg="Lost connection", errno=2013)
+        def fetchall(self):
+            return [(len(opened),)]
+    class Conn:
+        def __init__(self, **config):
+            self.connection_id, self.dropped, self.pings = len(opened), False, 0
+            opened.append(self)
+        def cursor(self, **kind):
+            return Cursor(self)
+        def ping(self, *args, **kwargs):
+            self.pings += 1
+        def commit(self):
+            pass
+        def rollback(self):
+            if self.dropped:
+                raise mysql.errors.OperationalError(msg="Lost connection", errno=2013)
+        def close(self):
+            pass
+    monkeypatch.setattr(mysql, "connect", Conn)
+    store = storage.MySQLStorage(pool_size=2)
+    store._migrated = True
+    assert store.fetch_all("SELECT 1") == [(1,)]
+    assert store.fetch_all("SELECT 1") == [(1,)] and len(opened) == 1
+    opened[0].dropped = True
+    assert store.fetch_all("SELECT 1") == [(2,)]
+    assert len(opened) == 2 and store._idle == [opened[1]] and store._open == 1
+    assert sum(conn.pings for conn in opened) == 0
+
+def test_bulk_add_is_one_transaction(store):
+    with pytest.raises(Exception):
+        logic.bulk_add_tasks([("general", [("ok", "d")]), ("general", [(None, "name is NOT NULL")])])
+    assert logic.general_tasks() == []
+
+def test_search(store):
+    logic.add_general_task("Write the quarterly report", "numbers")
+    logic.add_project_task("Reporting tool", "py", "charts", "Easy")
+    logic.add_general_task("Laundry", "Sunday")
+    assert {task.name for task in logic.search_tasks("report")} == {"Write the quarterly report", "Reporting tool"}
+    assert [task.name for task in logic.search_tasks("quarterly rep")] == ["Write the quarterly report"]
+    assert logic.search_tasks("nothing") == []
+
+def test_search_by_status_is_not_cut_by_the_limit(store):
+    logic.bulk_add_tasks([("general", [("alpha", "d")] * 60), ("project", [("alpha report", "py", "d", "Easy")])])
+    logic.update_tasks("general", [task.task_id for task in logic.general_tasks()], "status", "done")
+    assert [task.name for task in logic.search_tasks("alpha", 50, "pending")] == ["alpha report"]
+    assert len(logic.search_tasks("alpha", 50, "done")) == 50
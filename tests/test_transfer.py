@@ -0,0 +1,29 @@
+import json
+import pytest
+import logic
+import transfer
+
+
+@pytest.mark.parametrize("name", ["tasks.csv", "tasks.jsonl"])
+def test_export_and_import_keep_the_status(store, tmp_path, name):
+    store.execute("INSERT INTO modules (module) VALUES (%s)", ("A",))
+    done = logic.add_campus_task("done", "A", "2025-06-05", "d")
+    logic.add_project_task("open", "py", "d", "Easy")
+    logic.update_tasks("campus", [done.task_id], "status", "done")
+    path = str(tmp_path / name)
+    assert transfer.main(["export", "all", path]) == 0
+    for task in logic.all_tasks():
+        logic.delete_task(task.task_type, task.task_id)
+    assert transfer.main(["import", "all", path, "--strict"]) == 0
+    assert sorted((task.name, task.status) for task in logic.all_tasks()) == [("done", "done"), ("open", "pending")]
+
+def test_import_validates_the_status(store, tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in [
+        {"name": "no status", "descr": "d"},
+        {"name": "bad status", "descr": "d", "status": "later"},
+        {"name": "done", "descr": "d", "status": "done"}
+    ]))
+    assert transfer.main(["import", "general", str(path)]) == 0
+    assert sorted((task.name, task.status) for task in logic.general_tasks()) == [("done", "done"), ("no status", "pending")]
+    assert transfer.main(["import", "general", str(path), "--strict"]) == 1
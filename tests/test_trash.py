@@ -0,0 +1,73 @@
+import pytest
+import time
+import logic
+import service
+import trash
+
+
+def test_deleted_tasks_leave_every_read(store):
+    store.execute("INSERT INTO modules (module) VALUES (%s)", ("A",))
+    task = logic.add_campus_task("gone", "A", "2025-06-05", "d")
+    kept = logic.add_campus_task("kept", "A", "2025-06-06", "d")
+    logic.delete_task("campus", task.task_id)
+    assert logic.campus_tasks() == [kept]
+    assert logic.all_tasks_page(["campus"], (0, 0), 10) == [kept]
+    assert logic.sorted_tasks_page("campus", "dueDate", {"module": "A"}) == [kept]
+    assert logic.due_tasks("2025-01-01", "2026-01-01") == [kept]
+    assert logic.update_campus_task(task.task_id, "edited", "A", None, "d") is None
+    assert [t.key for t in logic.trash()] == [task.key]
+
+def test_restore(store):
+    tasks = [logic.add_general_task(f"g{i}", "d") for i in range(3)]
+    logic.update_tasks("general", [tasks[0].task_id], "status", "done")
+    service.queue_delete(tasks)
+    service.sync()
+    assert logic.general_tasks() == [] and len(logic.trash()) == 3
+    restored = logic.restore_tasks("general", [tasks[0].task_id])
+    assert restored[tasks[0].task_id].status == "done"
+    assert [t.task_id for t in logic.general_tasks()] == [tasks[0].task_id]
+
+def test_purge_removes_only_expired_tasks(store):
+    logic.bulk_add_tasks([("general", [(f"g{i}", "d") for i in range(25)])])
+    ids = sorted(task.task_id for task in logic.general_tasks())
+    for sql, params in logic.bulk_statements("general", ids[:20]):
+        store.execute(sql, params)
+    # Ten of them were deleted long ago
+    store.execute(f"UPDATE generalTask SET deletedAt = %s WHERE taskID IN ({', '.join(['%s'] * 10)})",
+                  [time.time() - 40 * 86400] + ids[:10])
+    assert logic.purge_expired("general", time.time() - 30 * 86400, batch_size=4) == 4
+    assert trash.purge(days=30, batch_size=4, pause=0) == 6
+    assert sorted(task.task_id for task in logic.trash()) == ids[10:20]
+    assert len(logic.general_tasks()) == 5
+
+def test_deleted_tasks_leave_search(store):
+    logic.bulk_add_tasks([("general", [("alpha", "d")] * 60), ("project", [("alpha report", "py", "d", "Easy")])])
+    for task in logic.general_tasks():
+        logic.delete_task("general", task.task_id)
+    assert [task.name for task in logic.search_tasks("alpha", 50)] == ["alpha report"]
+    assert [task.name for task in logic.search_tasks("alpha", 50, "pending")] == ["alpha report"]
+    restored = logic.restore_tasks("general", [task.task_id for task in logic.trash()][:1])
+    assert len(logic.search_tasks("alpha", 50)) == 2 == len(restored) + 1
+
+def read_trash(limit):
+    tasks, after = [], None
+    while True:
+        page, after = service.trash_page(after, limit)
+        tasks += page
+        if after is None:
+            return tasks
+
+@pytest.mark.parametrize("limit", [1, 4, 100])
+def test_trash_pages(store, limit):
+    logic.bulk_add_tasks([("general", [(f"g{i}", "d") for i in range(9)]),
+                          ("project", [(f"p{i}", "py", "d", "Easy") for i in range(5)])])
+    general = sorted(task.task_id for task in logic.general_tasks())
+    projects = sorted(task.task_id for task in logic.project_tasks())
+    # Tasks deleted together share their deletedAt, in both categories
+    for task_type, ids in [("general", general[:3]), ("project", projects), ("general", general[3:])]:
+        for sql, params in logic.bulk_statements(task_type, ids):
+            store.execute(sql, params)
+        time.sleep(0.01)
+    expected = ([("general", i) for i in reversed(general[3:])] + [("project", i) for i in reversed(projects)]
+                + [("general", i) for i in reversed(general[:3])])
+    assert [task.key for task in read_trash(limit)] == expected
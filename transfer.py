@@ -0,0 +1,159 @@
+""" Bulk import and export of tasks as CSV or JSON Lines.
+
+    python transfer.py export campus campus.csv
+    python transfer.py export all tasks.jsonl
+    python transfer.py import all tasks.jsonl --batch-size 5000
+
+Files are streamed row by row in both directions, so memory use does not depend on their size.
+With the category "all" every row carries a "category" column naming its task type. Rows carry
+their status; an imported row without one is pending.
+"""
+from datetime import datetime
+import argparse
+import json
+import csv
+import sys
+import logic
+
+# ISO dates are stored; "yyyy-MM.dd" is what older versions of the app wrote
+DATE_FORMATS = ["%Y-%m-%d", "%Y-%m.%d"]
+
+
+class InvalidRow(ValueError):
+    pass
+
+
+# --- Reading and writing files ---
+def file_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+def read_records(path, fmt):
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for line, record in enumerate(csv.DictReader(f), start=2):
+                yield line, record
+        else:
+            for line, text in enumerate(f, start=1):
+                if text.strip():
+                    yield line, json.loads(text)
+
+def write_records(path, fmt, columns, records):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for record in records:
+                writer.writerow([record.get(column) for column in columns])
+                count += 1
+        else:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+                count += 1
+    return count
+
+
+# --- Validation ---
+def clean_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime(DATE_FORMATS[0])
+        except ValueError:
+            pass
+    raise InvalidRow(f"bad dueDate {value!r}")
+
+def validate(record, category):
+    task_type = record.get("category") if category == "all" else category
+    if task_type not in logic.TASK_COLUMNS:
+        raise InvalidRow(f"unknown category {task_type!r}")
+
+    columns = logic.TRANSFER_COLUMNS[task_type]
+    values = {column: (str(record.get(column) or "")).strip() for column in columns}
+    if not values["name"]:
+        raise InvalidRow("missing name")
+    if task_type == "campus":
+        values["module"] = values["module"] or None
+        values["dueDate"] = clean_date(values["dueDate"]) if values["dueDate"] else None
+    if task_type == "project" and values["level"] not in logic.PROJECT_LEVELS:
+        raise InvalidRow(f"level must be one of {', '.join(logic.PROJECT_LEVELS)}")
+    values["status"] = values["status"] or "pending"
+    if values["status"] not in logic.TASK_STATUSES:
+        raise InvalidRow(f"status must be one of {', '.join(logic.TASK_STATUSES)}")
+    return task_type, tuple(values[column] for column in columns)
+
+def valid_rows(records, category, strict, errors):
+    for line, record in records:
+        try:
+            yield validate(record, category)
+        except InvalidRow as e:
+            if strict:
+                raise InvalidRow(f"line {line}: {e}")
+            errors.append(line)
+            print(f"line {line}: {e}, skipped", file=sys.stderr)
+
+def batched(rows, batch_size):
+    """ Group (task_type, row) pairs into (task_type, rows) batches of batch_size """
+    pending = {}
+    for task_type, row in rows:
+        batch = pending.setdefault(task_type, [])
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield task_type, batch
+            pending[task_type] = []
+    for task_type, batch in pending.items():
+        if batch:
+            yield task_type, batch
+
+
+# --- Commands ---
+def import_tasks(args):
+    errors = []
+    records = read_records(args.file, file_format(args.file, args.format))
+    rows = valid_rows(records, args.category, args.strict, errors)
+    count = logic.bulk_add_tasks(batched(rows, args.batch_size), "import")
+    print(f"Imported {count} tasks, skipped {len(errors)} invalid rows")
+
+def exported_records(category, batch_size):
+    for task_type in (logic.TASK_TYPES if category == "all" else [category]):
+        columns = logic.TRANSFER_COLUMNS[task_type]
+        for rows in logic.export_tasks(task_type, batch_size):
+            for row in rows:
+                record = dict(zip(columns, row))
+                if category == "all":
+                    record["category"] = task_type
+                yield record
+
+def export_tasks(args):
+    if args.category == "all":
+        columns = ["category"] + sorted({column for columns in logic.TRANSFER_COLUMNS.values() for column in columns})
+    else:
+        columns = logic.TRANSFER_COLUMNS[args.category]
+    count = write_records(args.file, file_format(args.file, args.format), columns,
+                          exported_records(args.category, args.batch_size))
+    print(f"Exported {count} tasks")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or export ToDo List tasks")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("category", choices=logic.TASK_TYPES + ["all"])
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per executemany / fetch")
+    parser.add_argument("--strict", action="store_true", help="abort the whole import on the first invalid row")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "import":
+            import_tasks(args)
+        else:
+            export_tasks(args)
+    except InvalidRow as e:
+        print(f"Import aborted, nothing was written: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
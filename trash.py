@@ -0,0 +1,52 @@
+""" Purges deleted tasks once they have been in the trash for TODO_TRASH_DAYS.
+
+    python trash.py --days 30 --batch-size 200
+
+Deleting a task only stamps its deletedAt, so it can be restored from the trash. purge() removes
+the expired ones for good in batches of PURGE_BATCH, each its own short transaction on rows
+found through the deletedAt index, with a pause between batches, so other clients' writes wait
+on it for one batch at most however much has expired. The desktop client runs it in the
+background every PURGE_INTERVAL seconds.
+"""
+import argparse
+import time
+import sys
+import os
+import logic
+
+TRASH_DAYS = float(os.getenv("TODO_TRASH_DAYS", "30"))
+
+# Rows removed per transaction, and seconds waited between two of them
+PURGE_BATCH = int(os.getenv("TODO_PURGE_BATCH", "200"))
+PURGE_PAUSE = 0.05
+
+# Seconds between background purges; 0 turns them off
+PURGE_INTERVAL = float(os.getenv("TODO_PURGE_INTERVAL", "3600"))
+
+
+def purge(days=TRASH_DAYS, batch_size=PURGE_BATCH, pause=PURGE_PAUSE):
+    """ Remove every task deleted more than days ago; returns how many were removed """
+    before = time.time() - days * 86400
+    removed = 0
+    for task_type in logic.TASK_TYPES:
+        while True:
+            count = logic.purge_expired(task_type, before, batch_size)
+            removed += count
+            if count < batch_size:
+                break
+            time.sleep(pause)
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove ToDo List tasks that have expired in the trash")
+    parser.add_argument("--days", type=float, default=TRASH_DAYS, help="how long deleted tasks are kept")
+    parser.add_argument("--batch-size", type=int, default=PURGE_BATCH, help="rows removed per transaction")
+    args = parser.parse_args(argv)
+    logic.connect()
+    print(f"Purged {purge(args.days, args.batch_size)} tasks")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())